@@ -0,0 +1,69 @@
+"""
+Memory used per Expression node on a reference model.
+
+Builds the Jacobian of a small chemical-kinetics style model with eager
+symbolic differentiation and reports the traced allocation of the whole graph,
+and the size of the node objects themselves (instance, __dict__ if any,
+operand container, and the ints cached on the node: the free-symbol mask, whose
+width grows with the number of live Symbols, depth and size) per distinct node.
+A mask shared with a child is counted once.
+
+    python benchmarks/node_memory.py [n]
+
+With 2n Symbols alive the masks still grow with n, but a node whose free symbols
+are those of a child reuses its mask:
+
+    n=200:  19203 nodes, 109 bytes per node object, 134 traced
+    n=1000: 96003 nodes, 123 bytes per node object, 224 traced
+"""
+import sys
+import tracemalloc
+
+from autodiff.elementary import *
+from autodiff.symbolic import *
+
+
+def reference_model(n):
+    xs = symbols('x0:%d' % n)
+    ks = symbols('k0:%d' % n)
+    outputs = []
+    for i in range(n):
+        a, b = xs[i], xs[(i + 1) % n]
+        rate = ks[i] * exp(-1 / (a * a + 1)) * b ** 2 - sqrt(a) * sin(b) / (1 + cos(a) ** 2)
+        outputs.append(rate - log(1 + a * b))
+    return outputs, list(xs)
+
+
+def node_bytes(node, seen):
+    size = sys.getsizeof(node)
+    if hasattr(node, '__dict__'):
+        size += sys.getsizeof(node.__dict__)
+    if hasattr(node, 'operands'):
+        size += sys.getsizeof(node.operands)
+    for name in ('mask', 'depth', 'size'):
+        value = getattr(node, name)
+        # Small ints are shared by the interpreter, and a mask may be shared with a child:
+        # count every int object once.
+        if not -5 <= value <= 256 and id(value) not in seen:
+            seen.add(id(value))
+            size += sys.getsizeof(value)
+    return size
+
+
+def main(n=200):
+    tracemalloc.start()
+    outputs, xs = reference_model(n)
+    jacobian = [[diff(f, x, lazy=False) for x in xs] for f in outputs]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    order = postorder([entry for row in jacobian for entry in row] + outputs)
+    nodes = len(order)
+    seen = set()
+    print('distinct nodes: %d' % nodes)
+    print('traced memory:  %.2f MiB' % (current / 2 ** 20))
+    print('bytes per node: %.1f traced, %.1f node objects' % (current / nodes,
+                                                              sum(node_bytes(i, seen) for i in order) / nodes))
+
+
+if __name__ == '__main__':
+    main(*[int(i) for i in sys.argv[1:]])
@@ -0,0 +1,183 @@
+# checkpointed reverse mode for time-stepped computations
+#
+# Reverse mode keeps every node of the trace until the backward sweep, so a
+# simulation of 10^5 steps holds 10^5 steps worth of Nodes. checkpoint_vjp
+# stores the states of selected steps only, as plain floats, and records one
+# short segment at a time during the backward sweep, recomputing it forward
+# from the nearest stored state. Fewer stored states cost more recomputation.
+import math
+import sys
+
+import numpy as np
+
+from autodiff.node import Node
+from autodiff.model import _trace, _sweep
+
+
+def _comb(n, k):
+    """ Helper function: the binomial coefficient n choose k, as math.comb of Python 3.8
+    """
+    result = 1
+    for i in range(min(k, n - k)):
+        result = result * (n - i) // (i + 1)
+    return result
+
+
+def _isqrt(n):
+    """ Helper function: the largest int whose square is at most n, as math.isqrt of Python 3.8
+    """
+    r = int(math.sqrt(n))
+    while r * r > n:
+        r -= 1
+    while (r + 1) * (r + 1) <= n:
+        r += 1
+    return r
+
+
+def _values(outputs):
+    """ Helper function: the state returned by a step, as a list of floats
+    """
+    return [out.val if isinstance(out, Node) else float(out) for out in outputs]
+
+
+class _Schedule():
+    """ Helper class: runs the steps of one checkpoint_vjp call and keeps its counters
+    """
+
+    def __init__(self, step):
+        self.step = step
+        self.final = None
+        self.stored = 0
+        self.stats = {'steps': 0, 'recorded_steps': 0, 'peak_snapshots': 0, 'peak_tape_nodes': 0, 'peak_tape_bytes': 0}
+
+    def advance(self, state, n):
+        """ Returns the state n steps after state, computed on floats without recording a trace
+        """
+        for _ in range(n):
+            state = _values(self.step(*state))
+        self.stats['steps'] += n
+        return state
+
+    def store(self, count):
+        """ Count count more (or, negative, fewer) stored states
+        """
+        self.stored += count
+        self.stats['peak_snapshots'] = max(self.stats['peak_snapshots'], self.stored)
+
+    def reverse(self, state, n, adjoint):
+        """ Record n steps from state and sweep adjoint, the cotangent of their end state, back to state
+        """
+        variables = [Node(value) for value in state]
+        outputs = variables
+        for _ in range(n):
+            outputs = list(self.step(*outputs))
+        if self.final is None:
+            # The first segment reversed is the last one of the computation.
+            self.final = _values(outputs)
+        trace = _trace(outputs)
+        stats = self.stats
+        stats['steps'] += n
+        stats['recorded_steps'] += n
+        order = trace[0]
+        if len(order) > stats['peak_tape_nodes']:
+            stats['peak_tape_nodes'] = len(order)
+            stats['peak_tape_bytes'] = sum(sys.getsizeof(node) + sys.getsizeof(node.inputs)
+                                           + sys.getsizeof(node.gradients) for node in order)
+        return _sweep(outputs, variables, adjoint.reshape(-1, 1), trace)[:, 0]
+
+    def binomial(self, state, n, adjoint, free):
+        """ Reverse n steps from state with free more snapshots available, splitting them binomially
+        """
+        if free == 0:
+            # No snapshot left: every step is recomputed from state.
+            for i in range(n - 1, -1, -1):
+                adjoint = self.reverse(self.advance(state, i), 1, adjoint)
+            return adjoint
+        # The right part is reversed first with one snapshot less; the loop then continues on
+        # the left part, so the recursion is at most free deep.
+        while n > 1:
+            # The fewest sweeps over the steps r such that n steps fit in comb(free + r, free);
+            # the right part then fits with one snapshot less, the left part with one sweep less.
+            r = 1
+            while _comb(free + r, free) < n:
+                r += 1
+            right = min(_comb(free - 1 + r, free - 1), n - 1)
+            middle = self.advance(state, n - right)
+            self.store(1)
+            adjoint = self.binomial(middle, right, adjoint, free - 1)
+            self.store(-1)
+            n -= right
+        return self.reverse(state, 1, adjoint)
+
+    def segments(self, state, bounds, adjoint):
+        """ Reverse the steps between consecutive bounds, storing the state at every bound
+        """
+        states = []
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            states.append(state)
+            self.store(1)
+            state = self.advance(state, stop - start)
+        self.final = state
+        for start, stop in zip(bounds[-2::-1], bounds[:0:-1]):
+            adjoint = self.reverse(states.pop(), stop - start, adjoint)
+            self.store(-1)
+        return adjoint
+
+
+def checkpoint_vjp(step, x, n_steps, u, snapshots=None, checkpoints=None):
+    """ Returns the vector-Jacobian product of n_steps applications of step, storing only some states
+
+    Parameters
+    ----------
+    step: function of len(x) Node arguments, returning the next state as a list of Nodes (or numbers);
+        it is also called with floats when a state is recomputed without recording
+    x: sequence of int or float, the initial state; parameters to differentiate w.r.t. are carried
+        as state entries that step returns unchanged
+    n_steps: int, the number of steps
+    u: sequence of float, the cotangent of the final state
+    snapshots: int, optional, the number of states stored at once, x included; segments are then
+        split binomially (Revolve), so the steps recomputed grow with about log(n_steps) / log(snapshots)
+    checkpoints: sequence of int, optional, the steps at which the state is stored; each segment
+        between two of them is recorded and reversed on its own
+
+    Returns
+    -------
+    state: np.array, the final state
+    grad: np.array, u^T J with J the Jacobian of the final state w.r.t. x
+    stats: dict with steps (steps run, recomputation included), recorded_steps, peak_snapshots,
+        peak_tape_nodes and peak_tape_bytes (the largest segment recorded)
+
+    NOTES
+    =====
+    by default the state is stored every isqrt(n_steps) steps
+
+    Examples
+    --------
+    >>> def step(x, v, k):
+    ...     return [x + 0.01 * v, v - 0.01 * k * sin(x), k]
+    >>> state, grad, stats = checkpoint_vjp(step, [1., 0., 2.], 100000, [1., 0., 0.], snapshots=20)
+    >>> stats['peak_snapshots'], stats['peak_tape_nodes'] < 20
+    (20, True)
+    """
+    if snapshots is not None and checkpoints is not None:
+        raise ValueError('give snapshots or checkpoints, not both')
+    u = np.asarray(u, dtype=np.float64)
+    if u.shape != (len(x),):
+        raise ValueError('the cotangent must have shape (%d,), got %s' % (len(x), u.shape))
+    state = [float(value) for value in x]
+    schedule = _Schedule(step)
+    if n_steps == 0:
+        grad = u.copy()
+    elif snapshots is not None:
+        if snapshots < 1:
+            raise ValueError('at least one snapshot is needed for the initial state')
+        schedule.store(1)
+        grad = schedule.binomial(state, n_steps, u, snapshots - 1)
+    else:
+        if checkpoints is None:
+            every = max(1, _isqrt(n_steps))
+            checkpoints = range(every, n_steps, every)
+        bounds = sorted(set([0, n_steps] + [c for c in checkpoints if 0 < c < n_steps]))
+        grad = schedule.segments(state, bounds, u)
+    final = state if schedule.final is None else schedule.final
+    return np.array(final), grad, schedule.stats
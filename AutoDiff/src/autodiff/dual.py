@@ -564,6 +564,68 @@ class Dual():
         except AttributeError:
             return (self.val >= other)
 
+    ### NumPy ufunc methods###
+    # numpy calls x.sin() for np.sin(x) of an object x: code written for floats, e.g. the
+    # partial derivatives of a Node, then runs on Dual values too (see model.hvp)
+    def exp(self):
+        """ Returns exp(self), see elementary.exp
+        """
+        return exp(self)
+
+    def log(self):
+        """ Returns log(self), see elementary.log
+        """
+        return log(self)
+
+    def sqrt(self):
+        """ Returns sqrt(self), see elementary.sqrt
+        """
+        return sqrt(self)
+
+    def sin(self):
+        """ Returns sin(self), see elementary.sin
+        """
+        return sin(self)
+
+    def cos(self):
+        """ Returns cos(self), see elementary.cos
+        """
+        return cos(self)
+
+    def tan(self):
+        """ Returns tan(self), see elementary.tan
+        """
+        return tan(self)
+
+    def arcsin(self):
+        """ Returns arcsin(self), see elementary.arcsin
+        """
+        return arcsin(self)
+
+    def arccos(self):
+        """ Returns arccos(self), see elementary.arccos
+        """
+        return arccos(self)
+
+    def arctan(self):
+        """ Returns arctan(self), see elementary.arctan
+        """
+        return arctan(self)
+
+    def sinh(self):
+        """ Returns sinh(self), see elementary.sinh
+        """
+        return sinh(self)
+
+    def cosh(self):
+        """ Returns cosh(self), see elementary.cosh
+        """
+        return cosh(self)
+
+    def tanh(self):
+        """ Returns tanh(self), see elementary.tanh
+        """
+        return tanh(self)
 
 
 from autodiff.elementary import *
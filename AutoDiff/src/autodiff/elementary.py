@@ -8,7 +8,7 @@ def exp(var):
 
     Parameters
     ----------
-    var: Dual, Node, Expression, or real number
+    var: Dual, Node, ArrayNode, Expression, or real number
         
     Returns
     ------- 
@@ -34,9 +34,20 @@ def exp(var):
         der = np.e ** var.val * var.der
         return Dual(val, der)
 
+    elif isinstance(var, Node):
+        val = np.e ** var.val
+        z = Node(val, inputs=(var,), gradients=(val,))
+        if Node._recorder is not None:
+            Node._recorder.record(z, exp, (var,))
+        return z
+
+    elif isinstance(var, ArrayNode):
+        x = var.val
+        val = np.e ** x
+        return ArrayNode(val, inputs=(var,), gradients=(lambda g: g * val,))
 
     elif isinstance(var, Expression):
-        return PowerExpression(var)
+        return ExpExpression(var)
 
     else:
         return np.e ** var
@@ -49,7 +60,7 @@ def sin(var):
 
     Parameters
     ----------
-    var: Dual, Node, Expression, or real number
+    var: Dual, Node, ArrayNode, Expression, or real number
         
     Returns
     ------- 
@@ -74,6 +85,18 @@ def sin(var):
         val = np.sin(var.val)
         return Dual(val, der)
 
+    elif isinstance(var, Node):
+        val = np.sin(var.val)
+        z = Node(val, inputs=(var,), gradients=(np.cos(var.val),))
+        if Node._recorder is not None:
+            Node._recorder.record(z, sin, (var,))
+        return z
+
+    elif isinstance(var, ArrayNode):
+        x = var.val
+        val = np.sin(x)
+        return ArrayNode(val, inputs=(var,), gradients=(lambda g: g * np.cos(x),))
+
     elif isinstance(var, Expression):
         return SinExpression(var)
 
@@ -86,7 +109,7 @@ def cos(var):
 
     Parameters
     ----------
-    var: Dual, Node, Expression, or real number
+    var: Dual, Node, ArrayNode, Expression, or real number
         
     Returns
     ------- 
@@ -111,6 +134,18 @@ def cos(var):
         val = np.cos(var.val)
         return Dual(val, der)
 
+    elif isinstance(var, Node):
+        val = np.cos(var.val)
+        z = Node(val, inputs=(var,), gradients=(-np.sin(var.val),))
+        if Node._recorder is not None:
+            Node._recorder.record(z, cos, (var,))
+        return z
+
+    elif isinstance(var, ArrayNode):
+        x = var.val
+        val = np.cos(x)
+        return ArrayNode(val, inputs=(var,), gradients=(lambda g: -g * np.sin(x),))
+
     elif isinstance(var, Expression):
         return CosExpression(var)
 
@@ -123,7 +158,7 @@ def tan(var):
 
     Parameters
     ----------
-    var: Dual, Node, Expression, or real number
+    var: Dual, Node, ArrayNode, Expression, or real number
         
     Returns
     ------- 
@@ -147,6 +182,18 @@ def tan(var):
         val = np.tan(var.val)
         return Dual(val, der)
 
+    elif isinstance(var, Node):
+        val = np.tan(var.val)
+        z = Node(val, inputs=(var,), gradients=(1 / np.cos(var.val) ** 2,))
+        if Node._recorder is not None:
+            Node._recorder.record(z, tan, (var,))
+        return z
+
+    elif isinstance(var, ArrayNode):
+        x = var.val
+        val = np.tan(x)
+        return ArrayNode(val, inputs=(var,), gradients=(lambda g: g / np.cos(x) ** 2,))
+
     elif isinstance(var, Expression):
         return TanExpression(var)
 
@@ -160,7 +207,7 @@ def log(var):
 
     Parameters
     ----------
-    var: Dual, Node, Expression, or real number
+    var: Dual, Node, ArrayNode, Expression, or real number
         
     Returns
     ------- 
@@ -185,6 +232,17 @@ def log(var):
         der = 1 / var.val * var.der
         return Dual(val, der)
 
+    elif isinstance(var, Node):
+        val = np.log(var.val)
+        z = Node(val, inputs=(var,), gradients=(1 / var.val,))
+        if Node._recorder is not None:
+            Node._recorder.record(z, log, (var,))
+        return z
+
+    elif isinstance(var, ArrayNode):
+        x = var.val
+        val = np.log(x)
+        return ArrayNode(val, inputs=(var,), gradients=(lambda g: g / x,))
 
     elif isinstance(var, Expression):
         return LnExpression(var)
@@ -198,7 +256,7 @@ def logb(var, base):
 
     Parameters
     ----------
-    var: Dual, Node, Expression, or real number
+    var: Dual, Node, ArrayNode, Expression, or real number
         
     Returns
     ------- 
@@ -223,6 +281,17 @@ def logb(var, base):
         der = (1 / var.val / np.log(base)) * var.der
         return Dual(val, der)
 
+    elif isinstance(var, Node):
+        val = np.log(var.val) / np.log(base)
+        z = Node(val, inputs=(var,), gradients=(1 / var.val / np.log(base),))
+        if Node._recorder is not None:
+            Node._recorder.record(z, logb, (var, base))
+        return z
+
+    elif isinstance(var, ArrayNode):
+        x = var.val
+        val = np.log(x) / np.log(base)
+        return ArrayNode(val, inputs=(var,), gradients=(lambda g: g / x / np.log(base),))
 
     elif isinstance(var, Expression):
         return LnExpression(var) / make_ln_expression(base)
@@ -237,7 +306,7 @@ def sqrt(var):
 
     Parameters
     ----------
-    var: Dual, Node, Expression, or real number
+    var: Dual, Node, ArrayNode, Expression, or real number
         
     Returns
     ------- 
@@ -262,8 +331,20 @@ def sqrt(var):
         val = np.sqrt(var.val)
         return Dual(val, der)
 
+    elif isinstance(var, Node):
+        val = np.sqrt(var.val)
+        z = Node(val, inputs=(var,), gradients=(0.5 / val,))
+        if Node._recorder is not None:
+            Node._recorder.record(z, sqrt, (var,))
+        return z
+
+    elif isinstance(var, ArrayNode):
+        x = var.val
+        val = np.sqrt(x)
+        return ArrayNode(val, inputs=(var,), gradients=(lambda g: 0.5 * g / val,))
+
     elif isinstance(var, Expression):
-        return PowerExpression(exponent=Constant(1 / 2), base=var)
+        return SqrtExpression(var)
 
     else:
         return np.sqrt(var)
@@ -275,7 +356,7 @@ def arcsin(var):
 
     Parameters
     ----------
-    var: Dual, Node, Expression, or real number
+    var: Dual, Node, ArrayNode, Expression, or real number
         
     Returns
     ------- 
@@ -300,6 +381,18 @@ def arcsin(var):
         val = np.arcsin(var.val)
         return Dual(val, der)
 
+    elif isinstance(var, Node):
+        val = np.arcsin(var.val)
+        z = Node(val, inputs=(var,), gradients=(1 / np.sqrt(1 - var.val ** 2),))
+        if Node._recorder is not None:
+            Node._recorder.record(z, arcsin, (var,))
+        return z
+
+    elif isinstance(var, ArrayNode):
+        x = var.val
+        val = np.arcsin(x)
+        return ArrayNode(val, inputs=(var,), gradients=(lambda g: g / np.sqrt(1 - x ** 2),))
+
     elif isinstance(var, Expression):
         return ArcsinExpression(var)
 
@@ -312,7 +405,7 @@ def arccos(var):
 
     Parameters
     ----------
-    var: Dual, Node, Expression, or real number
+    var: Dual, Node, ArrayNode, Expression, or real number
         
     Returns
     ------- 
@@ -337,6 +430,18 @@ def arccos(var):
         val = np.arccos(var.val)
         return Dual(val, der)
 
+    elif isinstance(var, Node):
+        val = np.arccos(var.val)
+        z = Node(val, inputs=(var,), gradients=(-1 / np.sqrt(1 - var.val ** 2),))
+        if Node._recorder is not None:
+            Node._recorder.record(z, arccos, (var,))
+        return z
+
+    elif isinstance(var, ArrayNode):
+        x = var.val
+        val = np.arccos(x)
+        return ArrayNode(val, inputs=(var,), gradients=(lambda g: -g / np.sqrt(1 - x ** 2),))
+
     elif isinstance(var, Expression):
         return ArccosExpression(var)
 
@@ -349,7 +454,7 @@ def arctan(var):
 
     Parameters
     ----------
-    var: Dual, Node, Expression, or real number
+    var: Dual, Node, ArrayNode, Expression, or real number
         
     Returns
     ------- 
@@ -374,6 +479,18 @@ def arctan(var):
         val = np.arctan(var.val)
         return Dual(val, der)
 
+    elif isinstance(var, Node):
+        val = np.arctan(var.val)
+        z = Node(val, inputs=(var,), gradients=(1 / (1 + var.val ** 2),))
+        if Node._recorder is not None:
+            Node._recorder.record(z, arctan, (var,))
+        return z
+
+    elif isinstance(var, ArrayNode):
+        x = var.val
+        val = np.arctan(x)
+        return ArrayNode(val, inputs=(var,), gradients=(lambda g: g / (1 + x ** 2),))
+
     elif isinstance(var, Expression):
         return ArctanExpression(var)
 
@@ -387,7 +504,7 @@ def sinh(var):
 
     Parameters
     ----------
-    var: Dual, Node, Expression, or real number
+    var: Dual, Node, ArrayNode, Expression, or real number
         
     Returns
     ------- 
@@ -412,6 +529,18 @@ def sinh(var):
         val = np.sinh(var.val)
         return Dual(val, der)
 
+    elif isinstance(var, Node):
+        val = np.sinh(var.val)
+        z = Node(val, inputs=(var,), gradients=(np.cosh(var.val),))
+        if Node._recorder is not None:
+            Node._recorder.record(z, sinh, (var,))
+        return z
+
+    elif isinstance(var, ArrayNode):
+        x = var.val
+        val = np.sinh(x)
+        return ArrayNode(val, inputs=(var,), gradients=(lambda g: g * np.cosh(x),))
+
     elif isinstance(var, Expression):
         return SinhExpression(var)
 
@@ -424,7 +553,7 @@ def cosh(var):
 
     Parameters
     ----------
-    var: Dual, Node, Expression, or real number
+    var: Dual, Node, ArrayNode, Expression, or real number
         
     Returns
     ------- 
@@ -449,6 +578,18 @@ def cosh(var):
         val = np.cosh(var.val)
         return Dual(val, der)
 
+    elif isinstance(var, Node):
+        val = np.cosh(var.val)
+        z = Node(val, inputs=(var,), gradients=(np.sinh(var.val),))
+        if Node._recorder is not None:
+            Node._recorder.record(z, cosh, (var,))
+        return z
+
+    elif isinstance(var, ArrayNode):
+        x = var.val
+        val = np.cosh(x)
+        return ArrayNode(val, inputs=(var,), gradients=(lambda g: g * np.sinh(x),))
+
     elif isinstance(var, Expression):
         return CoshExpression(var)
 
@@ -461,7 +602,7 @@ def tanh(var):
 
     Parameters
     ----------
-    var: Dual, Node, Expression, or real number
+    var: Dual, Node, ArrayNode, Expression, or real number
         
     Returns
     ------- 
@@ -486,6 +627,18 @@ def tanh(var):
         val = np.tanh(var.val)
         return Dual(val, der)
 
+    elif isinstance(var, Node):
+        val = np.tanh(var.val)
+        z = Node(val, inputs=(var,), gradients=(1 - val ** 2,))
+        if Node._recorder is not None:
+            Node._recorder.record(z, tanh, (var,))
+        return z
+
+    elif isinstance(var, ArrayNode):
+        x = var.val
+        val = np.tanh(x)
+        return ArrayNode(val, inputs=(var,), gradients=(lambda g: g * (1 - val ** 2),))
+
     elif isinstance(var, Expression):
         return TanhExpression(var)
 
@@ -523,7 +676,7 @@ def logistic(var, L=1, k=1, x0=0):
     
     Parameters
     ----------
-    var: Dual, Node, Expression, or real number
+    var: Dual, Node, ArrayNode, Expression, or real number
     L: the curve's maximum value, default = 1
     k: the logistic growth rate or steepness of the curve, default = 1
     x0: the x value of the sigmoid's midpoint, default = 0
@@ -555,6 +708,18 @@ def logistic(var, L=1, k=1, x0=0):
         val = temp
         return Dual(val, der)
 
+    elif isinstance(var, Node):
+        val = help_logistic(var.val, L, k, x0)
+        z = Node(val, inputs=(var,), gradients=(k * val * (1 - val / L),))
+        if Node._recorder is not None:
+            Node._recorder.record(z, logistic, (var, L, k, x0))
+        return z
+
+    elif isinstance(var, ArrayNode):
+        x = var.val
+        val = help_logistic(x, L, k, x0)
+        return ArrayNode(val, inputs=(var,), gradients=(lambda g: g * k * val * (1 - val / L),))
+
     elif isinstance(var, Expression):
         return L / (1 + exp(-k * (var - x0)))
 
@@ -565,5 +730,5 @@ def logistic(var, L=1, k=1, x0=0):
 # import dependencies
 
 from autodiff.dual import *
-#from autodiff.node import *
+from autodiff.node import *
 from autodiff.symbolic.expression import *
@@ -1,5 +1,12 @@
 # base class for autodiff
+import operator
+
 import numpy as np
+
+from autodiff.dual import Dual
+from autodiff.node import Node, ArrayNode
+
+
 class AutoDiff():
     """
 	Creates a AutoDiff class as the base class for Automatic Differentiation (AD).
@@ -128,4 +135,378 @@ class Forward(AutoDiff):
         return np.array([i.der for i in self.f])
 
 
+def _trace(outputs):
+    """ Helper function: the trace of outputs in topological order, with its edges as flat lists
+
+    Parameters
+    ----------
+    outputs: list of Node, or of ArrayNode (other items are skipped)
+
+    Returns
+    -------
+    order: list of Node, every node after all of its inputs, each once (by identity)
+    position: dict of id(Node) -> index in order
+    ptr, idx, partials: the inputs of order[i] are idx[ptr[i]:ptr[i + 1]], as indices into order,
+        with the partial derivatives w.r.t. them (the adjoint rules for ArrayNode) in partials[ptr[i]:ptr[i + 1]]
+    """
+    position = {}
+    order = []
+    ptr = [0]
+    idx = []
+    partials = []
+    for root in outputs:
+        if not isinstance(root, (Node, ArrayNode)) or id(root) in position:
+            continue
+        # Iterative depth first search, so that long traces do not hit the recursion limit.
+        # A node is emitted once all of its inputs are, and its edges are recorded then.
+        stack = [root]
+        while stack:
+            node = stack[-1]
+            pending = [j for j in node.inputs if id(j) not in position]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            if id(node) in position:
+                continue
+            position[id(node)] = len(order)
+            order.append(node)
+            idx.extend([position[id(j)] for j in node.inputs])
+            partials.extend(node.gradients)
+            ptr.append(len(idx))
+    return order, position, ptr, idx, partials
+
+
+def _backward(trace, adjoints, keep, combine=operator.mul):
+    """ Helper function: propagates adjoints back through trace, in place
+
+    Parameters
+    ----------
+    trace: the result of _trace
+    adjoints: list with one entry per node of the trace, the seeds of the outputs and None elsewhere
+    keep: set of positions whose adjoints are kept, the others are released once propagated
+    combine: function of (partial, adjoint), the contribution of an adjoint to an input of its node;
+        partial * adjoint by default, for floats, rows of cotangents and Duals
+
+    Returns
+    -------
+    adjoints, holding the complete adjoints at the positions in keep
+    """
+    order, position, ptr, idx, partials = trace
+    # Reverse topological order: the adjoint of a node is complete before it is propagated, and
+    # only the frontier of the sweep is alive at any time.
+    for i in range(len(order) - 1, -1, -1):
+        adjoint = adjoints[i]
+        if adjoint is None:
+            continue
+        if i not in keep:
+            adjoints[i] = None
+        for e in range(ptr[i], ptr[i + 1]):
+            j = idx[e]
+            contribution = combine(partials[e], adjoint)
+            adjoints[j] = contribution if adjoints[j] is None else adjoints[j] + contribution
+    return adjoints
+
+
+def _sweep(outputs, var_lst, seeds, trace=None):
+    """ Helper function: one backward sweep carrying a block of cotangents
+
+    Parameters
+    ----------
+    outputs: list of Node (other items are skipped)
+    var_lst: list of Node
+    seeds: np.array of shape (len(outputs), k), the cotangents of the outputs, one column each
+    trace: optional, the result of _trace(outputs) if already computed
+
+    Returns
+    -------
+    np.array of shape (len(var_lst), k), the cotangents of the variables: J^T seeds
+    """
+    trace = trace or _trace(outputs)
+    order, position = trace[0], trace[1]
+    k = seeds.shape[1]
+    # The adjoint of a node is a row of k cotangents, a plain float when k == 1.
+    rows = seeds[:, 0].tolist() if k == 1 else list(seeds)
+    adjoints = [None] * len(order)
+    for out, row in zip(outputs, rows):
+        if isinstance(out, Node):
+            i = position[id(out)]
+            adjoints[i] = row if adjoints[i] is None else adjoints[i] + row
+    keep = set(position[id(var)] for var in var_lst if id(var) in position)
+    adjoints = _backward(trace, adjoints, keep)
+    result = np.zeros((len(var_lst), k))
+    for col, var in enumerate(var_lst):
+        adjoint = adjoints[position[id(var)]] if id(var) in position else None
+        if adjoint is not None:
+            result[col] = adjoint
+    return result
+
+
+# child class inherits from autodiff
+class Reverse(AutoDiff):
+    """
+	Creates a Reverse class for reverse mode of Automatic Differentiation (AD).
+
+	Attributes
+	==========
+	f : list of Node
+		  The target function(s).
+	var_lst : list of Node
+		  The variables, the columns of the Jacobian.
+	grads : np.array
+		  The Jacobian of f w.r.t. var_lst, one row per function.
+
+	NOTES
+	=====
+	1. nodes are tracked by identity, and the trace of all the functions is sorted once
+	   with an iterative depth first search, so each backward sweep is linear in its size
+	2. the whole Jacobian comes from one backward sweep, whose adjoints are rows holding
+	   one cotangent per function; the adjoints are indexed by topological position and
+	   released as soon as they are propagated
+	"""
+
+    def __init__(self, f, var_lst=None):
+        """ Returns a Reverse AD object
+
+        Parameters
+        ----------
+        self: Reverse object
+        f: Node or list of Node
+            function(s) of variables
+        var_lst: list of Node, optional
+            The variables to differentiate with respect to.
+
+        Returns
+        -------
+        z: an AutoDiff object that uses Reverse Method
+
+        Examples
+        --------
+        >>> x = Node(1, "x")
+        >>> y = Node(2, "y")
+        >>> f1 = x + 2*y
+        >>> f2 = 2*x + y
+        >>> rvs = Reverse([f1, f2], [x, y])
+        """
+        super().__init__(f)
+        self.var_lst = list(var_lst) if var_lst is not None else []
+        self.grads = self._jacobian()
+
+    def _jacobian(self):
+        """ Helper function: the Jacobian in one backward sweep, seeded with one cotangent per function
+
+        Returns
+        -------
+        np.array of shape (len(f), len(var_lst))
+        """
+        return _sweep(self.f, self.var_lst, np.eye(len(self.f))).T
+
+    def get_value(self):
+        """ Returns the value of f
+
+        Parameters
+        ----------
+        self: Reverse object
+
+        Returns
+        -------
+        the values of the functions, in order
 
+        Examples
+        --------
+        >>> x = Node(1, "x")
+        >>> Reverse([x + 1, 2 * x], [x]).get_value()
+        [2, 2]
+        """
+        return [i.val if isinstance(i, Node) else i for i in self.f]
+
+    def get_der(self, nodes_lst=None):
+        """ Returns the derivative value of f(s)
+
+        Parameters
+        ----------
+        self: Reverse object
+        nodes_lst: the list of nodes that need calculating derivatives, all of var_lst by default
+
+        Returns
+        -------
+        np.array with one row per function and one column per node of nodes_lst
+
+        Examples
+        --------
+        >>> x = Node(1, "x")
+        >>> y = Node(2, "y")
+        >>> f1 = x + 2*y
+        >>> rvs = Reverse([f1], [x, y])
+        >>> rvs.get_der()
+        array([[1., 2.]])
+        >>> rvs.get_der([y])
+        array([[2.]])
+        """
+        if nodes_lst is None:
+            return self.get_jacobian()
+        # By identity: nodes with equal values compare equal.
+        columns = {id(var): col for col, var in enumerate(self.var_lst)}
+        return self.grads[:, [columns[id(i)] for i in nodes_lst]]
+
+    def get_jacobian(self):
+        """ Returns the Jacobian matrix of f list
+
+        Parameters
+        ----------
+        self: Reverse object
+
+        Returns
+        -------
+        the Jacobian of f w.r.t. var_lst
+
+        Examples
+        --------
+        >>> x = Node(1, "x")
+        >>> y = Node(2, "y")
+        >>> rvs = Reverse([x + 2*y, 2*x + y], [x, y])
+        >>> rvs.get_jacobian()
+        array([[1., 2.],
+               [2., 1.]])
+        """
+        return self.grads
+
+
+def vjp(fn, x, u):
+    """ Returns the vector-Jacobian product u^T J of fn at x, with one backward sweep
+
+    Parameters
+    ----------
+    fn: function of len(x) Node arguments, returning a Node or a list of Nodes
+    x: sequence of int or float, the point
+    u: the cotangent, a number for a single output, else a sequence with one entry per output
+
+    Returns
+    -------
+    np.array with one entry per variable
+
+    Examples
+    --------
+    >>> vjp(lambda x, y: [x * y, x + y], [2, 3], [1, 10])
+    array([13., 12.])
+    """
+    return vjp_batch(fn, x, np.reshape(u, (-1, 1)))[:, 0]
+
+
+def vjp_batch(fn, x, u):
+    """ Returns J^T u for a block u of cotangents, all carried by one backward sweep
+
+    Parameters
+    ----------
+    fn: function of len(x) Node arguments, returning a Node or a list of Nodes
+    x: sequence of int or float, the point
+    u: array of shape (number of outputs, k), one cotangent per column
+
+    Returns
+    -------
+    np.array of shape (len(x), k); with u the identity this is the transposed Jacobian
+
+    Examples
+    --------
+    >>> vjp_batch(lambda x, y: [x * y, x + y], [2, 3], np.eye(2))
+    array([[3., 1.],
+           [2., 1.]])
+    """
+    variables = [Node(value) for value in x]
+    outputs = fn(*variables)
+    if not isinstance(outputs, (list, tuple)):
+        outputs = [outputs]
+    u = np.asarray(u, dtype=np.float64)
+    if u.ndim != 2 or u.shape[0] != len(outputs):
+        raise ValueError('cotangents must have shape (%d, k), got %s' % (len(outputs), u.shape))
+    return _sweep(list(outputs), variables, u)
+
+
+def hvp(fn, x, v):
+    """ Returns the Hessian-vector product H v of fn at x, forward mode over one reverse sweep
+
+    Parameters
+    ----------
+    fn: function of len(x) Node arguments, returning a single Node
+    x: sequence of int or float, the point
+    v: the direction, a sequence with one entry per variable; or an array of shape (len(x), k),
+        k directions carried by the same sweep
+
+    Returns
+    -------
+    np.array of the shape of v
+
+    NOTES
+    =====
+    the variables hold Dual values with the direction as derivative, so every partial derivative
+    recorded by the trace, and every adjoint of the backward sweep, is a Dual: the derivatives of
+    the adjoints of the variables along v are H v. The cost is a constant multiple of one gradient
+    and the Hessian is never built
+
+    Examples
+    --------
+    >>> hvp(lambda x, y: x ** 2 * y, [1, 2], [1, 0])
+    array([4., 2.])
+    """
+    v = np.asarray(v, dtype=np.float64)
+    if v.ndim not in (1, 2) or len(v) != len(x):
+        raise ValueError('the direction must have shape (%d,) or (%d, k), got %s' % (len(x), len(x), v.shape))
+    variables = [Node(Dual(value, direction)) for value, direction in zip(x, v)]
+    output = fn(*variables)
+    if not isinstance(output, Node):
+        if isinstance(output, (list, tuple)):
+            raise ValueError('hvp needs a function with a single output')
+        return np.zeros(v.shape)
+    trace = _trace([output])
+    order, position = trace[0], trace[1]
+    adjoints = [None] * len(order)
+    adjoints[position[id(output)]] = 1.
+    keep = set(position[id(var)] for var in variables if id(var) in position)
+    adjoints = _backward(trace, adjoints, keep)
+    result = np.zeros(v.shape)
+    for row, var in enumerate(variables):
+        adjoint = adjoints[position[id(var)]] if id(var) in position else None
+        if isinstance(adjoint, Dual):
+            result[row] = adjoint.der
+    return result
+
+
+def array_vjp(fn, x, u=None):
+    """ Returns the gradient of fn at the arrays x, or a vector-Jacobian product, with one backward sweep
+    over whole array operations
+
+    Parameters
+    ----------
+    fn: function of len(x) ArrayNode arguments, returning an ArrayNode
+    x: sequence of array_like, the point
+    u: the cotangent, an array of the shape of the output (broadcast to it);
+        by default 1, for the gradient of an output with a single element
+
+    Returns
+    -------
+    list of np.array, the adjoint of each argument, of the shape of that argument
+
+    Examples
+    --------
+    >>> w, = array_vjp(lambda w: (w * w).sum(), [np.array([1., 2., 3.])])
+    >>> w
+    array([2., 4., 6.])
+    """
+    variables = [ArrayNode(value) for value in x]
+    output = fn(*variables)
+    if u is None:
+        if output.size != 1:
+            raise ValueError('an output of shape %s needs a cotangent u' % (output.shape,))
+        u = 1.
+    trace = _trace([output])
+    order, position = trace[0], trace[1]
+    adjoints = [None] * len(order)
+    adjoints[position[id(output)]] = np.broadcast_to(np.asarray(u, dtype=np.float64), output.shape)
+    keep = set(position[id(v)] for v in variables if id(v) in position)
+    # The partials of an ArrayNode are its adjoint rules.
+    adjoints = _backward(trace, adjoints, keep, lambda rule, adjoint: rule(adjoint))
+    result = []
+    for v in variables:
+        adjoint = adjoints[position[id(v)]] if id(v) in position else None
+        result.append(np.zeros(v.shape) if adjoint is None else np.array(adjoint, dtype=np.float64))
+    return result
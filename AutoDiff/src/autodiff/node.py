@@ -0,0 +1,699 @@
+import numpy as np
+
+class Node():
+    """
+	Creates a Node class supporting custom operations for Reverse mode in Automatic Differentiation (AD).
+
+	Attributes
+	==========
+	val : int or float
+		  The value of user defined function(s) f evaluated at x.
+	name : str
+		  The name of the node, default as "new".
+	inputs : tuple of Node
+		  The nodes this node was computed from, empty for a variable.
+	gradients : tuple of int or float
+		  The partial derivative of this node w.r.t. each of its inputs, aligned with inputs.
+
+	NOTES
+	=====
+	1. nodes are hashed and tracked by identity, and never modified once built: the
+	   backward pass (see model.Reverse) keeps the adjoints in its own arrays
+	2. nodes have no per instance __dict__, so a trace of millions of operations stays compact
+	"""
+    __slots__ = ('val', 'name', 'inputs', 'gradients')
+
+    # The recorder of the Trace being recorded, None otherwise (see autodiff.trace).
+    _recorder = None
+
+    def __init__(self, val, name="new", inputs=(), gradients=()):
+        """
+		INPUTS
+		=======
+		val : int, float
+			  The value of user defined function(s) f evaluated at x.
+		name: str, or optional (default = "new")
+			  The name of the node.
+		inputs : sequence of Node, optional
+			  The nodes this node is computed from.
+		gradients : sequence of int or float, optional
+			  The partial derivatives w.r.t. inputs.
+
+		EXAMPLES
+		=========
+		>>> x = Node(1, "x")
+		>>> x
+		Node(value=1, name=x)
+		>>> f = 3 * x + 4
+		>>> f.val, f.gradients
+		(7, (3,))
+		"""
+        self.val = val
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.gradients = tuple(gradients)
+
+    # Identity hashing: two nodes with equal values are still different variables.
+    __hash__ = object.__hash__
+
+    def __repr__(self):
+        """ Prints self in the form of Node(value=[val], name=[name])
+
+        Parameters
+        ----------
+        self: Node object
+
+        Returns
+        -------
+        str
+
+        Examples
+        --------
+        >>> z = Node(2)
+        >>> print(z)
+        Node(value=2, name=new)
+        """
+        return "{class_name}(value={value}, name={name})".format(class_name=type(self).__name__, value=self.val, name=self.name)
+
+    def __pos__(self):
+        """ Returns the positive of self
+
+        Parameters
+        ----------
+        self: Node object
+
+        Returns
+        -------
+        z: Node object that is the positive of self
+
+        Examples
+        --------
+        >>> z = + Node(2)
+        >>> print(z)
+        Node(value=2, name=new)
+        """
+        return Node(self.val, inputs=(self,), gradients=(1,))
+
+    def __neg__(self):
+        """ Returns the negative of self
+
+        Parameters
+        ----------
+        self: Node object
+
+        Returns
+        -------
+        z: Node object that is the negative of self
+
+        Examples
+        --------
+        >>> z = - Node(2)
+        >>> print(z)
+        Node(value=-2, name=new)
+        """
+        return Node(-self.val, inputs=(self,), gradients=(-1,))
+
+    # dunder method for elementary operation
+    def __add__(self, other):
+        """ Returns the addition of self and other
+
+        Parameters
+        ----------
+        self: Node object
+        other: Node object, float, or int
+
+        Returns
+        -------
+        z: Node object that is the sum of self and other
+
+        Examples
+        --------
+        >>> z = Node(1) + Node(3)
+        >>> print(z)
+        Node(value=4, name=new)
+        >>> z = Node(1) + 2
+        >>> print(z)
+        Node(value=3, name=new)
+        """
+        if isinstance(other, Node):
+            return Node(self.val + other.val, inputs=(self, other), gradients=(1, 1))
+        return Node(self.val + other, inputs=(self,), gradients=(1,))
+
+    def __radd__(self, other):
+        """ Returns the addition of other and self
+
+        Parameters
+        ----------
+        self: Node object
+        other: float, or int
+
+        Returns
+        -------
+        z: Node object that is the sum of other and self
+
+        Examples
+        --------
+        >>> z = 2 + Node(1)
+        >>> print(z)
+        Node(value=3, name=new)
+        """
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        """ Returns the subtraction of self and other
+
+        Parameters
+        ----------
+        self: Node object
+        other: Node object, float, or int
+
+        Returns
+        -------
+        z: Node object that is the subtraction of self and other
+
+        Examples
+        --------
+        >>> z = Node(1) - Node(3)
+        >>> print(z)
+        Node(value=-2, name=new)
+        >>> z = Node(1) - 2
+        >>> print(z)
+        Node(value=-1, name=new)
+        """
+        if isinstance(other, Node):
+            return Node(self.val - other.val, inputs=(self, other), gradients=(1, -1))
+        return Node(self.val - other, inputs=(self,), gradients=(1,))
+
+    def __rsub__(self, other):
+        """ Returns the subtraction of other and self
+
+        Parameters
+        ----------
+        self: Node object
+        other: float, or int
+
+        Returns
+        -------
+        z: Node object that is the subtraction of other and self
+
+        Examples
+        --------
+        >>> z = 2 - Node(1)
+        >>> print(z)
+        Node(value=1, name=new)
+        """
+        return Node(other - self.val, inputs=(self,), gradients=(-1,))
+
+    def __mul__(self, other):
+        """ Returns the multiplication of self and other
+
+        Parameters
+        ----------
+        self: Node object
+        other: Node object, float, or int
+
+        Returns
+        -------
+        z: Node object that is the multiplication of self and other
+
+        Examples
+        --------
+        >>> z = Node(1) * Node(3)
+        >>> print(z)
+        Node(value=3, name=new)
+        >>> z = Node(1) * 2
+        >>> print(z)
+        Node(value=2, name=new)
+        """
+        if isinstance(other, Node):
+            return Node(self.val * other.val, inputs=(self, other), gradients=(other.val, self.val))
+        return Node(self.val * other, inputs=(self,), gradients=(other,))
+
+    def __rmul__(self, other):
+        """ Returns the multiplication of other and self
+
+        Parameters
+        ----------
+        self: Node object
+        other: float, or int
+
+        Returns
+        -------
+        z: Node object that is the multiplication of other and self
+
+        Examples
+        --------
+        >>> z = 2 * Node(2)
+        >>> print(z)
+        Node(value=4, name=new)
+        """
+        return self.__mul__(other)
+
+    def __truediv__(self, other):
+        """ Returns the division of self and other
+
+        Parameters
+        ----------
+        self: Node object
+        other: Node object, float, or int
+
+        Returns
+        -------
+        z: Node object that is the division of self and other
+
+        Examples
+        --------
+        >>> z = Node(1) / Node(4)
+        >>> print(z)
+        Node(value=0.25, name=new)
+        >>> z = Node(2) / 2
+        >>> print(z)
+        Node(value=1.0, name=new)
+        """
+        if isinstance(other, Node):
+            return Node(self.val / other.val, inputs=(self, other),
+                        gradients=(1 / other.val, -self.val / other.val ** 2))
+        return Node(self.val / other, inputs=(self,), gradients=(1 / other,))
+
+    def __rtruediv__(self, other):
+        """ Returns the division of other and self
+
+        Parameters
+        ----------
+        self: Node object
+        other: float, or int
+
+        Returns
+        -------
+        z: Node object that is the division of other and self
+
+        Examples
+        --------
+        >>> z = 2 / Node(2)
+        >>> print(z)
+        Node(value=1.0, name=new)
+        """
+        return Node(other / self.val, inputs=(self,), gradients=(-other / self.val ** 2,))
+
+    def __pow__(self, other):
+        """ Returns the power of self raised by other
+
+        Parameters
+        ----------
+        self: Node object
+        other: Node object, float, or int
+
+        Returns
+        -------
+        z: Node object that is the power of self raised by other
+
+        Examples
+        --------
+        >>> z = Node(2) ** Node(2)
+        >>> print(z)
+        Node(value=4, name=new)
+        >>> z = Node(2) ** 3
+        >>> print(z)
+        Node(value=8, name=new)
+        """
+        if isinstance(other, Node):
+            val = self.val ** other.val
+            return Node(val, inputs=(self, other),
+                        gradients=(other.val * self.val ** (other.val - 1), val * np.log(self.val)))
+        return Node(self.val ** other, inputs=(self,), gradients=(other * self.val ** (other - 1),))
+
+    def __rpow__(self, other):
+        """ Returns the power of other raised by self
+
+        Parameters
+        ----------
+        self: Node object
+        other: float, or int
+
+        Returns
+        -------
+        z: Node object that is the power of other raised by self
+
+        Examples
+        --------
+        >>> z = 2 ** Node(2)
+        >>> print(z)
+        Node(value=4, name=new)
+        """
+        val = other ** self.val
+        return Node(val, inputs=(self,), gradients=(val * np.log(other),))
+
+    # dunder method for comparison, on values
+    def __eq__(self, other):
+        """Returns boolean if two objects have equal value
+
+        Parameters
+        ----------
+        self: Node object
+        other: Node object, float, or int
+
+        Returns
+        -------
+        Boolean: True or False
+
+        Examples
+        --------
+        >>> x = Node(1)
+        >>> y = Node(2)
+        >>> print(x == y)
+        False
+        """
+        if isinstance(other, Node):
+            return self.val == other.val
+        return self.val == other
+
+    def __ne__(self, other):
+        """Returns boolean if two objects DO NOT have equal value
+
+        Parameters
+        ----------
+        self: Node object
+        other: Node object, float, or int
+
+        Returns
+        -------
+        Boolean: True or False
+
+        Examples
+        --------
+        >>> x = Node(1)
+        >>> y = Node(2)
+        >>> print(x != y)
+        True
+        """
+        if isinstance(other, Node):
+            return self.val != other.val
+        return self.val != other
+
+    def __lt__(self, other):
+        """Returns boolean if the former object is less than the latter
+
+        Parameters
+        ----------
+        self: Node object
+        other: Node object, float, or int
+
+        Returns
+        -------
+        Boolean: True or False
+
+        Examples
+        --------
+        >>> x = Node(2)
+        >>> y = Node(2)
+        >>> print(x < y)
+        False
+        """
+        if isinstance(other, Node):
+            return self.val < other.val
+        return self.val < other
+
+    def __le__(self, other):
+        """Returns boolean if the former object is less than or equal to the latter
+
+        Parameters
+        ----------
+        self: Node object
+        other: Node object, float, or int
+
+        Returns
+        -------
+        Boolean: True or False
+
+        Examples
+        --------
+        >>> x = Node(1)
+        >>> y = Node(2)
+        >>> print(x <= y)
+        True
+        """
+        if isinstance(other, Node):
+            return self.val <= other.val
+        return self.val <= other
+
+    def __gt__(self, other):
+        """Returns boolean if the former object is greater than the latter
+
+        Parameters
+        ----------
+        self: Node object
+        other: Node object, float, or int
+
+        Returns
+        -------
+        Boolean: True or False
+
+        Examples
+        --------
+        >>> x = Node(2)
+        >>> y = Node(2)
+        >>> print(x > y)
+        False
+        """
+        if isinstance(other, Node):
+            return self.val > other.val
+        return self.val > other
+
+    def __ge__(self, other):
+        """Returns boolean if the former object is greater than or equal to the latter
+
+        Parameters
+        ----------
+        self: Node object
+        other: Node object, float, or int
+
+        Returns
+        -------
+        Boolean: True or False
+
+        Examples
+        --------
+        >>> x = Node(2)
+        >>> y = Node(1)
+        >>> print(x >= y)
+        True
+        """
+        if isinstance(other, Node):
+            return self.val >= other.val
+        return self.val >= other
+
+
+def _unbroadcast(g, shape):
+    """ Helper function: sum the adjoint g over the axes that broadcasting added to an array of shape
+    """
+    while g.ndim > len(shape):
+        g = g.sum(axis=0)
+    for axis, n in enumerate(shape):
+        if n == 1 and g.shape[axis] != 1:
+            g = g.sum(axis=axis, keepdims=True)
+    return g
+
+
+class ArrayNode():
+    """
+	Creates an ArrayNode class, reverse mode Automatic Differentiation (AD) over whole NumPy arrays.
+
+	Attributes
+	==========
+	val : np.array of float
+		  The value of the operation, an array of any shape.
+	name : str
+		  The name of the node, default as "new".
+	inputs : tuple of ArrayNode
+		  The nodes this node was computed from, empty for a variable.
+	gradients : tuple of functions
+		  The adjoint rule for each input: maps the adjoint of this node to the adjoint
+		  contribution of that input, an array of the shape of the input.
+
+	NOTES
+	=====
+	1. one node is recorded per array operation (elementwise functions of elementary.py,
+	   arithmetic with broadcasting, @, sum, mean, indexing, reshape, transpose), so the
+	   cost and the memory of a gradient scale with the number of operations, not of scalars
+	2. the adjoint rules only keep references to values already held by the trace
+	3. see model.array_vjp for the backward pass
+	"""
+    __slots__ = ('val', 'name', 'inputs', 'gradients')
+
+    # NumPy arrays on the left of an operator defer to the reflected methods below.
+    __array_ufunc__ = None
+
+    def __init__(self, val, name="new", inputs=(), gradients=()):
+        """
+		INPUTS
+		=======
+		val : array_like, converted to a float array
+		name: str, or optional (default = "new")
+		inputs : sequence of ArrayNode, optional
+		gradients : sequence of functions, optional, the adjoint rules aligned with inputs
+
+		EXAMPLES
+		=========
+		>>> x = ArrayNode([1., 2., 3.], "x")
+		>>> (x * x).sum()
+		ArrayNode(value=14.0, name=new)
+		"""
+        self.val = np.asarray(val, dtype=np.float64)
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.gradients = tuple(gradients)
+
+    __hash__ = object.__hash__
+
+    def __repr__(self):
+        return "{class_name}(value={value}, name={name})".format(class_name=type(self).__name__, value=self.val, name=self.name)
+
+    @property
+    def shape(self):
+        return self.val.shape
+
+    @property
+    def ndim(self):
+        return self.val.ndim
+
+    @property
+    def size(self):
+        return self.val.size
+
+    def __len__(self):
+        return len(self.val)
+
+    def _binary(self, other, val, rule_self, rule_other):
+        """ Helper function: the node of a broadcasting binary operation
+
+        Parameters
+        ----------
+        other: ArrayNode, or a constant array / number
+        val: the value of the operation
+        rule_self, rule_other: the adjoint rules, before summing over broadcast axes
+        """
+        shape = self.shape
+        if not isinstance(other, ArrayNode):
+            return ArrayNode(val, inputs=(self,), gradients=(lambda g: _unbroadcast(rule_self(g), shape),))
+        other_shape = other.shape
+        return ArrayNode(val, inputs=(self, other),
+                         gradients=(lambda g: _unbroadcast(rule_self(g), shape),
+                                    lambda g: _unbroadcast(rule_other(g), other_shape)))
+
+    @staticmethod
+    def _value(other):
+        return other.val if isinstance(other, ArrayNode) else np.asarray(other, dtype=np.float64)
+
+    def __pos__(self):
+        return self
+
+    def __neg__(self):
+        return ArrayNode(-self.val, inputs=(self,), gradients=(lambda g: -g,))
+
+    def __add__(self, other):
+        return self._binary(other, self.val + self._value(other), lambda g: g, lambda g: g)
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        return self._binary(other, self.val - self._value(other), lambda g: g, lambda g: -g)
+
+    def __rsub__(self, other):
+        return ArrayNode(other - self.val, inputs=(self,),
+                         gradients=(lambda g, shape=self.shape: _unbroadcast(-g, shape),))
+
+    def __mul__(self, other):
+        a, b = self.val, self._value(other)
+        return self._binary(other, a * b, lambda g: g * b, lambda g: g * a)
+
+    def __rmul__(self, other):
+        return self.__mul__(other)
+
+    def __truediv__(self, other):
+        a, b = self.val, self._value(other)
+        return self._binary(other, a / b, lambda g: g / b, lambda g: -g * a / (b * b))
+
+    def __rtruediv__(self, other):
+        b = self.val
+        val = other / b
+        return ArrayNode(val, inputs=(self,),
+                         gradients=(lambda g, shape=self.shape: _unbroadcast(-g * val / b, shape),))
+
+    def __pow__(self, other):
+        a, p = self.val, self._value(other)
+        val = a ** p
+        return self._binary(other, val, lambda g: g * p * a ** (p - 1), lambda g: g * val * np.log(a))
+
+    def __rpow__(self, other):
+        val = np.asarray(other, dtype=np.float64) ** self.val
+        return ArrayNode(val, inputs=(self,),
+                         gradients=(lambda g, shape=self.shape: _unbroadcast(g * val * np.log(other), shape),))
+
+    def __matmul__(self, other):
+        """ Returns the matrix product of self and other, both of 1 or 2 dimensions
+
+        Examples
+        --------
+        >>> A = ArrayNode(np.eye(2))
+        >>> (A @ [1., 2.]).val
+        array([1., 2.])
+        """
+        a, b = self.val, self._value(other)
+        if a.ndim > 2 or b.ndim > 2:
+            raise ValueError('@ of ArrayNode supports 1 and 2 dimensional arrays only')
+        # As 2 dimensional matrices: a row vector on the left, a column vector on the right.
+        a2 = a.reshape(1, -1) if a.ndim == 1 else a
+        b2 = b.reshape(-1, 1) if b.ndim == 1 else b
+        shape2 = (a2.shape[0], b2.shape[1])
+        rule_self = lambda g: (np.reshape(g, shape2) @ b2.T).reshape(a.shape)
+        rule_other = lambda g: (a2.T @ np.reshape(g, shape2)).reshape(b.shape)
+        return self._binary(other, a @ b, rule_self, rule_other)
+
+    def __rmatmul__(self, other):
+        a, b = np.asarray(other, dtype=np.float64), self.val
+        if a.ndim > 2 or b.ndim > 2:
+            raise ValueError('@ of ArrayNode supports 1 and 2 dimensional arrays only')
+        a2 = a.reshape(1, -1) if a.ndim == 1 else a
+        shape2 = (a2.shape[0], 1 if b.ndim == 1 else b.shape[1])
+        return ArrayNode(a @ b, inputs=(self,),
+                         gradients=(lambda g: (a2.T @ np.reshape(g, shape2)).reshape(b.shape),))
+
+    def sum(self, axis=None, keepdims=False):
+        """ Returns the sum of the elements over the given axis, as numpy.sum
+        """
+        shape = self.shape
+
+        def rule(g):
+            if axis is not None and not keepdims:
+                g = np.expand_dims(g, axis)
+            return np.broadcast_to(g, shape)
+        return ArrayNode(self.val.sum(axis=axis, keepdims=keepdims), inputs=(self,), gradients=(rule,))
+
+    def mean(self, axis=None, keepdims=False):
+        """ Returns the mean of the elements over the given axis, as numpy.mean
+        """
+        n = self.val.size if axis is None else np.prod([self.shape[i] for i in np.atleast_1d(axis)])
+        return self.sum(axis=axis, keepdims=keepdims) * (1 / n)
+
+    def __getitem__(self, index):
+        """ Returns self[index]; the adjoint is scattered back, repeated indices accumulated
+        """
+        shape = self.shape
+
+        def rule(g):
+            full = np.zeros(shape)
+            np.add.at(full, index, g)
+            return full
+        return ArrayNode(self.val[index], inputs=(self,), gradients=(rule,))
+
+    def reshape(self, *shape):
+        original = self.shape
+        return ArrayNode(self.val.reshape(*shape), inputs=(self,), gradients=(lambda g: np.reshape(g, original),))
+
+    @property
+    def T(self):
+        return ArrayNode(self.val.T, inputs=(self,), gradients=(lambda g: np.transpose(g),))
+
+
+from autodiff.elementary import *
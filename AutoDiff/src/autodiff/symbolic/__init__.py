@@ -1,32 +1,67 @@
 from __future__ import annotations
 
-from .expression import Symbol, Expression
+import re
+
+import numpy as np
+
+from .expression import Constant, Symbol, SymbolVector, SumExpression, LazyDerivative, Expression
+from .graph import postorder
+from .cache import DiskCache
+from .sparse import SparseMatrixExpression, get_sparse_jacobian_expression, get_sparse_hessian_expression
+from .evaluator import Evaluator
+from .rewrite import simplify
+from .sharing import Interner, cse, cse_str, evaluate_cse
+from .tape import Tape, freeze
+from .plan import EvaluationPlan
+from .parallel import ParallelEvaluator, parallel_jacobian_expression
+from .profile import NodeBudgetExceeded, profile, diff_profile, node_budget, set_node_budget, check_node_budget
+
+_RANGE = re.compile(r'^(.*?)(\d*):(\d+)$')
+
+
+def _expand_range(name: str):
+    """
+    expand a range spec such as 'x0:3' or 'x:3' into ['x0', 'x1', 'x2']
+    """
+    match = _RANGE.match(name)
+    if match is None:
+        return [name]
+    prefix, start, stop = match.groups()
+    return ['%s%d' % (prefix, i) for i in range(int(start or 0), int(stop))]
 
 
 def symbols(names: str):
     """
     instaniate several symbols together
     Args:
-        names: str of names
+        names: str of names, a name of the form 'x0:n' stands for x0, ..., x(n-1)
 
     Returns:
-        several symbols
+        several symbols, or a SymbolVector if a range was given
 
     Examples:
     >>> x, y, z = symbols("x y z")
+    >>> xs = symbols("x0:1000")
+    >>> (xs[0] * xs[999]).evaluate(np.arange(1000.))
+    999.0
     """
+    if ':' in names:
+        return SymbolVector([i for name in names.split() for i in _expand_range(name)])
     l = names.split()
     if len(l) > 1:
         return (Symbol(name) for name in l)
     return Symbol(names)
 
 
-def diff(expr: Expression, *args):
+def diff(expr: Expression, *args, cache=None, lazy=True):
     """
     differentiate w.r.t. args
     Args:
         expr: Expression class
         *args: variable symbol, x or x,y or x,x for higher order differentiation
+        cache: optional DiskCache, the derivative is looked up there and stored on a miss
+        lazy: return a LazyDerivative, evaluated by a forward mode pass over expr and only
+            built symbolically when printed or transformed further
 
     Returns:
         derivative expression
@@ -42,41 +77,163 @@ def diff(expr: Expression, *args):
     if not isinstance(expr, Expression):
         # If it's a constant (not something wrapped by us), assume it's 0
         return 0
+    if cache is not None:
+        return cache.diff(expr, args, lambda: diff(expr, *args, lazy=False))
+    if lazy and args:
+        if isinstance(expr, LazyDerivative):
+            expr, args = expr.expr, expr.symbols + args
+        for symbol in args:
+            if not expr.mask & symbol.mask:
+                return Constant(0)
+        return LazyDerivative(expr, args)
     for symbol in args:
-        expr = expr._symdiff(symbol)
+        expr = expr._diff(symbol)
+        check_node_budget(expr, 'derivative w.r.t. %s' % symbol.name)
     return expr
 
 
-def get_jacobian_expression(expressions, respect_to_lst):
+def gradient(expr: Expression, respect_to_lst):
+    """
+    differentiate w.r.t. every symbol of respect_to_lst in one symbolic reverse pass
+    Args:
+        expr: Expression class
+        respect_to_lst: variable symbol lst
+
+    Returns:
+        list of derivative expressions, one per symbol. They share the primal nodes of expr
+        and their common adjoint subexpressions, so all of them together stay O(size(expr))
+
+    Examples:
+    >>> x, y = symbols('x y')
+    >>> dx, dy = gradient(sin(x * y), [x, y])
+    >>> dy.evaluate({x: 2, y: 0})
+    2.0
+    """
+    if not isinstance(expr, Expression):
+        return [0 for _ in respect_to_lst]
+    target = 0
+    for symbol in respect_to_lst:
+        target |= symbol.mask
+    # Contributions to the adjoint of each node, summed once all parents are done.
+    contributions = {id(expr): [Constant(1)]}
+    adjoints = {}
+    for node in reversed(postorder(expr)):
+        incoming = contributions.pop(id(node), None)
+        if incoming is None:
+            continue
+        adjoint = incoming[0] if len(incoming) == 1 else SumExpression(incoming)
+        if isinstance(node, Symbol):
+            adjoints[id(node)] = adjoint
+            continue
+        for child, pullback in zip(node.children, node._pullback(adjoint)):
+            if pullback is not None and child.mask & target:
+                contributions.setdefault(id(child), []).append(pullback)
+    return [adjoints.get(id(symbol), Constant(0)) for symbol in respect_to_lst]
+
+
+def get_jacobian_expression(expressions, respect_to_lst, cache=None, processes=None):
     """
     get Jacobian expression list
     Args:
         expressions: Expression lst
         respect_to_lst: variable lst w.r.t for jacobian matrix
+        cache: optional DiskCache, the Jacobian is looked up there and stored on a miss
+        processes: optional number of worker processes differentiating the rows in parallel,
+            see parallel_jacobian_expression; the entries are the same LazyDerivatives as without,
+            already materialized from the trees the workers built
 
     Returns:
         Jacobian matrix
 
     """
-    return [[diff(i, j) for j in respect_to_lst] for i in expressions]
+    if cache is not None and all(isinstance(i, Expression) for i in expressions):
+        return cache.jacobian(expressions, respect_to_lst,
+                              lambda: get_jacobian_expression(expressions, respect_to_lst, processes=processes))
+    jacobian = [[diff(i, j) for j in respect_to_lst] for i in expressions]
+    if processes is not None:
+        built = parallel_jacobian_expression(expressions, respect_to_lst, processes)
+        for row, built_row in zip(jacobian, built):
+            for entry, tree in zip(row, built_row):
+                if isinstance(entry, LazyDerivative):
+                    entry._materialized = tree
+    return jacobian
+
+
+def _raise_math_errors(compute):
+    """
+    run compute(), an evaluation with NumPy semantics, raising on a division by zero or an invalid
+    operation as Expression.evaluate does, instead of returning inf or nan with a RuntimeWarning
+    """
+    with np.errstate(divide='raise', invalid='raise'):
+        try:
+            return compute()
+        except FloatingPointError as e:
+            if 'divide by zero' in str(e):
+                raise ZeroDivisionError('division by zero') from None
+            raise ValueError('math domain error') from None
 
 
-def get_jacobian_value(expressions, respect_to_lst, values):
+def get_jacobian_value(expressions, respect_to_lst, values, out=None, cache=None):
     """
     get Jacobian matrix
     Args:
         expressions: Expression lst
         respect_to_lst: variable lst w.r.t for jacobian matrix
         values: dictionary for values to be evaluated at
+        out: optional float64 array of shape (len(expressions), len(respect_to_lst)) to write the Jacobian to
+        cache: optional DiskCache; the Jacobian is then evaluated from the Tape of its cache entry,
+            see DiskCache.jacobian_tape
 
     Returns:
-        Jacobian matrix
+        Jacobian matrix, as nested lists, or out if given. All the entries are computed
+        in one pass of an EvaluationPlan, each subexpression they share once. A division by zero
+        raises ZeroDivisionError and an invalid operation ValueError, as in Expression.evaluate
 
     Examples:
     >>> x,y = symbols('x y')
     >>> f1 = x**2
     >>> f2 = 3*y
     >>> get_jacobian_value([f1, f2], [x, y], {x: 2, y: 4})
-    [[4, 0], [0, 3]]
+    [[4.0, 0.0], [0.0, 3.0]]
+    """
+    if cache is not None and all(isinstance(i, Expression) for i in expressions):
+        tape = cache.jacobian_tape(expressions, respect_to_lst,
+                                   lambda: get_jacobian_expression(expressions, respect_to_lst))
+        jacobian = _raise_math_errors(
+            lambda: tape.evaluate(values, out=np.empty(len(expressions) * len(respect_to_lst))))
+        jacobian = jacobian.reshape(len(expressions), len(respect_to_lst))
+        if out is None:
+            return jacobian.tolist()
+        np.copyto(out, jacobian)
+        return out
+    plan = EvaluationPlan(get_jacobian_expression(expressions, respect_to_lst))
+    if out is None:
+        return _raise_math_errors(lambda: plan.evaluate(values)).tolist()
+    return _raise_math_errors(lambda: plan.evaluate(values, out=out))
+
+
+def map_jacobian_value(expressions, respect_to_lst, points, processes=None, chunksize=None):
+    """
+    get the Jacobian matrix at many points, in parallel worker processes
+    Args:
+        expressions: Expression lst
+        respect_to_lst: variable lst w.r.t for jacobian matrix, also the order of the columns of points
+        points: array of shape (number of points, len(respect_to_lst)), one point per row
+        processes: number of worker processes, by default one per CPU
+        chunksize: number of points per task, see ParallelEvaluator.map
+
+    Returns:
+        array of shape (number of points, len(expressions), len(respect_to_lst))
+
+    Examples:
+    >>> x,y = symbols('x y')
+    >>> map_jacobian_value([x**2, x*y], [x, y], [[1, 2], [3, 4]], processes=2)
+    array([[[2., 0.],
+            [2., 1.]],
+    <BLANKLINE>
+           [[6., 0.],
+            [4., 3.]]])
     """
-    return [[col.evaluate(values) for col in row] for row in get_jacobian_expression(expressions, respect_to_lst)]
+    with ParallelEvaluator(get_jacobian_expression(expressions, respect_to_lst), symbols=respect_to_lst,
+                           processes=processes) as evaluator:
+        return evaluator.map(points, chunksize)
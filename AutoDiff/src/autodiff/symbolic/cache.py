@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import tempfile
+
+from .expression import Symbol
+from .graph import postorder
+from .serialize import GraphTable, VERSION, _OP_SYMBOL, dumps, loads
+from .tape import Tape
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows, eviction then runs unlocked
+    fcntl = None
+
+# Opt-in on-disk cache of derivative expressions.
+#
+# Entries are keyed by a structural hash of the input expression(s): the hash of
+# their serialised node table plus the symbol slots differentiated against, so
+# equal models built in different processes share entries. Each entry is one
+# file written to a temporary name and renamed into place, which is atomic, so
+# readers in other processes see either nothing or a complete entry.
+#
+# An entry is the binary GraphTable of the result, which is also the layout of a
+# frozen Tape: jacobian_tape evaluates a cached Jacobian straight from the bytes
+# of its entry, without rebuilding Expressions, a Tape or an EvaluationPlan.
+
+_SUFFIX = '.adx'
+
+
+class DiskCache:
+    """
+    Creates a size bounded, process safe cache of derivative expressions in a directory.
+
+    Attributes
+    ==========
+    directory : str
+          where the cache entries are stored, created if missing
+    max_bytes : int
+          once the entries take more than this, the least recently used are removed
+
+    Examples
+    ========
+    >>> cache = DiskCache('/tmp/autodiff-cache')
+    >>> x, y = symbols('x y')
+    >>> d = diff(x ** 2 * y, x, cache=cache)  # computed and stored
+    >>> d = diff(x ** 2 * y, x, cache=cache)  # loaded, even from another process
+    >>> cache.jacobian_tape([x ** 2 * y], [x, y], lambda: [[diff(x ** 2 * y, x), diff(x ** 2 * y, y)]]).evaluate({x: 1, y: 2})
+    [4.0, 1.0]
+
+    NOTES
+    =====
+    diff and jacobian rebuild Expressions from an entry; jacobian_tape only maps its arrays
+    """
+
+    def __init__(self, directory, max_bytes=256 * 2 ** 20):
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def get(self, key):
+        """ Returns the bytes stored under key, or None on a miss
+
+        Parameters
+        ----------
+        key: str, as returned by DiskCache.key
+
+        Returns
+        -------
+        bytes or None
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            # Mark as recently used for eviction.
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def put(self, key, data):
+        """ Store bytes under key, atomically, then evict if over max_bytes
+
+        Parameters
+        ----------
+        key: str, as returned by DiskCache.key
+        data: bytes
+        """
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        self._evict()
+
+    def clear(self):
+        """ Remove every entry of the cache
+        """
+        for name in os.listdir(self.directory):
+            if name.endswith(_SUFFIX):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+    def _evict(self):
+        lock = None
+        if fcntl is not None:
+            lock = open(os.path.join(self.directory, '.lock'), 'wb')
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith(_SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+        finally:
+            if lock is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+                lock.close()
+
+    @staticmethod
+    def key(kind, expressions, respect_to):
+        """ Returns the structural cache key of a differentiation request, and the symbol slots it uses
+
+        Parameters
+        ----------
+        kind: str, distinguishes different derived results of the same input
+        expressions: list of Expression
+        respect_to: list of Symbol
+
+        Returns
+        -------
+        (key, symbols): hex digest str, and the list of Symbol of the inputs in slot order,
+            which the stored result is serialised against
+        """
+        table = GraphTable.from_expressions(expressions)
+        symbols = [node for node in postorder(expressions) if type(node) is Symbol]
+        slots = {id(symbol): i for i, symbol in enumerate(symbols)}
+        h = hashlib.sha256()
+        h.update(struct.pack('<I', VERSION))
+        h.update(kind.encode('utf-8') + b'\0')
+        h.update(table.tobytes())
+        for symbol in respect_to:
+            if id(symbol) not in slots:
+                slots[id(symbol)] = len(symbols)
+                symbols.append(symbol)
+            h.update(struct.pack('<q', slots[id(symbol)]))
+        return h.hexdigest(), symbols
+
+    def diff(self, expr, args, compute):
+        """ Returns the derivative of expr w.r.t. args from the cache, or from compute() on a miss
+
+        Parameters
+        ----------
+        expr: Expression
+        args: sequence of Symbol, the differentiation variables in order
+        compute: callable without arguments returning the derivative expression
+
+        Returns
+        -------
+        derivative expression, using the Symbol objects of expr
+        """
+        key, symbols = self.key('diff', [expr], args)
+        data = self.get(key)
+        if data is not None:
+            try:
+                return loads(data, symbols=symbols)
+            except ValueError:
+                pass
+        result = compute()
+        self.put(key, dumps(result, symbols=symbols))
+        return result
+
+    def jacobian(self, expressions, respect_to_lst, compute):
+        """ Returns the Jacobian expression from the cache, or from compute() on a miss
+
+        Parameters
+        ----------
+        expressions: list of Expression
+        respect_to_lst: list of Symbol
+        compute: callable without arguments returning the Jacobian as a list of rows
+
+        Returns
+        -------
+        Jacobian matrix of expressions, as a list of rows
+        """
+        key, symbols = self.key('jacobian', expressions, respect_to_lst)
+        n = len(respect_to_lst)
+        data = self.get(key)
+        if data is not None:
+            try:
+                flat = loads(data, symbols=symbols)
+                return [flat[i * n:(i + 1) * n] for i in range(len(expressions))]
+            except ValueError:
+                pass
+        result = compute()
+        self.put(key, dumps([entry for row in result for entry in row], symbols=symbols))
+        return result
+
+    def jacobian_tape(self, expressions, respect_to_lst, compute):
+        """ Returns the Jacobian frozen into a Tape, from the bytes of its cache entry
+
+        Parameters
+        ----------
+        expressions: list of Expression
+        respect_to_lst: list of Symbol
+        compute: callable without arguments returning the Jacobian as a list of rows
+
+        Returns
+        -------
+        Tape with one output per entry of the Jacobian in row-major order, the symbol slots its
+        entries read bound to the Symbol objects of expressions. It shares the entry of jacobian
+        """
+        key, symbols = self.key('jacobian', expressions, respect_to_lst)
+        data = self.get(key)
+        if data is not None:
+            try:
+                return self._bind(Tape.frombuffer(data), symbols)
+            except ValueError:
+                pass
+        data = dumps([entry for row in compute() for entry in row], symbols=symbols)
+        self.put(key, data)
+        return self._bind(Tape.frombuffer(data), symbols)
+
+    @staticmethod
+    def _bind(tape, symbols):
+        """
+        bind only the slots that a node of tape reads, so values need no entry for a symbol
+        the Jacobian entries do not use
+        """
+        t = tape.table
+        used = set(t.args[t.opcodes == _OP_SYMBOL].tolist())
+        tape.symbols = [symbol if i in used else None for i, symbol in enumerate(symbols)]
+        return tape
@@ -1,9 +1,38 @@
 from __future__ import annotations
 
+import functools
+import heapq
+import itertools
 import math
+import weakref
+
+from .graph import postorder
 
 # Symbolic reverse differentiation, an illustration of reverse mode differentiation
 
+# Every Symbol takes a slot in one process wide symbol table; the free symbols of an
+# Expression are kept as an int bitset over these slots. The slot of a Symbol that
+# has been garbage collected is given to the next new Symbol, lowest slot first, so
+# masks stay as wide as the number of Symbols alive at once, not ever created.
+# Slots are local to a process: an unpickled Symbol takes a new slot and an
+# unpickled node recomputes its mask from its children.
+_symbol_slots = itertools.count()
+_symbol_table = {}  # slot -> weakref.ref of its Symbol
+_free_slots = []  # heap of the slots of collected Symbols
+
+
+def _release_slot(slot, ref):
+    """
+    weakref callback of a collected Symbol, its slot becomes free
+    """
+    if _symbol_table.get(slot) is ref:
+        del _symbol_table[slot]
+        heapq.heappush(_free_slots, slot)
+
+
+_shared_constants = {}
+
+
 class Expression:
     """
 
@@ -17,20 +46,51 @@ class Expression:
     2. Contains methods of standard operations: addition, substraction, multiplication, division, exponentiation, and negation
 
 	"""
+    # No per instance __dict__: derivative graphs can have tens of millions of nodes.
+    __slots__ = ('mask', 'depth', 'size')
+
     def evaluate(self, values: dict[Symbol, float]) -> float:
         '''Evaluate the value of this Expression with the given values of variables.
 
-        will be implemented in different child classes of Expression.
+        The value of a node is computed by _evaluate, implemented in the child classes of Expression.
+        If some values are Dual numbers, one forward mode sweep over the DAG of the expression gives
+        its value and its derivative in the direction of their der, see _evaluate_dual.
 
         Parameters
         ----------
         self: Expression
-        values: dict: key -> variable symbol (x, y, z, etc); value -> float
+        values: dict: key -> variable symbol (x, y, z, etc); value -> float or Dual
+            or a flat sequence / NumPy array, indexed by the Symbol.index of symbols from a SymbolVector
         
         Returns
         ------- 
-        the numerical value (float) of the expression
+        the numerical value (float) of the expression, or a Dual if some values are Dual
+
+        Examples
+        -------
+        >>> x, y = symbols("x y")
+        >>> (x * sin(y)).evaluate({x: 2, y: Dual(0, 1)})
+        Dual(value=0.0, derivative=2.0)
+        >>> (x * y).evaluate({x: Dual(2, 1, loc=0, length=2), y: Dual(3, 1, loc=1, length=2)})
+        Dual(value=6, derivative=[3. 2.])
+        '''
+        if _has_dual(values):
+            return _evaluate_dual(self, values)
+        return self._evaluate(values)
+
+    def _evaluate(self, values):
+        '''The value of this Expression with the given values of variables, all plain numbers.
+
+        will be implemented in different child classes of Expression.
+
+        Parameters
+        ----------
+        self: Expression
+        values: as for evaluate, without Dual numbers
 
+        Returns
+        -------
+        the numerical value (float) of the expression
         '''
         raise NotImplementedError()
 
@@ -51,6 +111,236 @@ class Expression:
         '''        
         raise NotImplementedError()
 
+    def _diff(self, respect_to: Symbol) -> Expression:
+        '''The derivative of this Expression, or Constant(0) without building anything if it
+        does not depend on respect_to. Child classes differentiate their operands through this.
+
+        Parameters
+        ----------
+        self: Expression
+        respect_to: variable symbol (x, y, z, etc), the partial derivative direction
+
+        Returns
+        -------
+        the symbolic representation of the derivative, an expression
+        '''
+        if self.mask & respect_to.mask:
+            return self._symdiff(respect_to)
+        return Constant(0)
+
+    def _pullback(self, adjoint: Expression) -> tuple:
+        '''Symbolic reverse mode rule: the adjoints this node sends to each of its children.
+
+        will be implemented in different child classes of Expression.
+
+        Parameters
+        ----------
+        self: Expression
+        adjoint: Expression, the derivative of the output w.r.t. this node
+
+        Returns
+        -------
+        tuple aligned with self.children, each entry the expression adjoint * d(self)/d(child),
+        or None where that partial derivative is identically zero
+        '''
+        return ()
+
+    def _apply(self, args):
+        '''Numeric value of this node from the values of its children, without recursion.
+
+        will be implemented in different child classes of Expression.
+
+        Parameters
+        ----------
+        self: Expression
+        args: list of child values, aligned with self.children
+
+        Returns
+        -------
+        the numerical value (float) of the node
+        '''
+        raise NotImplementedError()
+
+    def _jvp(self, args, tangents, value):
+        '''Forward mode rule: the tangent of this node from the values and tangents of its children.
+
+        will be implemented in different child classes of Expression.
+
+        Parameters
+        ----------
+        self: Expression
+        args: list of child values, aligned with self.children
+        tangents: list of child tangents, aligned with self.children
+        value: the value of this node, as returned by _apply(args)
+
+        Returns
+        -------
+        the tangent of the node
+        '''
+        raise NotImplementedError()
+
+    @property
+    def children(self) -> tuple:
+        '''The operand Expressions of this node, in a fixed order.
+
+        Leaves (Constant, Symbol) have no children. Graph utilities use this
+        to walk an Expression DAG without knowing the concrete node classes.
+
+        Returns
+        -------
+        tuple of Expression
+        '''
+        return ()
+
+    @classmethod
+    def _from_children(cls, children):
+        '''Build a node of this class from operands ordered as in ``children``.
+
+        Parameters
+        ----------
+        children: sequence of Expression, ordered as the ``children`` property
+
+        Returns
+        -------
+        a new Expression of this class
+        '''
+        return cls(*children)
+
+    def _cache_structure(self):
+        '''Compute and store the structural summary of this node from its children.
+
+        Called once at the end of every constructor, so each node costs O(#children):
+
+        mask: int, bitset of the free symbols, bit i set for the Symbol in slot i of the symbol table
+        depth: int, the longest path to a leaf, counting both ends
+        size: int, the number of nodes of the expression as a tree (shared subexpressions counted each time)
+        '''
+        mask = 0
+        depth = 0
+        size = 1
+        for child in self.children:
+            # Keep the int object of a child that already covers the union, so that
+            # chains over the same symbols share one mask instead of one per node.
+            union = mask | child.mask
+            if union == child.mask:
+                mask = child.mask
+            elif union != mask:
+                mask = union
+            if child.depth > depth:
+                depth = child.depth
+            size += child.size
+        self.mask = mask
+        self.depth = depth + 1
+        self.size = size
+
+    def __setstate__(self, state):
+        # The pickled mask holds slots of the pickling process: recompute it.
+        _, slots = state
+        for name, value in slots.items():
+            setattr(self, name, value)
+        self._cache_structure()
+
+    @property
+    def is_constant(self) -> bool:
+        '''Whether the expression depends on no symbol, in O(1).
+        '''
+        return not self.mask
+
+    def depends_on(self, symbol: Symbol) -> bool:
+        '''Whether symbol is one of the free symbols of the expression, in O(1).
+
+        Parameters
+        ----------
+        self: Expression
+        symbol: Symbol
+
+        Returns
+        -------
+        bool
+
+        Examples
+        -------
+        >>> x, y = symbols("x y")
+        >>> (x * 2).depends_on(y)
+        False
+        '''
+        return bool(self.mask & symbol.mask)
+
+    @property
+    def free_symbols(self) -> set:
+        '''The set of Symbols the expression depends on.
+        '''
+        mask = self.mask
+        result = set()
+        while mask:
+            low = mask & -mask
+            result.add(_symbol_table[low.bit_length() - 1]())
+            mask ^= low
+        return result
+
+    def profile(self) -> dict:
+        '''Size report of the expression: node and distinct node counts, depth, operator
+        histogram and estimated flops, see profile.profile.
+        '''
+        from .profile import profile
+        return profile(self)
+
+    def freeze(self, symbols=None):
+        '''Convert the expression into a flat, array based Tape, see tape.freeze.
+
+        Parameters
+        ----------
+        self: Expression
+        symbols: optional sequence of Symbol fixing the order of the symbol slots
+
+        Returns
+        -------
+        a Tape
+        '''
+        from .tape import freeze
+        return freeze(self, symbols)
+
+    def specialize(self, bindings: dict[Symbol, float]) -> Expression:
+        '''Partial evaluation: substitute values for some symbols and fold every subtree that becomes constant.
+
+        Nodes that depend on none of the bound symbols are reused as they are, and a node
+        shared in self is rebuilt once, so the result keeps the sharing of self.
+
+        Parameters
+        ----------
+        self: Expression
+        bindings: dict of Symbol -> float, the symbols to fix
+
+        Returns
+        -------
+        an Expression over the remaining symbols
+
+        Examples
+        -------
+        >>> x, p = symbols("x p")
+        >>> f = sin(p * 2) * x + p
+        >>> print(f.specialize({p: 0}))
+        ((0.0)*(x))+(0)
+        '''
+        target = 0
+        for symbol in bindings:
+            target |= symbol.mask
+        rebuilt = {}
+        for node in postorder(self):
+            children = node.children
+            if not node.mask & target and (node.mask or not children):
+                rebuilt[id(node)] = node
+            elif isinstance(node, Symbol):
+                rebuilt[id(node)] = Constant(bindings[node])
+            else:
+                # Children that became constant are Constant instances by now.
+                args = [rebuilt[id(child)] for child in children]
+                if any(arg.mask for arg in args):
+                    rebuilt[id(node)] = node._from_children(args)
+                else:
+                    rebuilt[id(node)] = Constant(node._apply([arg.value for arg in args]))
+        return rebuilt[id(self)]
+
     def __call__(self, *args, **kwargs):
         '''Special method enabling Expression instance to use evalute method and returns the derivative value of the instance
         
@@ -130,7 +420,7 @@ class Expression:
         1
         '''       
         op = other if isinstance(other, Expression) else Constant(other)
-        return SumExpression([self, ProductExpression([Constant(-1), op])])
+        return SumExpression([self, -op])
 
     def __rsub__(self, other):
         '''Substraction (reversal) on Expression.
@@ -256,6 +546,8 @@ class Expression:
         >>> diff(f,y).evaluate(val)
         -10
         '''        
+        if isinstance(other, (int, float)) and other == 1:
+            return RecipExpression(self)
         op = other if isinstance(other, Expression) else Constant(other)
         return DivisionExpression(op, self)
 
@@ -282,6 +574,8 @@ class Expression:
         1
         '''     
         op = power if isinstance(power, Expression) else Constant(power)
+        if isinstance(op, Constant) and isinstance(op.value, int) and not isinstance(op.value, bool):
+            return IntPowExpression(self, op)
         return PowerExpression(base=self, exponent=op)
 
     def __rpow__(self, other):
@@ -330,7 +624,63 @@ class Expression:
         >>> diff(f,x).evaluate(val)
         -1
         '''   
-        return self * -1
+        if type(self) is Constant:
+            # a numeric operand folds into one node
+            return Constant(-self.value)
+        return NegExpression(self)
+
+
+def _is_zero(t):
+    '''True for a scalar tangent equal to zero; array tangents are never skipped.'''
+    return isinstance(t, (int, float)) and t == 0
+
+
+def _has_dual(values):
+    '''True if some of values, a dict or a sequence indexed by Symbol.index, is a Dual number.'''
+    items = values.values() if isinstance(values, dict) else values
+    if getattr(items, 'dtype', object) != object:
+        # a numeric NumPy array
+        return False
+    from ..dual import Dual
+    return any(isinstance(v, Dual) for v in items)
+
+
+def _evaluate_dual(expr, values):
+    '''Forward mode sweep over the DAG of expr, for values holding Dual numbers.
+
+    Values go through _apply and the der of the Dual inputs through _jvp, each shared node
+    once, so no derivative expression is built. A der can be a NumPy array of tangents,
+    e.g. one per input as made by Dual(val, 1, loc=i, length=n), which gives a whole
+    gradient in the same sweep.
+
+    Returns
+    -------
+    Dual(value of expr, tangent of expr)
+    '''
+    from ..dual import Dual
+    seed_mask = 0
+    vals = {}
+    tans = {}
+    for node in postorder(expr):
+        children = node.children
+        if not children:
+            value = node._evaluate(values)
+            if isinstance(value, Dual):
+                seed_mask |= node.mask
+                vals[id(node)], tans[id(node)] = value.val, value.der
+            else:
+                vals[id(node)], tans[id(node)] = value, 0
+            continue
+        args = [vals[id(child)] for child in children]
+        value = node._apply(args)
+        vals[id(node)] = value
+        # Postorder visits every leaf below node first, so seed_mask is complete for it.
+        if node.mask & seed_mask:
+            tans[id(node)] = node._jvp(args, [tans[id(child)] for child in children], value)
+        else:
+            tans[id(node)] = 0
+    return Dual(vals[id(expr)], tans[id(expr)])
+
 
 ## child classes for Expression ##
 class Constant(Expression):
@@ -350,6 +700,21 @@ class Constant(Expression):
 
 	"""
 
+    __slots__ = ('value',)
+
+    def __new__(cls, value: float = 0):
+        # 0, 1 and -1 are shared instances: derivative graphs are full of them.
+        if cls is Constant and type(value) is int and -1 <= value <= 1:
+            shared = _shared_constants.get(value)
+            if shared is None:
+                shared = _shared_constants[value] = super().__new__(cls)
+            return shared
+        return super().__new__(cls)
+
+    def __getnewargs__(self):
+        # pickle and copy call __new__ with these, not with the shared Constant(0)
+        return (self.value,)
+
     def __init__(self, value: float):
         """
 		INPUTS
@@ -362,8 +727,11 @@ class Constant(Expression):
         >>> x = Constant(10)
 		"""
         self.value = value
+        self.mask = 0
+        self.depth = 1
+        self.size = 1
 
-    def evaluate(self, values):
+    def _evaluate(self, values):
         '''Evaluate the value of constant with the given values.
 
         Parameters
@@ -433,13 +801,18 @@ class Symbol(Expression):
     Attributes
 	==========
 	name : str, the symbol of variable (x,y,z, etc.)
+	index : int or None, the position of the symbol in its SymbolVector, used
+	        when evaluating against a flat array or sequence of values
 
 	"""
-    def __init__(self, name: str):
+    __slots__ = ('name', 'index', '__weakref__')
+
+    def __init__(self, name: str, index: int = None):
         """
 		INPUTS
 		=======
 		name: str, the symbol of variable (x,y,z, etc.)
+		index: int, optional, the position of the symbol in a flat array of values
 
         Example
         ------
@@ -447,15 +820,25 @@ class Symbol(Expression):
 		"""
 
         self.name = name
-
-    def evaluate(self, values):
+        self.index = index
+        slot = heapq.heappop(_free_slots) if _free_slots else next(_symbol_slots)
+        _symbol_table[slot] = weakref.ref(self, functools.partial(_release_slot, slot))
+        self.mask = 1 << slot
+        self.depth = 1
+        self.size = 1
+
+    def __reduce__(self):
+        # a new Symbol with a slot of its own in the unpickling process
+        return Symbol, (self.name, self.index)
+
+    def _evaluate(self, values):
         '''Evaluate the corresponding value of the variable symbol 
 
         Parameters
         ----------
         self: a variable symbol
-        values: a list of float
-        
+        values: dict of symbol -> float, or a flat sequence / NumPy array indexed by self.index
+
         Returns
         ------- 
         the corresponding numerical value (float) of the variable symbol
@@ -465,9 +848,18 @@ class Symbol(Expression):
         >>> x = Symbol('x')
         >>> x.evaluate({x: 1})
         1
-        '''  
-        assert self in values
-        return values[self]
+        >>> x0, x1 = symbols('x0:2')
+        >>> x1.evaluate([5, 6])
+        6
+        '''
+        if self.index is not None and not isinstance(values, dict):
+            return values[self.index]
+        try:
+            return values[self]
+        except KeyError:
+            raise AssertionError('no value given for symbol %s' % self.name) from None
+        except (TypeError, IndexError):
+            raise TypeError('symbol %s has no index, it can only be evaluated with a dict' % self.name) from None
 
     def _symdiff(self, respect_to):
         '''Display the symbolic representation of the derivative of a variable symbol.
@@ -513,13 +905,79 @@ class Symbol(Expression):
         return self.name
 
 
+class SymbolVector:
+    """
+    - A symbol table: an ordered, indexed collection of Symbols
+
+    Attributes
+	==========
+	symbols : tuple of Symbol, symbols[i].index == i
+
+	NOTES
+	=====
+    1. expressions over the symbols of a SymbolVector can be evaluated against a flat
+    sequence or NumPy array of values, in the order of the vector, instead of a dict
+    2. a Symbol belongs to at most one SymbolVector
+
+	"""
+    __slots__ = ('symbols',)
+
+    def __init__(self, names):
+        """
+		INPUTS
+		=======
+		names : iterable of str, the names of the new symbols, in index order
+
+        Example
+        ------
+        >>> v = SymbolVector(['x0', 'x1', 'x2'])
+        >>> (v[0] + 2 * v[2]).evaluate(np.array([1., 5., 3.]))
+        7.0
+		"""
+        self.symbols = tuple(Symbol(name, index) for index, name in enumerate(names))
+
+    @classmethod
+    def from_symbols(cls, symbols):
+        '''Build a SymbolVector from existing symbols, assigning their indices.
+
+        Parameters
+        ----------
+        symbols: iterable of Symbol, none of them already part of another SymbolVector
+
+        Returns
+        -------
+        a SymbolVector holding the given symbols, in order
+        '''
+        symbols = tuple(symbols)
+        for index, symbol in enumerate(symbols):
+            if symbol.index is not None and symbol.index != index:
+                raise ValueError('symbol %s already has index %d' % (symbol.name, symbol.index))
+        for index, symbol in enumerate(symbols):
+            symbol.index = index
+        vector = cls.__new__(cls)
+        vector.symbols = symbols
+        return vector
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __iter__(self):
+        return iter(self.symbols)
+
+    def __getitem__(self, item):
+        return self.symbols[item]
+
+    def __repr__(self):
+        return 'SymbolVector(%s)' % ', '.join(symbol.name for symbol in self.symbols)
+
+
 class SumExpression(Expression):
     """
     - The SumExpression class, a child class of Expression 
     
     Attributes
 	==========
-	operands : list of operand that will be combined by the operator
+	operands : tuple of operand that will be combined by the operator
 
 	NOTES
 	=====
@@ -528,17 +986,28 @@ class SumExpression(Expression):
 	4. printing the class instance will result in a str, which can be concatenated into the Expression
 
 	"""
+    __slots__ = ('operands',)
+
     def __init__(self, operands: list[Expression]):
         """
 		INPUTS
 		=======
-		operand : list of operand (Expression instance) that will be combined by the operator
-			  
+		operand : sequence of operand (Expression instance) that will be combined by the operator,
+			  stored as a tuple
 		"""
 
-        self.operands = operands
+        self.operands = tuple(operands)
+        self._cache_structure()
+
+    @property
+    def children(self):
+        return self.operands
 
-    def evaluate(self, values):
+    @classmethod
+    def _from_children(cls, children):
+        return cls(children)
+
+    def _evaluate(self, values):
         '''Evaluate the value of addtion operation with the given values for operands.
 
         Parameters
@@ -550,7 +1019,13 @@ class SumExpression(Expression):
         ------- 
         the numerical value (float) of the addtion operation 
         '''        
-        return sum([i.evaluate(values) for i in self.operands])
+        return sum([i._evaluate(values) for i in self.operands])
+
+    def _apply(self, args):
+        return sum(args)
+
+    def _jvp(self, args, tangents, value):
+        return sum(tangents)
 
     def _symdiff(self, respect_to):
         '''Display the symbolic representation of the derivative of addition operation.
@@ -565,7 +1040,10 @@ class SumExpression(Expression):
         the symbolic representation of the derivative of addition operation, perserving homomorphism
 
         '''        
-        return SumExpression([i._symdiff(respect_to) for i in self.operands])
+        return SumExpression([i._diff(respect_to) for i in self.operands])
+
+    def _pullback(self, adjoint):
+        return (adjoint,) * len(self.operands)
 
     def __str__(self):
         '''print out the addition expression.
@@ -588,7 +1066,7 @@ class ProductExpression(Expression):
     
     Attributes
 	==========
-	operands : list of operand that will be combined by the operator
+	operands : tuple of operand that will be combined by the operator
 
 	NOTES
 	=====
@@ -597,17 +1075,28 @@ class ProductExpression(Expression):
 	4. printing the class instance will result in a str, which can be concatenated into the Expression
 
 	"""
+    __slots__ = ('operands',)
+
     def __init__(self, operands: list[Expression]):
         """
 		INPUTS
 		=======
-		operand : list of operand (Expression instance) that will be combined by the operator
-			  
+		operand : sequence of operand (Expression instance) that will be combined by the operator,
+			  stored as a tuple
 		"""
  
-        self.operands = operands
+        self.operands = tuple(operands)
+        self._cache_structure()
+
+    @property
+    def children(self):
+        return self.operands
 
-    def evaluate(self, values):
+    @classmethod
+    def _from_children(cls, children):
+        return cls(children)
+
+    def _evaluate(self, values):
         '''Evaluate the value of multiplication operation with the given values for operands.
 
         Parameters
@@ -621,9 +1110,28 @@ class ProductExpression(Expression):
         '''        
         p = 1
         for i in self.operands:
-            p *= i.evaluate(values)
+            p *= i._evaluate(values)
+        return p
+
+    def _apply(self, args):
+        p = 1
+        for a in args:
+            p *= a
         return p
 
+    def _jvp(self, args, tangents, value):
+        # prefix[i] * suffix[i] is the product of all operands but the i-th
+        n = len(args)
+        suffix = [1] * n
+        for i in range(n - 1, 0, -1):
+            suffix[i - 1] = suffix[i] * args[i]
+        prefix = 1
+        t = 0
+        for i in range(n):
+            t = t + tangents[i] * (prefix * suffix[i])
+            prefix = prefix * args[i]
+        return t
+
     def _symdiff(self, respect_to):
         '''Display the symbolic representation of the derivative of multiplication operation.
 
@@ -637,7 +1145,7 @@ class ProductExpression(Expression):
         the symbolic representation of the derivative of multiplication operation
 
         '''    
-        diffs = [i._symdiff(respect_to) for i in self.operands]
+        diffs = [i._diff(respect_to) for i in self.operands]
         expr_operands = []
         for i in range(len(self.operands)):
             this_expr_operands = []
@@ -649,6 +1157,13 @@ class ProductExpression(Expression):
             expr_operands.append(ProductExpression(this_expr_operands))
         return SumExpression(expr_operands)
 
+    def _pullback(self, adjoint):
+        pullbacks = []
+        for i in range(len(self.operands)):
+            others = self.operands[:i] + self.operands[i + 1:]
+            pullbacks.append(ProductExpression((adjoint,) + others))
+        return tuple(pullbacks)
+
     def __str__(self):
         '''print out the multiplication expression.
 
@@ -679,6 +1194,8 @@ class DivisionExpression(Expression):
 	2. printing the class instance will result in a str, which can be concatenated into the Expression
 
 	"""
+    __slots__ = ('num', 'denom')
+
     def __init__(self, num: Expression, denom: Expression):
         """
 		INPUTS
@@ -689,8 +1206,13 @@ class DivisionExpression(Expression):
 		"""
         self.num = num
         self.denom = denom
+        self._cache_structure()
 
-    def evaluate(self, values):
+    @property
+    def children(self):
+        return (self.num, self.denom)
+
+    def _evaluate(self, values):
         '''Evaluate the value of division operation with the given values for operands.
 
         Parameters
@@ -702,7 +1224,13 @@ class DivisionExpression(Expression):
         ------- 
         the numerical value (float) of the division operation 
         '''        
-        return self.num.evaluate(values) / self.denom.evaluate(values)
+        return self.num._evaluate(values) / self.denom._evaluate(values)
+
+    def _apply(self, args):
+        return args[0] / args[1]
+
+    def _jvp(self, args, tangents, value):
+        return (tangents[0] - value * tangents[1]) / args[1]
 
     def _symdiff(self, respect_to):
         '''Display the symbolic representation of the derivative of division operation, an illustration of quotient rule
@@ -717,9 +1245,12 @@ class DivisionExpression(Expression):
         the symbolic representation of the derivative of division operation
 
         '''  
-        return (self.num._symdiff(respect_to) * self.denom - self.num * self.denom._symdiff(respect_to)) / (
+        return (self.num._diff(respect_to) * self.denom - self.num * self.denom._diff(respect_to)) / (
             self.denom * self.denom)
 
+    def _pullback(self, adjoint):
+        return (adjoint / self.denom, -(adjoint * self / self.denom))
+
     def __str__(self):
         '''print out the division expression.
 
@@ -762,6 +1293,8 @@ class LnExpression(Expression):
 	3. printing the class instance will result in a str, which can be concatenated into the Expression
 
 	"""
+    __slots__ = ('x',)
+
     def __init__(self, x: Expression):
         """
 		INPUTS
@@ -770,8 +1303,13 @@ class LnExpression(Expression):
 	
 		"""
         self.x = x
+        self._cache_structure()
+
+    @property
+    def children(self):
+        return (self.x,)
 
-    def evaluate(self, values):
+    def _evaluate(self, values):
         '''Evaluate the value of 'taking log' operation with the given values for operands.
 
         Parameters
@@ -783,7 +1321,13 @@ class LnExpression(Expression):
         ------- 
         the numerical value (float) of the 'taking natural log' operation 
         '''
-        return math.log(self.x.evaluate(values))
+        return math.log(self.x._evaluate(values))
+
+    def _apply(self, args):
+        return math.log(args[0])
+
+    def _jvp(self, args, tangents, value):
+        return tangents[0] / args[0]
 
     def _symdiff(self, respect_to):
         '''Display the symbolic representation of the derivative of 'taking log' operation
@@ -798,7 +1342,10 @@ class LnExpression(Expression):
         the symbolic representation of the derivative of taking natural log
 
         '''  
-        return self.x._symdiff(respect_to) / self.x
+        return self.x._diff(respect_to) / self.x
+
+    def _pullback(self, adjoint):
+        return (adjoint / self.x,)
 
     def __str__(self):
         '''print out the 'taking natural log' expression.
@@ -832,6 +1379,8 @@ class PowerExpression(Expression):
 	3. printing the class instance will result in a str, which can be concatenated into the Expression
 
 	"""
+    __slots__ = ('base', 'exponent')
+
     def __init__(self, exponent: Expression, base: Expression = Constant(math.e)):
         """
 		INPUTS
@@ -840,19 +1389,28 @@ class PowerExpression(Expression):
         base: an operand, an Expression instance, the base that will be raised 
 	
 		"""
-        # TODO: do it correctly ;)
-        # If base is a constant (defined by it can be evaluated without value), replace it with a Constant instance.
-        try:
-            self.base = Constant(base.evaluate({}))
-        except AssertionError:
+        # If base is a constant (it depends on no symbol), replace it with a Constant instance.
+        if base.mask or isinstance(base, Constant):
             self.base = base
+        else:
+            self.base = Constant(base.evaluate({}))
         # Do similar thing for exponent
-        try:
-            self.exponent = Constant(exponent.evaluate({}))
-        except AssertionError:
+        if exponent.mask or isinstance(exponent, Constant):
             self.exponent = exponent
+        else:
+            self.exponent = Constant(exponent.evaluate({}))
+        self._cache_structure()
 
-    def evaluate(self, values):
+    @property
+    def children(self):
+        return (self.base, self.exponent)
+
+    @classmethod
+    def _from_children(cls, children):
+        base, exponent = children
+        return cls(exponent=exponent, base=base)
+
+    def _evaluate(self, values):
         '''Evaluate the value of exponential operation with the given values for operands.
 
         Parameters
@@ -864,7 +1422,21 @@ class PowerExpression(Expression):
         ------- 
         the numerical value (float) of the exponentiation operation 
         '''
-        return self.base.evaluate(values) ** self.exponent.evaluate(values)
+        return self.base._evaluate(values) ** self.exponent._evaluate(values)
+
+    def _apply(self, args):
+        return args[0] ** args[1]
+
+    def _jvp(self, args, tangents, value):
+        base, exponent = args
+        t_base, t_exponent = tangents
+        t = 0
+        # Skip zero tangents: the log term is undefined for negative bases with constant exponents.
+        if not _is_zero(t_base):
+            t = t + exponent * base ** (exponent - 1) * t_base
+        if not _is_zero(t_exponent):
+            t = t + value * math.log(base) * t_exponent
+        return t
 
     def _symdiff(self, respect_to):
         '''Display the symbolic representation of the derivative of exponentiation operation
@@ -883,14 +1455,23 @@ class PowerExpression(Expression):
         if isinstance(self.exponent, Constant) and isinstance(self.base, Constant):
             return Constant(0)
         if isinstance(self.exponent, Constant):
-            return self.base._symdiff(respect_to) * self.exponent * self.base ** (self.exponent - 1)
+            return self.base._diff(respect_to) * self.exponent * self.base ** (self.exponent - 1)
         if isinstance(self.base, Constant):
-            return self.exponent._symdiff(respect_to) * LnExpression(self.base) * self
+            return self.exponent._diff(respect_to) * LnExpression(self.base) * self
         return self * (
-            self.exponent._symdiff(respect_to) * LnExpression(self.base) + self.exponent * self.base._symdiff(
+            self.exponent._diff(respect_to) * LnExpression(self.base) + self.exponent * self.base._diff(
                 respect_to) / self.base)
             #PowerExpression(self.exponent * LnExpression(self.base))._symdiff(respect_to)
 
+    def _pullback(self, adjoint):
+        if isinstance(self.exponent, Constant) and isinstance(self.base, Constant):
+            return (None, None)
+        if isinstance(self.exponent, Constant):
+            return (adjoint * self.exponent * self.base ** (self.exponent - 1), None)
+        if isinstance(self.base, Constant):
+            return (None, adjoint * LnExpression(self.base) * self)
+        return (adjoint * self * self.exponent / self.base, adjoint * self * LnExpression(self.base))
+
     def __str__(self):
         '''print out the exponentiation expression.
 
@@ -920,6 +1501,8 @@ class SinExpression(Expression):
 	2. printing the class instance will result in a str, which can be concatenated into the Expression
 
 	"""
+    __slots__ = ('x',)
+
     def __init__(self, x: Expression):
         """
 		INPUTS
@@ -928,8 +1511,13 @@ class SinExpression(Expression):
 	
 		"""
         self.x = x
+        self._cache_structure()
+
+    @property
+    def children(self):
+        return (self.x,)
 
-    def evaluate(self, values):
+    def _evaluate(self, values):
         '''Evaluate the value of "taking sine" operation with the given values for operands.
 
         Parameters
@@ -941,7 +1529,13 @@ class SinExpression(Expression):
         ------- 
         the numerical value (float) of the "taking sine"  operation 
         '''
-        return math.sin(self.x.evaluate(values))
+        return math.sin(self.x._evaluate(values))
+
+    def _apply(self, args):
+        return math.sin(args[0])
+
+    def _jvp(self, args, tangents, value):
+        return math.cos(args[0]) * tangents[0]
 
     def _symdiff(self, respect_to):
         '''Display the symbolic representation of the derivative of "taking sine" operation
@@ -956,7 +1550,10 @@ class SinExpression(Expression):
         the symbolic representation of the derivative of "taking sine"
 
         '''  
-        return self.x._symdiff(respect_to) * CosExpression(self.x)
+        return self.x._diff(respect_to) * CosExpression(self.x)
+
+    def _pullback(self, adjoint):
+        return (adjoint * CosExpression(self.x),)
 
     def __str__(self):
         '''print out the "taking sine" expression.
@@ -987,6 +1584,8 @@ class CosExpression(Expression):
 	2. printing the class instance will result in a str, which can be concatenated into the Expression
 
 	"""
+    __slots__ = ('x',)
+
     def __init__(self, x: Expression):
         """
 		INPUTS
@@ -995,8 +1594,13 @@ class CosExpression(Expression):
 	
 		"""
         self.x = x
+        self._cache_structure()
 
-    def evaluate(self, values):
+    @property
+    def children(self):
+        return (self.x,)
+
+    def _evaluate(self, values):
         '''Evaluate the value of "taking cosine" operation with the given values for operands.
 
         Parameters
@@ -1008,7 +1612,13 @@ class CosExpression(Expression):
         ------- 
         the numerical value (float) of the "taking cosine"  operation 
         '''
-        return math.cos(self.x.evaluate(values))
+        return math.cos(self.x._evaluate(values))
+
+    def _apply(self, args):
+        return math.cos(args[0])
+
+    def _jvp(self, args, tangents, value):
+        return -math.sin(args[0]) * tangents[0]
 
     def _symdiff(self, respect_to):
         '''Display the symbolic representation of the derivative of "taking cosine" operation
@@ -1023,7 +1633,10 @@ class CosExpression(Expression):
         the symbolic representation of the derivative of "taking cosine"
 
         ''' 
-        return self.x._symdiff(respect_to) * SinExpression(self.x) * -1
+        return self.x._diff(respect_to) * SinExpression(self.x) * -1
+
+    def _pullback(self, adjoint):
+        return (adjoint * SinExpression(self.x) * -1,)
 
     def __str__(self):
         '''print out the "taking cosine" expression.
@@ -1054,6 +1667,8 @@ class TanExpression(Expression):
 	2. printing the class instance will result in a str, which can be concatenated into the Expression
 
 	"""
+    __slots__ = ('x',)
+
     def __init__(self, x: Expression):
         """
 		INPUTS
@@ -1062,8 +1677,13 @@ class TanExpression(Expression):
 	
 		"""
         self.x = x
+        self._cache_structure()
+
+    @property
+    def children(self):
+        return (self.x,)
 
-    def evaluate(self, values):
+    def _evaluate(self, values):
         '''Evaluate the value of "taking tangent" operation with the given values for operands.
 
         Parameters
@@ -1075,7 +1695,13 @@ class TanExpression(Expression):
         ------- 
         the numerical value (float) of the "taking tangent"  operation 
         '''
-        return math.tan(self.x.evaluate(values))
+        return math.tan(self.x._evaluate(values))
+
+    def _apply(self, args):
+        return math.tan(args[0])
+
+    def _jvp(self, args, tangents, value):
+        return tangents[0] / math.cos(args[0]) ** 2
 
     def _symdiff(self, respect_to):
         '''Display the symbolic representation of the derivative of "taking tangent" operation
@@ -1090,7 +1716,10 @@ class TanExpression(Expression):
         the symbolic representation of the derivative of "taking tangent"
 
         ''' 
-        return self.x._symdiff(respect_to) / (CosExpression(self.x) * CosExpression(self.x))
+        return self.x._diff(respect_to) / (CosExpression(self.x) * CosExpression(self.x))
+
+    def _pullback(self, adjoint):
+        return (adjoint / (CosExpression(self.x) * CosExpression(self.x)),)
 
     def __str__(self):
         '''print out the "taking tangent" expression.
@@ -1121,6 +1750,8 @@ class ArcsinExpression(Expression):
 	2. printing the class instance will result in a str, which can be concatenated into the Expression
 
 	"""
+    __slots__ = ('x',)
+
     def __init__(self, x: Expression):
         """
 		INPUTS
@@ -1129,8 +1760,13 @@ class ArcsinExpression(Expression):
 	
 		"""
         self.x = x
+        self._cache_structure()
 
-    def evaluate(self, values):
+    @property
+    def children(self):
+        return (self.x,)
+
+    def _evaluate(self, values):
         '''Evaluate the value of "taking arcsin" operation with the given values for operands.
 
         Parameters
@@ -1142,7 +1778,13 @@ class ArcsinExpression(Expression):
         ------- 
         the numerical value (float) of the "taking arcsin"  operation 
         '''
-        return math.asin(self.x.evaluate(values))
+        return math.asin(self.x._evaluate(values))
+
+    def _apply(self, args):
+        return math.asin(args[0])
+
+    def _jvp(self, args, tangents, value):
+        return tangents[0] / math.sqrt(1 - args[0] * args[0])
 
     def _symdiff(self, respect_to):
         '''Display the symbolic representation of the derivative of "taking arcsin" operation
@@ -1157,7 +1799,10 @@ class ArcsinExpression(Expression):
         the symbolic representation of the derivative of "taking arcsin"
 
         ''' 
-        return self.x._symdiff(respect_to) * (1 / (1 - self.x * self.x) ** 0.5)
+        return self.x._diff(respect_to) * (1 / (1 - self.x * self.x) ** 0.5)
+
+    def _pullback(self, adjoint):
+        return (adjoint * (1 / (1 - self.x * self.x) ** 0.5),)
 
     def __str__(self):
         '''print out the "taking arcsin" expression.
@@ -1188,6 +1833,8 @@ class ArccosExpression(Expression):
 	2. printing the class instance will result in a str, which can be concatenated into the Expression
 
 	"""
+    __slots__ = ('x',)
+
     def __init__(self, x: Expression):
         """
 		INPUTS
@@ -1196,8 +1843,13 @@ class ArccosExpression(Expression):
 	
 		"""
         self.x = x
+        self._cache_structure()
+
+    @property
+    def children(self):
+        return (self.x,)
 
-    def evaluate(self, values):
+    def _evaluate(self, values):
         '''Evaluate the value of "taking arccos" operation with the given values for operands.
 
         Parameters
@@ -1209,7 +1861,13 @@ class ArccosExpression(Expression):
         ------- 
         the numerical value (float) of the "taking arccos"  operation 
         '''
-        return math.acos(self.x.evaluate(values))
+        return math.acos(self.x._evaluate(values))
+
+    def _apply(self, args):
+        return math.acos(args[0])
+
+    def _jvp(self, args, tangents, value):
+        return -tangents[0] / math.sqrt(1 - args[0] * args[0])
 
     def _symdiff(self, respect_to):
         '''Display the symbolic representation of the derivative of "taking arccos" operation
@@ -1224,7 +1882,10 @@ class ArccosExpression(Expression):
         the symbolic representation of the derivative of "taking arccos"
 
         ''' 
-        return self.x._symdiff(respect_to) * (1 / (1 - self.x * self.x) ** 0.5) * -1
+        return self.x._diff(respect_to) * (1 / (1 - self.x * self.x) ** 0.5) * -1
+
+    def _pullback(self, adjoint):
+        return (adjoint * (1 / (1 - self.x * self.x) ** 0.5) * -1,)
 
     def __str__(self):
         '''print out the "taking arccos" expression.
@@ -1255,6 +1916,8 @@ class ArctanExpression(Expression):
 	2. printing the class instance will result in a str, which can be concatenated into the Expression
 
 	"""
+    __slots__ = ('x',)
+
     def __init__(self, x: Expression):
         """
 		INPUTS
@@ -1263,8 +1926,13 @@ class ArctanExpression(Expression):
 	
 		"""
         self.x = x
+        self._cache_structure()
 
-    def evaluate(self, values):
+    @property
+    def children(self):
+        return (self.x,)
+
+    def _evaluate(self, values):
         '''Evaluate the value of "taking arctan" operation with the given values for operands.
 
         Parameters
@@ -1276,7 +1944,13 @@ class ArctanExpression(Expression):
         ------- 
         the numerical value (float) of the "taking arctan"  operation 
         '''
-        return math.atan(self.x.evaluate(values))
+        return math.atan(self.x._evaluate(values))
+
+    def _apply(self, args):
+        return math.atan(args[0])
+
+    def _jvp(self, args, tangents, value):
+        return tangents[0] / (1 + args[0] * args[0])
 
     def _symdiff(self, respect_to):
         '''Display the symbolic representation of the derivative of "taking arctan" operation
@@ -1291,7 +1965,10 @@ class ArctanExpression(Expression):
         the symbolic representation of the derivative of "taking arctan"
 
         ''' 
-        return self.x._symdiff(respect_to) * (1 / (self.x * self.x + 1))
+        return self.x._diff(respect_to) * (1 / (self.x * self.x + 1))
+
+    def _pullback(self, adjoint):
+        return (adjoint * (1 / (self.x * self.x + 1)),)
 
     def __str__(self):
         '''print out the "taking arccos" expression.
@@ -1322,6 +1999,8 @@ class SinhExpression(Expression):
 	2. printing the class instance will result in a str, which can be concatenated into the Expression
 
 	"""
+    __slots__ = ('x',)
+
     def __init__(self, x: Expression):
         """
 		INPUTS
@@ -1330,8 +2009,13 @@ class SinhExpression(Expression):
 	
 		"""
         self.x = x
+        self._cache_structure()
+
+    @property
+    def children(self):
+        return (self.x,)
 
-    def evaluate(self, values):
+    def _evaluate(self, values):
         '''Evaluate the value of "taking sinh" operation with the given values for operands.
 
         Parameters
@@ -1343,7 +2027,13 @@ class SinhExpression(Expression):
         ------- 
         the numerical value (float) of the "taking sinh"  operation 
         '''
-        return math.sinh(self.x.evaluate(values))
+        return math.sinh(self.x._evaluate(values))
+
+    def _apply(self, args):
+        return math.sinh(args[0])
+
+    def _jvp(self, args, tangents, value):
+        return math.cosh(args[0]) * tangents[0]
 
     def _symdiff(self, respect_to):
         '''Display the symbolic representation of the derivative of "taking sinh" operation
@@ -1358,7 +2048,10 @@ class SinhExpression(Expression):
         the symbolic representation of the derivative of "taking sinh"
 
         ''' 
-        return self.x._symdiff(respect_to) * CoshExpression(self.x)
+        return self.x._diff(respect_to) * CoshExpression(self.x)
+
+    def _pullback(self, adjoint):
+        return (adjoint * CoshExpression(self.x),)
 
     def __str__(self):
         '''print out the "taking sinh" expression.
@@ -1389,6 +2082,8 @@ class CoshExpression(Expression):
 	2. printing the class instance will result in a str, which can be concatenated into the Expression
 
 	"""
+    __slots__ = ('x',)
+
     def __init__(self, x: Expression):
         """
 		INPUTS
@@ -1397,8 +2092,13 @@ class CoshExpression(Expression):
 	
 		"""
         self.x = x
+        self._cache_structure()
+
+    @property
+    def children(self):
+        return (self.x,)
 
-    def evaluate(self, values):
+    def _evaluate(self, values):
         '''Evaluate the value of "taking cosh" operation with the given values for operands.
 
         Parameters
@@ -1410,7 +2110,13 @@ class CoshExpression(Expression):
         ------- 
         the numerical value (float) of the "taking cosh"  operation 
         '''
-        return math.cosh(self.x.evaluate(values))
+        return math.cosh(self.x._evaluate(values))
+
+    def _apply(self, args):
+        return math.cosh(args[0])
+
+    def _jvp(self, args, tangents, value):
+        return math.sinh(args[0]) * tangents[0]
 
     def _symdiff(self, respect_to):
         '''Display the symbolic representation of the derivative of "taking cosh" operation
@@ -1425,7 +2131,10 @@ class CoshExpression(Expression):
         the symbolic representation of the derivative of "taking cosh"
 
         ''' 
-        return self.x._symdiff(respect_to) * SinhExpression(self.x)
+        return self.x._diff(respect_to) * SinhExpression(self.x)
+
+    def _pullback(self, adjoint):
+        return (adjoint * SinhExpression(self.x),)
 
     def __str__(self):
         '''print out the "taking cosh" expression.
@@ -1456,6 +2165,8 @@ class TanhExpression(Expression):
 	2. printing the class instance will result in a str, which can be concatenated into the Expression
 
 	"""
+    __slots__ = ('x',)
+
     def __init__(self, x: Expression):
         """
 		INPUTS
@@ -1464,8 +2175,13 @@ class TanhExpression(Expression):
 	
 		"""
         self.x = x
+        self._cache_structure()
+
+    @property
+    def children(self):
+        return (self.x,)
 
-    def evaluate(self, values):
+    def _evaluate(self, values):
         '''Evaluate the value of "taking tanh" operation with the given values for operands.
 
         Parameters
@@ -1477,7 +2193,13 @@ class TanhExpression(Expression):
         ------- 
         the numerical value (float) of the "taking tanh"  operation 
         '''
-        return math.tanh(self.x.evaluate(values))
+        return math.tanh(self.x._evaluate(values))
+
+    def _apply(self, args):
+        return math.tanh(args[0])
+
+    def _jvp(self, args, tangents, value):
+        return tangents[0] / math.cosh(args[0]) ** 2
 
     def _symdiff(self, respect_to):
         '''Display the symbolic representation of the derivative of "taking tanh" operation
@@ -1492,7 +2214,10 @@ class TanhExpression(Expression):
         the symbolic representation of the derivative of "taking tanh"
 
         ''' 
-        return self.x._symdiff(respect_to) / (CoshExpression(self.x) * CoshExpression(self.x))
+        return self.x._diff(respect_to) / (CoshExpression(self.x) * CoshExpression(self.x))
+
+    def _pullback(self, adjoint):
+        return (adjoint / (CoshExpression(self.x) * CoshExpression(self.x)),)
 
     def __str__(self):
         '''print out the "taking tanh" expression.
@@ -1507,3 +2232,577 @@ class TanhExpression(Expression):
 
         '''    
         return 'tanh(%s)' % self.x
+
+
+class ExpExpression(Expression):
+    """
+    - The ExpExpression class, a child class of Expression 
+    
+    Attributes
+	==========
+	x : an operand, an Expression instance
+
+	NOTES
+	=====
+    1. This class will handle the exponential function with natural base, evaluated with math.exp
+    2. the derivative of exp is exp itself, so the derivative reuses this node
+	3. printing the class instance will result in a str, which can be concatenated into the Expression
+
+	"""
+    __slots__ = ('x',)
+
+    def __init__(self, x: Expression):
+        """
+		INPUTS
+		=======
+		x : an operand, an Expression instance that we are "taking exp" on
+	
+		"""
+        self.x = x
+        self._cache_structure()
+
+    @property
+    def children(self):
+        return (self.x,)
+
+    def _evaluate(self, values):
+        '''Evaluate the value of "taking exp" operation with the given values for operands.
+
+        Parameters
+        ----------
+        self: ExpExpression 
+        values: a float
+        
+        Returns
+        ------- 
+        the numerical value (float) of the "taking exp"  operation 
+        '''
+        return math.exp(self.x._evaluate(values))
+
+    def _apply(self, args):
+        return math.exp(args[0])
+
+    def _jvp(self, args, tangents, value):
+        return value * tangents[0]
+
+    def _symdiff(self, respect_to):
+        '''Display the symbolic representation of the derivative of "taking exp" operation
+
+        Parameters
+        ----------
+        self: ExpExpression 
+        respect_to: variable symbol (x, y, z, etc), the partial derivative direction
+        
+        Returns
+        ------- 
+        the symbolic representation of the derivative of "taking exp"
+
+        ''' 
+        return self.x._diff(respect_to) * self
+
+    def _pullback(self, adjoint):
+        return (adjoint * self,)
+
+    def __str__(self):
+        '''print out the "taking exp" expression.
+
+        Parameters
+        ----------
+        self: ExpExpression
+        
+        Returns
+        ------- 
+        str version of the "taking exp" expression
+
+        '''    
+        return 'exp(%s)' % self.x
+
+
+class IntPowExpression(Expression):
+    """
+    - The IntPowExpression class, a child class of Expression 
+    
+    Attributes
+	==========
+	base: an operand, an Expression instance, the base that will be raised 
+	exponent : a Constant holding an int, the power that the base is raised to
+
+	NOTES
+	=====
+    1. This class will handle variable raised to an integer constant (x**n), created by the ** operator
+    2. evaluation uses integer exponentiation and the derivative n * x**(n-1) has no logarithm branch
+	3. printing the class instance will result in a str, which can be concatenated into the Expression
+
+	"""
+    __slots__ = ('base', 'exponent')
+
+    def __init__(self, base: Expression, exponent):
+        """
+		INPUTS
+		=======
+		base: an operand, an Expression instance, the base that will be raised 
+		exponent : int or Constant holding an int, the power that the base is raised to
+	
+		"""
+        if not isinstance(exponent, Constant):
+            exponent = Constant(exponent)
+        if not isinstance(exponent.value, int) or isinstance(exponent.value, bool):
+            raise TypeError('IntPowExpression needs an int exponent, got %r' % (exponent.value,))
+        self.base = base
+        self.exponent = exponent
+        self._cache_structure()
+
+    @property
+    def children(self):
+        return (self.base, self.exponent)
+
+    def _evaluate(self, values):
+        '''Evaluate the value of integer exponentiation with the given values for operands.
+
+        Parameters
+        ----------
+        self: IntPowExpression 
+        values: a float
+        
+        Returns
+        ------- 
+        the numerical value (float) of the integer exponentiation
+        '''
+        return self.base._evaluate(values) ** self.exponent.value
+
+    def _apply(self, args):
+        return args[0] ** args[1]
+
+    def _jvp(self, args, tangents, value):
+        base, n = args
+        return n * base ** (n - 1) * tangents[0]
+
+    def _symdiff(self, respect_to):
+        '''Display the symbolic representation of the derivative of integer exponentiation
+
+        Parameters
+        ----------
+        self: IntPowExpression 
+        respect_to: variable symbol (x, y, z, etc), the partial derivative direction
+        
+        Returns
+        ------- 
+        the symbolic representation of the derivative of integer exponentiation
+
+        ''' 
+        return self.base._diff(respect_to) * self.exponent * IntPowExpression(self.base, self.exponent.value - 1)
+
+    def _pullback(self, adjoint):
+        return (adjoint * self.exponent * IntPowExpression(self.base, self.exponent.value - 1), None)
+
+    def __str__(self):
+        '''print out the integer exponentiation expression.
+
+        Parameters
+        ----------
+        self: IntPowExpression
+        
+        Returns
+        ------- 
+        str version of the integer exponentiation expression
+
+        '''    
+        return '(%s)^(%s)' % (self.base, self.exponent)
+
+
+class NegExpression(Expression):
+    """
+    - The NegExpression class, a child class of Expression 
+    
+    Attributes
+	==========
+	x : an operand, an Expression instance
+
+	NOTES
+	=====
+    1. This class will handle negation, created by unary minus and by subtraction
+	2. printing the class instance will result in a str, which can be concatenated into the Expression
+
+	"""
+    __slots__ = ('x',)
+
+    def __init__(self, x: Expression):
+        """
+		INPUTS
+		=======
+		x : an operand, an Expression instance that we are negating
+	
+		"""
+        self.x = x
+        self._cache_structure()
+
+    @property
+    def children(self):
+        return (self.x,)
+
+    def _evaluate(self, values):
+        '''Evaluate the value of negation with the given values for operands.
+
+        Parameters
+        ----------
+        self: NegExpression 
+        values: a float
+        
+        Returns
+        ------- 
+        the numerical value (float) of the negation
+        '''
+        return -self.x._evaluate(values)
+
+    def _apply(self, args):
+        return -args[0]
+
+    def _jvp(self, args, tangents, value):
+        return -tangents[0]
+
+    def _symdiff(self, respect_to):
+        '''Display the symbolic representation of the derivative of negation
+
+        Parameters
+        ----------
+        self: NegExpression 
+        respect_to: variable symbol (x, y, z, etc), the partial derivative direction
+        
+        Returns
+        ------- 
+        the symbolic representation of the derivative of negation
+
+        ''' 
+        return NegExpression(self.x._diff(respect_to))
+
+    def _pullback(self, adjoint):
+        return (NegExpression(adjoint),)
+
+    def __str__(self):
+        '''print out the negation expression.
+
+        Parameters
+        ----------
+        self: NegExpression
+        
+        Returns
+        ------- 
+        str version of the negation expression
+
+        '''    
+        return '-(%s)' % self.x
+
+
+class RecipExpression(Expression):
+    """
+    - The RecipExpression class, a child class of Expression 
+    
+    Attributes
+	==========
+	x : an operand, an Expression instance
+
+	NOTES
+	=====
+    1. This class will handle the reciprocal 1/x, created by dividing the number 1 by an Expression
+    2. the derivative -1/x**2 reuses this node, -(x' * (1/x) * (1/x))
+	3. printing the class instance will result in a str, which can be concatenated into the Expression
+
+	"""
+    __slots__ = ('x',)
+
+    def __init__(self, x: Expression):
+        """
+		INPUTS
+		=======
+		x : an operand, an Expression instance that we are taking the reciprocal of
+	
+		"""
+        self.x = x
+        self._cache_structure()
+
+    @property
+    def children(self):
+        return (self.x,)
+
+    def _evaluate(self, values):
+        '''Evaluate the value of the reciprocal with the given values for operands.
+
+        Parameters
+        ----------
+        self: RecipExpression 
+        values: a float
+        
+        Returns
+        ------- 
+        the numerical value (float) of the reciprocal
+        '''
+        return 1 / self.x._evaluate(values)
+
+    def _apply(self, args):
+        return 1 / args[0]
+
+    def _jvp(self, args, tangents, value):
+        return -value * value * tangents[0]
+
+    def _symdiff(self, respect_to):
+        '''Display the symbolic representation of the derivative of the reciprocal
+
+        Parameters
+        ----------
+        self: RecipExpression 
+        respect_to: variable symbol (x, y, z, etc), the partial derivative direction
+        
+        Returns
+        ------- 
+        the symbolic representation of the derivative of the reciprocal
+
+        ''' 
+        return NegExpression(self.x._diff(respect_to) * self * self)
+
+    def _pullback(self, adjoint):
+        return (NegExpression(adjoint * self * self),)
+
+    def __str__(self):
+        '''print out the reciprocal expression.
+
+        Parameters
+        ----------
+        self: RecipExpression
+        
+        Returns
+        ------- 
+        str version of the reciprocal expression
+
+        '''    
+        return '(1)/(%s)' % self.x
+
+
+class SqrtExpression(Expression):
+    """
+    - The SqrtExpression class, a child class of Expression 
+    
+    Attributes
+	==========
+	x : an operand, an Expression instance
+
+	NOTES
+	=====
+    1. This class will handle the square root function, evaluated with math.sqrt
+    2. the derivative x' / (2 * sqrt(x)) reuses this node
+	3. printing the class instance will result in a str, which can be concatenated into the Expression
+
+	"""
+    __slots__ = ('x',)
+
+    def __init__(self, x: Expression):
+        """
+		INPUTS
+		=======
+		x : an operand, an Expression instance that we are "taking square root" on
+	
+		"""
+        self.x = x
+        self._cache_structure()
+
+    @property
+    def children(self):
+        return (self.x,)
+
+    def _evaluate(self, values):
+        '''Evaluate the value of "taking square root" operation with the given values for operands.
+
+        Parameters
+        ----------
+        self: SqrtExpression 
+        values: a float
+        
+        Returns
+        ------- 
+        the numerical value (float) of the "taking square root"  operation 
+        '''
+        return math.sqrt(self.x._evaluate(values))
+
+    def _apply(self, args):
+        return math.sqrt(args[0])
+
+    def _jvp(self, args, tangents, value):
+        return tangents[0] / (2 * value)
+
+    def _symdiff(self, respect_to):
+        '''Display the symbolic representation of the derivative of "taking square root" operation
+
+        Parameters
+        ----------
+        self: SqrtExpression 
+        respect_to: variable symbol (x, y, z, etc), the partial derivative direction
+        
+        Returns
+        ------- 
+        the symbolic representation of the derivative of "taking square root"
+
+        ''' 
+        return self.x._diff(respect_to) / (Constant(2) * self)
+
+    def _pullback(self, adjoint):
+        return (adjoint / (Constant(2) * self),)
+
+    def __str__(self):
+        '''print out the "taking square root" expression.
+
+        Parameters
+        ----------
+        self: SqrtExpression
+        
+        Returns
+        ------- 
+        str version of the "taking square root" expression
+
+        '''    
+        return 'sqrt(%s)' % self.x
+
+
+class LazyDerivative(Expression):
+    """
+    - The LazyDerivative class, a child class of Expression, returned by diff()
+
+    Attributes
+	==========
+	expr : the Expression being differentiated
+	symbols : tuple of Symbol, the differentiation variables in order
+
+	NOTES
+	=====
+    1. evaluation runs a forward mode pass over the DAG of expr, without building the derivative tree;
+    for higher order derivatives all but the last differentiation are done symbolically
+    2. the derivative tree is only built (once) when it is printed, differentiated or otherwise
+    inspected, its depth and size included, see materialize()
+    3. as a node of a bigger graph it is an identity wrapper around its materialized derivative
+
+	"""
+    __slots__ = ('expr', 'symbols', '_materialized', '_primal', '_order')
+
+    def __init__(self, expr: Expression, symbols):
+        """
+		INPUTS
+		=======
+		expr : the Expression being differentiated
+		symbols : sequence of Symbol, the differentiation variables in order
+
+        Example
+        ------
+        >>> x = Symbol('x')
+        >>> d = LazyDerivative(sin(x), [x])
+        >>> d.evaluate({x: 0})
+        1.0
+		"""
+        self.expr = expr
+        self.symbols = tuple(symbols)
+        self._materialized = None
+        self._primal = None
+        self._order = None
+        self._cache_structure()
+
+    def _cache_structure(self):
+        # The free symbols of a derivative are among those of expr. Depth and size are
+        # those of the derivative tree, only known once it is built.
+        self.mask = self.expr.mask
+
+    @property
+    def depth(self):
+        return self.materialize().depth + 1
+
+    @property
+    def size(self):
+        return self.materialize().size + 1
+
+    def __getstate__(self):
+        # Without depth and size, which would build the tree, and the evaluation caches.
+        return None, {'expr': self.expr, 'symbols': self.symbols, '_materialized': self._materialized,
+                      '_primal': None, '_order': None}
+
+    def materialize(self) -> Expression:
+        '''Build the explicit derivative expression, once.
+
+        Returns
+        -------
+        the derivative expression, as built by the symbolic rules of each node
+        '''
+        if self._materialized is None:
+            from .profile import check_node_budget
+            result = self.expr
+            for symbol in self.symbols:
+                result = result._diff(symbol)
+                check_node_budget(result, 'derivative w.r.t. %s' % symbol.name)
+            self._materialized = result
+        return self._materialized
+
+    def _evaluate(self, values):
+        '''Evaluate the derivative with a forward mode pass, each shared node visited once.
+
+        Parameters
+        ----------
+        self: LazyDerivative
+        values: dict of symbol -> float, or a flat array for SymbolVector symbols
+
+        Returns
+        -------
+        the numerical value (float) of the derivative
+        '''
+        try:
+            return self._forward(values)
+        except (ValueError, ZeroDivisionError, OverflowError):
+            # The forward pass also needs the primal values of expr, which can fail where the
+            # derivative itself is defined, e.g. log(x) at x = -1: evaluate the derivative tree.
+            return self.materialize()._evaluate(values)
+
+    def _forward(self, values):
+        '''
+        the forward mode pass of _evaluate
+        '''
+        if self._order is None:
+            primal = self.expr
+            for symbol in self.symbols[:-1]:
+                primal = primal._diff(symbol)
+            self._primal = primal
+            self._order = postorder(primal)
+        seed = self.symbols[-1]
+        seed_mask = seed.mask
+        vals = {}
+        tans = {}
+        for node in self._order:
+            children = node.children
+            if not children:
+                vals[id(node)] = node._evaluate(values)
+                tans[id(node)] = 1 if node is seed else 0
+                continue
+            args = [vals[id(child)] for child in children]
+            value = node._apply(args)
+            vals[id(node)] = value
+            if node.mask & seed_mask:
+                tans[id(node)] = node._jvp(args, [tans[id(child)] for child in children], value)
+            else:
+                tans[id(node)] = 0
+        return tans[id(self._primal)]
+
+    @property
+    def children(self):
+        return (self.materialize(),)
+
+    @classmethod
+    def _from_children(cls, children):
+        return children[0]
+
+    def _apply(self, args):
+        return args[0]
+
+    def _jvp(self, args, tangents, value):
+        return tangents[0]
+
+    def _pullback(self, adjoint):
+        return (adjoint,)
+
+    def _symdiff(self, respect_to):
+        return self.materialize()._diff(respect_to)
+
+    def __str__(self):
+        return str(self.materialize())
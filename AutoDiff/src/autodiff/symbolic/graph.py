@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+# Helpers that walk an Expression DAG iteratively, so that very deep or very
+# large graphs neither hit the recursion limit nor visit a shared node twice.
+
+
+def postorder(roots):
+    """
+    list every node reachable from roots, children before parents
+    Args:
+        roots: Expression or iterable of Expression
+
+    Returns:
+        list of Expression, each distinct node (by identity) exactly once
+
+    Examples:
+    >>> x = Symbol('x')
+    >>> s = x * x
+    >>> [str(i) for i in postorder(s + s)]
+    ['x', '(x)*(x)', '((x)*(x))+((x)*(x))']
+    """
+    if not isinstance(roots, (list, tuple)):
+        roots = [roots]
+    seen = set()
+    order = []
+    stack = [(node, False) for node in reversed(roots)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            order.append(node)
+            continue
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        stack.append((node, True))
+        for child in reversed(node.children):
+            if id(child) not in seen:
+                stack.append((child, False))
+    return order
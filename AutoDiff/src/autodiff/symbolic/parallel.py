@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import math
+import os
+from multiprocessing import Pool
+
+import numpy as np
+
+from .expression import Expression, Symbol
+from .plan import EvaluationPlan
+from .profile import check_node_budget
+from .serialize import GraphTable, dumps, loads
+from .sharing import Interner
+from .tape import Tape
+
+# Parallel evaluation of one model over many points.
+#
+# The tape of an EvaluationPlan is written once to a shared memory block, which
+# every worker process maps and evaluates in place. The points and the results
+# live in two more shared memory blocks: a worker reads a chunk of rows of the
+# points and writes the same rows of the results, so neither is pickled or
+# copied between processes. Chunks are handed out dynamically, and since each
+# one is written at its own rows the results are in the order of the points
+# whatever order the chunks finish in.
+#
+# Large symbolic Jacobians are built the same way: the model is sent to the
+# workers once, each worker differentiates whole rows and sends them back in
+# the serialised form, which keeps the sharing within a row, and the parent
+# merges the rows through one intern table so sharing across rows is restored.
+#
+# multiprocessing.shared_memory is new in Python 3.8; it is imported where it is
+# used, so that the rest of the package still imports on older versions.
+
+# State of a worker process: the tape and the point / result blocks it has mapped,
+# or the model to differentiate.
+_worker = {}
+
+
+def _attach(tape_name, tape_nbytes):
+    """
+    pool initializer, maps the tape of the evaluator
+    """
+    from multiprocessing import shared_memory
+    shm = shared_memory.SharedMemory(name=tape_name)
+    _worker['tape_shm'] = shm
+    _worker['tape'] = Tape.frombuffer(shm.buf[:tape_nbytes])
+    _worker['blocks'] = {}
+
+
+def _arrays(points_name, results_name, n_points, n_slots, n_outputs):
+    """
+    the points and results arrays of one call of map(), their shared memory mapped once per call
+    """
+    blocks = _worker['blocks']
+    if points_name not in blocks:
+        from multiprocessing import shared_memory
+        # A new call of map(): the blocks of the previous one are no longer used.
+        for old in list(blocks):
+            blocks.pop(old).close()
+        blocks[points_name] = shared_memory.SharedMemory(name=points_name)
+        blocks[results_name] = shared_memory.SharedMemory(name=results_name)
+    return (np.ndarray((n_points, n_slots), dtype=np.float64, buffer=blocks[points_name].buf),
+            np.ndarray((n_points, n_outputs), dtype=np.float64, buffer=blocks[results_name].buf))
+
+
+def _run(task):
+    """
+    evaluate the tape on the rows start:stop of the points into the same rows of the results
+    """
+    start, stop = task[-2:]
+    points, results = _arrays(*task[:-2])
+    # Transposed views: the tape takes the symbol slot, and writes the output, on the first axis.
+    _worker['tape'].evaluate(points[start:stop].T, out=results[start:stop].T)
+    return start, stop
+
+
+class ParallelEvaluator:
+    """
+    Creates a pool of worker processes evaluating blocks of Expressions over many points.
+
+    Attributes
+    ==========
+    plan : EvaluationPlan of the blocks, see plan
+    symbols : list of Symbol, the order of the columns of the points
+    processes : int, the number of worker processes
+
+    NOTES
+    =====
+    1. the tape is sent to the workers once, when the pool starts; map() can then be
+       called any number of times
+    2. symbols must list every symbol the blocks depend on
+    3. close the evaluator, or use it as a context manager, to stop the workers and
+       free the shared memory
+    4. needs multiprocessing.shared_memory, Python 3.8 or newer
+
+    Examples
+    ========
+    >>> x, y = symbols('x y')
+    >>> f = [x * y, sin(x)]
+    >>> with ParallelEvaluator(f, get_jacobian_expression(f, [x, y]), symbols=[x, y]) as ev:
+    ...     value, jacobian = ev.map(np.random.rand(100000, 2))
+    >>> jacobian.shape
+    (100000, 2, 2)
+    """
+
+    def __init__(self, *blocks, symbols, processes=None):
+        self.symbols = list(symbols)
+        self.plan = EvaluationPlan(*blocks, symbols=self.symbols)
+        if len(self.plan.symbols) > len(self.symbols):
+            missing = [s.name for s in self.plan.symbols[len(self.symbols):]]
+            raise ValueError('no column given for symbols %s' % ', '.join(missing))
+        self.processes = processes or os.cpu_count() or 1
+        from multiprocessing import shared_memory
+        data = self.plan.tape.tobytes()
+        self._tape_shm = shared_memory.SharedMemory(create=True, size=len(data))
+        try:
+            self._tape_shm.buf[:len(data)] = data
+            self._pool = Pool(self.processes, initializer=_attach, initargs=(self._tape_shm.name, len(data)))
+        except BaseException:
+            self._tape_shm.close()
+            self._tape_shm.unlink()
+            raise
+
+    def map(self, points, chunksize=None):
+        '''Evaluate every block at every point.
+
+        Parameters
+        ----------
+        points: array of shape (number of points, len(symbols)), one point per row
+        chunksize: number of points per task, by default about four tasks per process
+
+        Returns
+        -------
+        an array of shape (number of points,) + block shape, or a list of one per block,
+        in the order of the points
+        '''
+        from multiprocessing import shared_memory
+        points = np.asarray(points, dtype=np.float64)
+        if points.ndim != 2 or points.shape[1] != len(self.symbols):
+            raise ValueError('points must have shape (n, %d), got %s' % (len(self.symbols), points.shape))
+        n_points, n_slots = points.shape
+        n_outputs = len(self.plan)
+        chunksize = chunksize or max(1, math.ceil(n_points / (4 * self.processes)))
+        points_shm = shared_memory.SharedMemory(create=True, size=max(1, points.nbytes))
+        results_shm = shared_memory.SharedMemory(create=True, size=max(1, 8 * n_points * n_outputs))
+        try:
+            shared = np.ndarray(points.shape, dtype=np.float64, buffer=points_shm.buf)
+            shared[:] = points
+            del shared
+            tasks = [(points_shm.name, results_shm.name, n_points, n_slots, n_outputs,
+                      start, min(start + chunksize, n_points)) for start in range(0, n_points, chunksize)]
+            for _ in self._pool.imap_unordered(_run, tasks):
+                pass
+            results = np.ndarray((n_points, n_outputs), dtype=np.float64, buffer=results_shm.buf).copy()
+        finally:
+            points_shm.close()
+            points_shm.unlink()
+            results_shm.close()
+            results_shm.unlink()
+        blocks = []
+        start = 0
+        for shape, size in zip(self.plan.shapes, self.plan._sizes):
+            blocks.append(results[:, start:start + size].reshape((n_points,) + shape))
+            start += size
+        return blocks[0] if len(blocks) == 1 else blocks
+
+    def close(self):
+        '''Stop the worker processes and free the shared tape.'''
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+            self._tape_shm.close()
+            self._tape_shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _attach_model(data, columns):
+    """
+    pool initializer, loads the model to differentiate
+    """
+    table = GraphTable.frombuffer(data)
+    symbols = [Symbol(name) for name in table.names]
+    _worker['model'] = table.to_expressions(symbols)
+    _worker['symbols'] = symbols
+    _worker['columns'] = [symbols[slot] for slot in columns]
+
+
+def _differentiate_row(i):
+    """
+    differentiate row i of the model w.r.t. every column, returns i and the serialised row
+    """
+    expr = _worker['model'][i]
+    row = []
+    for symbol in _worker['columns']:
+        derivative = expr._diff(symbol)
+        check_node_budget(derivative, 'derivative w.r.t. %s' % symbol.name)
+        row.append(derivative)
+    return i, dumps(row, symbols=_worker['symbols'])
+
+
+def parallel_jacobian_expression(expressions, respect_to_lst, processes=None, chunksize=None):
+    """
+    build the Jacobian expression with its rows differentiated in worker processes
+    Args:
+        expressions: Expression lst
+        respect_to_lst: variable lst w.r.t for jacobian matrix
+        processes: number of worker processes, by default one per CPU
+        chunksize: number of rows per task, by default about four tasks per process
+
+    Returns:
+        Jacobian matrix, as a list of rows of materialized derivatives. Equal subexpressions
+        of all the entries, and of expressions, are one shared node
+
+    Examples:
+    >>> xs = symbols('x0:500')
+    >>> f = [sin(xs[i] * xs[i - 1]) ** 2 for i in range(500)]
+    >>> jacobian = parallel_jacobian_expression(f, list(xs), processes=4)
+    >>> jacobian[3][2].evaluate(np.ones(500))
+    0.9092974268256818
+    """
+    rows = [i for i, expr in enumerate(expressions) if isinstance(expr, Expression)]
+    roots = [expressions[i] for i in rows]
+    # Fixed symbol slots: the columns first, so they are known by slot in the workers.
+    frozen = Tape.from_expressions(roots, respect_to_lst)
+    slot = {id(symbol): i for i, symbol in enumerate(frozen.symbols)}
+    columns = [slot[id(symbol)] for symbol in respect_to_lst]
+    result = [[0 for _ in respect_to_lst] for _ in expressions]
+    interner = Interner()
+    interner(roots)
+    processes = processes or os.cpu_count() or 1
+    chunksize = chunksize or max(1, math.ceil(len(roots) / (4 * processes)))
+    with Pool(processes, initializer=_attach_model,
+              initargs=(frozen.tobytes(), columns)) as pool:
+        for i, data in pool.imap_unordered(_differentiate_row, range(len(roots)), chunksize):
+            result[rows[i]] = interner(loads(data, symbols=frozen.symbols))
+    return result
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import numpy as np
+
+from .expression import Expression, Constant, SymbolVector
+from .sharing import Interner
+from .tape import Tape
+
+# Joint evaluation of many outputs.
+#
+# An EvaluationPlan merges every cell of one or several blocks (e.g. the values
+# of a model and its Jacobian) into a single DAG, freezes it into a Tape, and
+# writes each evaluation straight into one preallocated NumPy buffer. A node
+# shared by several cells, or by a value and its derivatives, is computed once
+# per evaluation, and no nested Python list is built on the way.
+
+
+def _flatten(block, cells):
+    """
+    append the cells of a (nested) list block to cells, returns the shape of block
+    """
+    if not isinstance(block, (list, tuple, SymbolVector)):
+        cells.append(block if isinstance(block, Expression) else Constant(block))
+        return ()
+    shapes = set(_flatten(item, cells) for item in block)
+    if len(shapes) > 1:
+        raise ValueError('ragged block, rows of shapes %s' % sorted(shapes))
+    return (len(block),) + (shapes.pop() if shapes else ())
+
+
+def _batch_shape(inputs):
+    """
+    the broadcast shape of the symbol values; np.broadcast_shapes needs NumPy 1.20, and
+    np.broadcast takes at most 32 arguments, so the shape is accumulated pairwise
+    """
+    shape = ()
+    for value in inputs:
+        if np.ndim(value):
+            shape = np.broadcast(np.broadcast_to(0., shape), value).shape
+    return shape
+
+
+class EvaluationPlan:
+    """
+    Creates a reusable plan evaluating blocks of Expressions in one pass.
+
+    Attributes
+    ==========
+    shapes : list of tuple, the shape of each block
+    tape : Tape, every cell of every block as one output, in row-major order
+    symbols : list of Symbol, the symbol slots of the tape
+
+    NOTES
+    =====
+    1. a block is an Expression, or a (nested) list of Expressions and numbers, e.g. a
+       Jacobian from get_jacobian_expression
+    2. values may hold a batch of points (arrays of one shape), the batch shape is then
+       appended to the shape of every block
+
+    Examples
+    ========
+    >>> x, y = symbols('x y')
+    >>> f = [x * y, sin(x)]
+    >>> plan = EvaluationPlan(f, get_jacobian_expression(f, [x, y]))
+    >>> value, jacobian = plan.evaluate({x: 0., y: 2.})
+    >>> jacobian
+    array([[2., 0.],
+           [1., 0.]])
+    """
+
+    def __init__(self, *blocks, symbols=None):
+        cells = []
+        self.shapes = [_flatten(block, cells) for block in blocks]
+        self._sizes = [int(np.prod(shape)) for shape in self.shapes]
+        # Structurally equal cells and subexpressions become one node of the tape.
+        self.tape = Tape.from_expressions(Interner()(cells), symbols)
+        self.symbols = self.tape.symbols
+
+    def __len__(self):
+        return len(self.tape.table.outputs)
+
+    def evaluate(self, values, out=None):
+        '''Evaluate every block at one point or a batch of points.
+
+        Parameters
+        ----------
+        values: dict of Symbol -> value, or a flat sequence / NumPy array indexed by Symbol.index,
+            as for Expression.evaluate; each value a scalar or an array of the batch shape
+        out: optional array (one block) or sequence of arrays (one per block) to write the result to
+
+        Returns
+        -------
+        out if given, else a float64 array for the block, or a list of one array per block
+        '''
+        inputs = [symbol._evaluate(values) for symbol in self.symbols]
+        batch = _batch_shape(inputs)
+        single = len(self.shapes) == 1
+        if single and isinstance(out, np.ndarray) and out.flags.c_contiguous \
+                and out.dtype == np.float64 and out.shape == self.shapes[0] + batch:
+            # The tape writes into the caller's array directly.
+            self.tape.evaluate(inputs, out=out.reshape((len(self),) + batch))
+            return out
+        buffer = self.tape.evaluate(inputs, out=np.empty((len(self),) + batch))
+        result = []
+        start = 0
+        for shape, size in zip(self.shapes, self._sizes):
+            result.append(buffer[start:start + size].reshape(shape + batch))
+            start += size
+        if out is None:
+            return result[0] if single else result
+        for target, block in zip([out] if single else out, result):
+            np.copyto(target, block)
+        return out
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import contextlib
+import warnings
+
+from .expression import Expression
+from .graph import postorder
+from .rewrite import cost
+
+# Size and blowup introspection of Expression graphs, and an optional node budget.
+#
+# Symbolic derivatives can grow much faster than the expression they come from.
+# profile() and diff_profile() report how big a graph is and how each diff step
+# grows it; a node budget makes diff() fail fast (or warn) instead of running a
+# worker out of memory.
+
+
+class NodeBudgetExceeded(RuntimeError):
+    """
+    Raised when a derivative has more distinct nodes than the configured node budget.
+    """
+
+
+_budget = {'max_nodes': None, 'action': 'raise'}
+
+
+def set_node_budget(max_nodes, action='raise'):
+    """
+    set the node budget checked after each symbolic differentiation step
+    Args:
+        max_nodes: int, the largest allowed number of distinct nodes, None to disable
+        action: 'raise' to raise NodeBudgetExceeded, 'warn' to emit a RuntimeWarning
+
+    Returns:
+        None
+    """
+    if action not in ('raise', 'warn'):
+        raise ValueError("action must be 'raise' or 'warn', got %r" % (action,))
+    _budget['max_nodes'] = max_nodes
+    _budget['action'] = action
+
+
+@contextlib.contextmanager
+def node_budget(max_nodes, action='raise'):
+    """
+    context manager setting the node budget for the duration of a block
+    Args:
+        max_nodes: int, the largest allowed number of distinct nodes
+        action: 'raise' or 'warn'
+
+    Examples:
+    >>> x = Symbol('x')
+    >>> with node_budget(10):
+    ...     diff(sin(x) ** x, x, x, lazy=False)
+    Traceback (most recent call last):
+    ...
+    NodeBudgetExceeded: derivative w.r.t. x has 13 distinct nodes, over the budget of 10
+    """
+    previous = dict(_budget)
+    set_node_budget(max_nodes, action)
+    try:
+        yield
+    finally:
+        _budget.update(previous)
+
+
+def check_node_budget(expr, context=''):
+    """
+    check expr against the node budget, if one is set
+    Args:
+        expr: Expression or list of Expression
+        context: str, describes where expr comes from in the error message
+
+    Returns:
+        None
+    """
+    max_nodes = _budget['max_nodes']
+    if max_nodes is None or not isinstance(expr, (Expression, list)):
+        return
+    nodes = len(postorder(expr))
+    if nodes <= max_nodes:
+        return
+    message = '%s has %d distinct nodes, over the budget of %d' % (context or 'expression', nodes, max_nodes)
+    if _budget['action'] == 'warn':
+        warnings.warn(message, RuntimeWarning, stacklevel=3)
+    else:
+        raise NodeBudgetExceeded(message)
+
+
+def profile(expressions):
+    """
+    report the size of one or more expressions
+    Args:
+        expressions: Expression or list of Expression
+
+    Returns:
+        dict with
+            nodes: int, the number of nodes as a tree, shared subexpressions counted each time
+            unique_nodes: int, the number of distinct nodes of the DAG
+            depth: int, the longest path from an output to a leaf
+            operators: dict of class name -> number of distinct nodes of that class
+            flops: int, the estimated cost of one evaluation, see rewrite.cost
+
+    Examples:
+    >>> x = Symbol('x')
+    >>> s = sin(x)
+    >>> profile(s * s)
+    {'nodes': 5, 'unique_nodes': 3, 'depth': 3, 'operators': {'Symbol': 1, 'SinExpression': 1, 'ProductExpression': 1}, 'flops': 21}
+    """
+    roots = [expressions] if isinstance(expressions, Expression) else list(expressions)
+    order = postorder(roots)
+    operators = {}
+    for node in order:
+        name = type(node).__name__
+        operators[name] = operators.get(name, 0) + 1
+    return {
+        'nodes': sum(root.size for root in roots),
+        'unique_nodes': len(order),
+        'depth': max((root.depth for root in roots), default=0),
+        'operators': operators,
+        'flops': cost(roots)[0],
+    }
+
+
+def diff_profile(expr, *args):
+    """
+    differentiate step by step and report how each step grows the expression
+    Args:
+        expr: Expression
+        *args: variable symbols, as for diff
+
+    Returns:
+        list of dicts, the profile of expr then of each derivative, with the extra keys
+            symbol: the Symbol of that step (None for expr itself)
+            growth: unique_nodes of the step over unique_nodes of the previous one
+
+    Examples:
+    >>> x = Symbol('x')
+    >>> [round(step['growth'], 2) for step in diff_profile(sin(x) ** x, x, x)]
+    [1.0, 4.33, 4.31]
+    """
+    steps = []
+    previous = None
+    for symbol in (None,) + args:
+        if symbol is not None:
+            expr = expr._diff(symbol)
+        step = profile(expr)
+        step['symbol'] = symbol
+        step['growth'] = 1.0 if previous is None else step['unique_nodes'] / previous
+        previous = step['unique_nodes']
+        steps.append(step)
+    return steps
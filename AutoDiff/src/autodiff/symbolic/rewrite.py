@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import math
+
+from .expression import (Expression, Constant, SumExpression, ProductExpression, DivisionExpression, LnExpression,
+                         PowerExpression, SinExpression, CosExpression, TanExpression, ArcsinExpression,
+                         ArccosExpression, ArctanExpression, SinhExpression, CoshExpression, TanhExpression,
+                         ExpExpression, IntPowExpression, NegExpression, RecipExpression, SqrtExpression)
+from .graph import postorder
+from .sharing import structural_key
+
+# Rule based simplification of Expression graphs.
+#
+# A rule is a function taking one node, whose children are already simplified,
+# and returning an equivalent cheaper Expression, or None if it does not apply.
+# Rules are registered per node class in RULES. simplify() rewrites the graph
+# bottom-up, merging structurally equal nodes, until no rule fires or the pass
+# budget runs out, and returns the cheapest graph seen under the cost model.
+#
+# The identities assume the expression is defined at the point of evaluation:
+# x / x is rewritten to 1 and 0 * x to 0.
+
+RULES = {}
+
+# Estimated flops of one node, by class; Sum and Product cost one per extra operand.
+OP_COSTS = {
+    SumExpression: 1,
+    ProductExpression: 1,
+    DivisionExpression: 4,
+    LnExpression: 20,
+    PowerExpression: 40,
+    SinExpression: 20,
+    CosExpression: 20,
+    TanExpression: 25,
+    ArcsinExpression: 25,
+    ArccosExpression: 25,
+    ArctanExpression: 25,
+    SinhExpression: 25,
+    CoshExpression: 25,
+    TanhExpression: 25,
+    ExpExpression: 20,
+    IntPowExpression: 3,
+    NegExpression: 1,
+    RecipExpression: 4,
+    SqrtExpression: 8,
+}
+
+
+def rule(*classes):
+    """
+    decorator registering a rewrite rule for nodes of the given classes
+    Args:
+        *classes: Expression subclasses the rule applies to
+
+    Returns:
+        the decorator, which returns the rule unchanged
+
+    Examples:
+    >>> @rule(SinExpression)
+    ... def sin_arcsin(node):
+    ...     if isinstance(node.x, ArcsinExpression):
+    ...         return node.x.x
+    """
+    def register(fn):
+        for cls in classes:
+            RULES.setdefault(cls, []).append(fn)
+        return fn
+    return register
+
+
+def cost(expressions):
+    """
+    estimate the cost of evaluating expressions, each shared node counted once
+    Args:
+        expressions: Expression or list of Expression
+
+    Returns:
+        (flops, nodes): the estimated floating point operations and the number of distinct nodes
+    """
+    flops = 0
+    nodes = postorder(expressions)
+    for node in nodes:
+        if isinstance(node, (SumExpression, ProductExpression)):
+            flops += len(node.operands) - 1
+        else:
+            flops += OP_COSTS.get(type(node), 0)
+    return flops, len(nodes)
+
+
+def _is_constant(node, value):
+    return isinstance(node, Constant) and node.value == value
+
+
+def _factors(node):
+    return list(node.operands) if isinstance(node, ProductExpression) else [node]
+
+
+def _product(factors):
+    if not factors:
+        return Constant(1)
+    if len(factors) == 1:
+        return factors[0]
+    return ProductExpression(factors)
+
+
+@rule(*OP_COSTS)
+def fold_constants(node):
+    if node.mask:
+        return None
+    try:
+        return Constant(node._apply([child.evaluate({}) for child in node.children]))
+    except (ArithmeticError, ValueError):
+        # e.g. 1 / 0 or ln(-1), left for evaluation to report
+        return None
+
+
+@rule(SumExpression)
+def sum_identities(node):
+    # x + (y + z) -> x + y + z, constants summed into one, + 0 dropped
+    operands = []
+    constants = []
+    for op in node.operands:
+        for term in (op.operands if isinstance(op, SumExpression) else [op]):
+            (constants if isinstance(term, Constant) else operands).append(term)
+    total = sum(c.value for c in constants)
+    if total != 0 or not operands:
+        operands.append(constants[0] if len(constants) == 1 else Constant(total))
+    if len(operands) == len(node.operands) and all(a is b for a, b in zip(operands, node.operands)):
+        return None
+    return operands[0] if len(operands) == 1 else SumExpression(operands)
+
+
+@rule(ProductExpression)
+def product_identities(node):
+    # x * (y * z) -> x * y * z, constants multiplied into one, * 1 dropped, * 0 -> 0,
+    # x * x ** -1 -> 1, x * (1 / x) -> 1
+    operands = []
+    constants = []
+    for op in node.operands:
+        for factor in _factors(op):
+            (constants if isinstance(factor, Constant) else operands).append(factor)
+    value = 1
+    for c in constants:
+        value = value * c.value
+    if value == 0:
+        return Constant(0)
+    for i, op in enumerate(operands):
+        if isinstance(op, (PowerExpression, IntPowExpression)) and _is_constant(op.exponent, -1) \
+                or isinstance(op, RecipExpression):
+            inverted = op.x if isinstance(op, RecipExpression) else op.base
+            for j, other in enumerate(operands):
+                if other is inverted:
+                    operands = [o for k, o in enumerate(operands) if k != i and k != j]
+                    return _product(([Constant(value)] if value != 1 else []) + operands)
+    if value != 1 or not operands:
+        operands.insert(0, constants[0] if len(constants) == 1 else Constant(value))
+    if len(operands) == len(node.operands) and all(a is b for a, b in zip(operands, node.operands)):
+        return None
+    return _product(operands)
+
+
+@rule(DivisionExpression)
+def division_identities(node):
+    # 0 / x -> 0, x / 1 -> x, x / x -> 1, (a * b) / (b * b) -> a / b
+    if _is_constant(node.num, 0):
+        return Constant(0)
+    if _is_constant(node.denom, 1):
+        return node.num
+    if node.num is node.denom:
+        return Constant(1)
+    num = _factors(node.num)
+    denom = _factors(node.denom)
+    cancelled = False
+    for factor in list(num):
+        for j, other in enumerate(denom):
+            if other is factor:
+                num.remove(factor)
+                del denom[j]
+                cancelled = True
+                break
+    if not cancelled:
+        return None
+    if not denom:
+        return _product(num)
+    return DivisionExpression(_product(num), _product(denom))
+
+
+@rule(PowerExpression)
+def power_identities(node):
+    # x ** 1 -> x, x ** 0 -> 1, 1 ** x -> 1, exp(ln(x)) -> x, (x ** a) ** n -> x ** (a * n) for integer n
+    base, exponent = node.base, node.exponent
+    if _is_constant(exponent, 1):
+        return base
+    if _is_constant(exponent, 0) or _is_constant(base, 1):
+        return Constant(1)
+    if _is_constant(base, math.e) and isinstance(exponent, LnExpression):
+        return exponent.x
+    if (isinstance(base, PowerExpression) and isinstance(base.exponent, Constant)
+            and isinstance(exponent, Constant) and float(exponent.value).is_integer()):
+        return PowerExpression(base=base.base, exponent=Constant(base.exponent.value * exponent.value))
+    return None
+
+
+@rule(IntPowExpression)
+def int_power_identities(node):
+    # x ** 1 -> x, x ** 0 -> 1, (x ** a) ** b -> x ** (a * b)
+    n = node.exponent.value
+    if n == 1:
+        return node.base
+    if n == 0:
+        return Constant(1)
+    if isinstance(node.base, IntPowExpression):
+        return IntPowExpression(node.base.base, node.base.exponent.value * n)
+    return None
+
+
+@rule(LnExpression)
+def ln_identities(node):
+    # ln(exp(x)) -> x
+    if isinstance(node.x, ExpExpression):
+        return node.x.x
+    if isinstance(node.x, PowerExpression) and _is_constant(node.x.base, math.e):
+        return node.x.exponent
+    return None
+
+
+@rule(ExpExpression)
+def exp_identities(node):
+    # exp(ln(x)) -> x
+    if isinstance(node.x, LnExpression):
+        return node.x.x
+    return None
+
+
+@rule(NegExpression, RecipExpression)
+def involution(node):
+    # -(-x) -> x, 1 / (1 / x) -> x
+    if type(node.x) is type(node):
+        return node.x.x
+    return None
+
+
+def _rewrite_pass(roots, rules, max_rewrites):
+    """
+    one bottom-up pass over the DAG of roots; returns the new roots and the number of rewrites
+    """
+    table = {}
+    new = {}
+    fired = 0
+    for node in postorder(roots):
+        result = node
+        children = node.children
+        if children:
+            args = [new[id(child)] for child in children]
+            if any(a is not c for a, c in zip(args, children)):
+                result = node._from_children(args)
+        for _ in range(max_rewrites):
+            for fn in rules.get(type(result), ()):
+                rewritten = fn(result)
+                if rewritten is not None:
+                    result = rewritten
+                    fired += 1
+                    break
+            else:
+                break
+        new[id(node)] = table.setdefault(structural_key(result), result)
+    return [new[id(root)] for root in roots], fired
+
+
+def simplify(expressions, rules=None, max_passes=16, max_rewrites=8):
+    """
+    rewrite expressions into the cheapest equivalent graph found
+    Args:
+        expressions: Expression or list of Expression (other items are returned unchanged)
+        rules: dict of node class -> list of rules, defaults to RULES
+        max_passes: budget of bottom-up passes over the whole graph
+        max_rewrites: budget of rewrites of one node within a pass
+
+    Returns:
+        the simplified Expression, or list of them. Equal subexpressions of all the
+        outputs are merged into one shared node.
+
+    Examples:
+    >>> x = Symbol('x')
+    >>> print(simplify(diff(x ** 3, x, lazy=False)))
+    (3)*((x)^(2))
+    >>> print(simplify(exp(log(x)) * x ** -1))
+    1
+    """
+    rules = RULES if rules is None else rules
+    single = isinstance(expressions, Expression)
+    items = [expressions] if single else list(expressions)
+    positions = [i for i, item in enumerate(items) if isinstance(item, Expression)]
+    roots = [items[i] for i in positions]
+    best, best_cost = roots, cost(roots)
+    for _ in range(max_passes):
+        roots, fired = _rewrite_pass(roots, rules, max_rewrites)
+        roots_cost = cost(roots)
+        if roots_cost <= best_cost:
+            best, best_cost = roots, roots_cost
+        if not fired:
+            break
+    for i, root in zip(positions, best):
+        items[i] = root
+    return items[0] if single else items
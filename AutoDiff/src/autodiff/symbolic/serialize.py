@@ -0,0 +1,333 @@
+from __future__ import annotations
+
+import mmap
+import struct
+
+import numpy as np
+
+from .expression import (Expression, Constant, Symbol, SumExpression, ProductExpression, DivisionExpression,
+                         LnExpression, PowerExpression, SinExpression, CosExpression, TanExpression,
+                         ArcsinExpression, ArccosExpression, ArctanExpression, SinhExpression, CoshExpression,
+                         TanhExpression, LazyDerivative, ExpExpression, IntPowExpression, NegExpression,
+                         RecipExpression, SqrtExpression)
+from .graph import postorder
+
+# Compact binary format for Expression DAGs.
+#
+# A graph is stored as a flat node table in topological order (children always
+# come before their parents), so that both writing and reading are a single
+# linear pass and a node shared by several parents is stored only once:
+#
+#   opcodes   uint8[n]      node class, see NODE_CLASSES
+#   args      int64[n]      Symbol: slot in the symbol table, float Constant: index
+#                           into consts, int Constant: the value itself, else -1
+#   child_ptr int64[n + 1]  children of node i are child_idx[child_ptr[i]:child_ptr[i + 1]]
+#   child_idx int64[m]      node indices of the children
+#   consts    float64[k]    float constant pool
+#   name_ptr  int64[s + 1]  symbol names are names[name_ptr[j]:name_ptr[j + 1]] (utf-8)
+#   names     bytes
+#   outputs   int64[r]      node indices of the serialised roots
+#
+# Each section starts on an 8-byte boundary, so a file can be memory-mapped and
+# every array read in place with numpy.frombuffer.
+
+MAGIC = b'ADXGRAPH'
+VERSION = 1
+
+_HEADER = struct.Struct('<8sIIQQQQQQ')
+_SINGLE_OUTPUT = 1
+
+_OP_FLOAT_CONSTANT = 0
+_OP_INT_CONSTANT = 1
+_OP_SYMBOL = 2
+
+# Position in this list is the on-disk opcode: only ever append to it.
+NODE_CLASSES = [Constant, Constant, Symbol, SumExpression, ProductExpression, DivisionExpression, LnExpression,
+                PowerExpression, SinExpression, CosExpression, TanExpression, ArcsinExpression, ArccosExpression,
+                ArctanExpression, SinhExpression, CoshExpression, TanhExpression, LazyDerivative,
+                ExpExpression, IntPowExpression, NegExpression, RecipExpression, SqrtExpression]
+_OPCODES = {cls: op for op, cls in enumerate(NODE_CLASSES) if op > _OP_INT_CONSTANT}
+
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+class GraphTable:
+    """
+    Creates a flat, array based table of one or more Expression DAGs.
+
+    Attributes
+    ==========
+    opcodes, args, child_ptr, child_idx, consts, outputs : numpy arrays as described in the module comment
+    names : list of str, the symbol table, one entry per symbol slot
+    single : bool, whether the table was built from a single Expression rather than a list
+    """
+
+    def __init__(self, opcodes, args, child_ptr, child_idx, consts, names, outputs, single=False):
+        self.opcodes = opcodes
+        self.args = args
+        self.child_ptr = child_ptr
+        self.child_idx = child_idx
+        self.consts = consts
+        self.names = names
+        self.outputs = outputs
+        self.single = single
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    @classmethod
+    def from_expressions(cls, expressions, symbols=None):
+        """ Flatten Expression(s) into a table, in linear time
+
+        Parameters
+        ----------
+        expressions: Expression or list of Expression
+        symbols: optional sequence of Symbol fixing the order of the first symbol slots,
+            symbols not in it are appended in the order they are first met
+
+        Returns
+        -------
+        a GraphTable
+
+        Examples
+        --------
+        >>> x, y = symbols('x y')
+        >>> table = GraphTable.from_expressions(x * y + x, symbols=[y, x])
+        >>> table.names
+        ['y', 'x']
+        """
+        single = isinstance(expressions, Expression)
+        roots = [expressions] if single else list(expressions)
+        for root in roots:
+            if not isinstance(root, Expression):
+                raise TypeError('can only serialise Expression objects, got %r' % (root,))
+        slots = {}
+        names = []
+        for symbol in symbols or ():
+            if id(symbol) not in slots:
+                slots[id(symbol)] = len(names)
+                names.append(symbol.name)
+
+        order = postorder(roots)
+        index = {}
+        opcodes = []
+        args = []
+        child_ptr = [0]
+        child_idx = []
+        consts = []
+        for i, node in enumerate(order):
+            index[id(node)] = i
+            node_cls = type(node)
+            if node_cls is Constant:
+                value = node.value
+                if isinstance(value, (int, np.integer)) and not isinstance(value, bool) \
+                        and _INT64_MIN <= value <= _INT64_MAX:
+                    opcodes.append(_OP_INT_CONSTANT)
+                    args.append(int(value))
+                else:
+                    opcodes.append(_OP_FLOAT_CONSTANT)
+                    args.append(len(consts))
+                    consts.append(float(value))
+            elif node_cls is Symbol:
+                if id(node) not in slots:
+                    slots[id(node)] = len(names)
+                    names.append(node.name)
+                opcodes.append(_OP_SYMBOL)
+                args.append(slots[id(node)])
+            else:
+                if node_cls not in _OPCODES:
+                    raise TypeError('no opcode registered for %s' % node_cls.__name__)
+                opcodes.append(_OPCODES[node_cls])
+                args.append(-1)
+                child_idx.extend(index[id(child)] for child in node.children)
+            child_ptr.append(len(child_idx))
+
+        return cls(np.array(opcodes, dtype=np.uint8), np.array(args, dtype=np.int64),
+                   np.array(child_ptr, dtype=np.int64), np.array(child_idx, dtype=np.int64),
+                   np.array(consts, dtype=np.float64), names,
+                   np.array([index[id(root)] for root in roots], dtype=np.int64), single)
+
+    def to_expressions(self, symbols=None):
+        """ Rebuild the Expression objects of the table, in linear time
+
+        Parameters
+        ----------
+        symbols: None, dict or sequence
+            None: a new Symbol is created for every slot
+            dict: maps symbol name to the Symbol to use, missing names get a new Symbol
+            sequence: Symbols for the first slots, in slot order
+
+        Returns
+        -------
+        an Expression if the table was built from one, else a list of Expression
+        """
+        slot_symbols = []
+        for slot, name in enumerate(self.names):
+            if isinstance(symbols, dict):
+                symbol = symbols.get(name)
+            elif symbols is not None and slot < len(symbols):
+                symbol = symbols[slot]
+            else:
+                symbol = None
+            slot_symbols.append(symbol if symbol is not None else Symbol(name))
+
+        opcodes = self.opcodes.tolist()
+        args = self.args.tolist()
+        child_ptr = self.child_ptr.tolist()
+        child_idx = self.child_idx.tolist()
+        consts = self.consts.tolist()
+        nodes = []
+        for i, op in enumerate(opcodes):
+            if op == _OP_FLOAT_CONSTANT:
+                nodes.append(Constant(consts[args[i]]))
+            elif op == _OP_INT_CONSTANT:
+                nodes.append(Constant(args[i]))
+            elif op == _OP_SYMBOL:
+                nodes.append(slot_symbols[args[i]])
+            else:
+                children = [nodes[j] for j in child_idx[child_ptr[i]:child_ptr[i + 1]]]
+                nodes.append(NODE_CLASSES[op]._from_children(children))
+        roots = [nodes[i] for i in self.outputs.tolist()]
+        return roots[0] if self.single else roots
+
+    def tobytes(self):
+        """ Encode the table in the binary format described in the module comment
+
+        Returns
+        -------
+        bytes
+        """
+        names = [name.encode('utf-8') for name in self.names]
+        name_ptr = np.cumsum([0] + [len(name) for name in names], dtype=np.int64)
+        header = _HEADER.pack(MAGIC, VERSION, _SINGLE_OUTPUT if self.single else 0, len(self.opcodes),
+                              len(self.child_idx), len(self.consts), len(names), int(name_ptr[-1]),
+                              len(self.outputs))
+        chunks = [header]
+        for section in (self.opcodes, self.args, self.child_ptr, self.child_idx, self.consts, name_ptr,
+                        b''.join(names), self.outputs):
+            data = section if isinstance(section, bytes) else np.ascontiguousarray(section).tobytes()
+            chunks.append(data)
+            chunks.append(b'\0' * (-len(data) % 8))
+        return b''.join(chunks)
+
+    @classmethod
+    def frombuffer(cls, buffer):
+        """ Decode a table from a bytes-like object or mmap, without copying the arrays
+
+        Parameters
+        ----------
+        buffer: bytes, bytearray, memoryview or mmap holding the binary format
+
+        Returns
+        -------
+        a GraphTable whose arrays are read-only views into buffer
+        """
+        if len(buffer) < _HEADER.size:
+            raise ValueError('buffer too short for an expression graph')
+        magic, version, flags, n_nodes, n_children, n_consts, n_names, names_nbytes, n_outputs = \
+            _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError('not a serialised expression graph')
+        if version != VERSION:
+            raise ValueError('unsupported expression graph format version %d' % version)
+
+        offset = _HEADER.size
+        sections = []
+        for dtype, count in ((np.uint8, n_nodes), (np.int64, n_nodes), (np.int64, n_nodes + 1),
+                             (np.int64, n_children), (np.float64, n_consts), (np.int64, n_names + 1),
+                             (np.uint8, names_nbytes), (np.int64, n_outputs)):
+            sections.append(np.frombuffer(buffer, dtype=dtype, count=count, offset=offset))
+            nbytes = count * np.dtype(dtype).itemsize
+            offset += nbytes + (-nbytes % 8)
+        opcodes, args, child_ptr, child_idx, consts, name_ptr, names, outputs = sections
+
+        names = names.tobytes()
+        name_ptr = name_ptr.tolist()
+        names = [names[name_ptr[j]:name_ptr[j + 1]].decode('utf-8') for j in range(n_names)]
+        return cls(opcodes, args, child_ptr, child_idx, consts, names, outputs, bool(flags & _SINGLE_OUTPUT))
+
+
+def dumps(expressions, symbols=None) -> bytes:
+    """
+    serialise Expression(s) to bytes, sharing preserved
+    Args:
+        expressions: Expression or list of Expression
+        symbols: optional sequence of Symbol, fixes the order of the symbol slots
+
+    Returns:
+        bytes
+
+    Examples:
+    >>> x = Symbol('x')
+    >>> f = loads(dumps(sin(x) ** 2))
+    >>> str(f)
+    '(sin(x))^(2)'
+    """
+    return GraphTable.from_expressions(expressions, symbols).tobytes()
+
+
+def loads(data, symbols=None):
+    """
+    rebuild Expression(s) from bytes made by dumps
+    Args:
+        data: bytes-like object
+        symbols: None, dict of name -> Symbol, or sequence of Symbol in slot order,
+            see GraphTable.to_expressions
+
+    Returns:
+        an Expression, or a list of Expression if a list was serialised
+    """
+    return GraphTable.frombuffer(data).to_expressions(symbols)
+
+
+def dump(expressions, path, symbols=None):
+    """
+    serialise Expression(s) into a file
+    Args:
+        expressions: Expression or list of Expression
+        path: file name
+        symbols: optional sequence of Symbol, fixes the order of the symbol slots
+
+    Examples:
+    >>> x, y = symbols('x y')
+    >>> dump([diff(x * y, x), diff(x * y, y)], 'jacobian.adx')
+    """
+    with open(path, 'wb') as f:
+        f.write(dumps(expressions, symbols))
+
+
+def load(path, symbols=None, mmap_mode=False):
+    """
+    rebuild Expression(s) from a file made by dump
+    Args:
+        path: file name
+        symbols: None, dict of name -> Symbol, or sequence of Symbol in slot order
+        mmap_mode: memory-map the file instead of reading it into memory
+
+    Returns:
+        an Expression, or a list of Expression if a list was serialised
+
+    Examples:
+    >>> x, y = symbols('x y')
+    >>> dx, dy = load('jacobian.adx', symbols={'x': x, 'y': y}, mmap_mode=True)
+    >>> dx.evaluate({x: 1, y: 2})
+    2
+    """
+    return load_table(path, mmap_mode).to_expressions(symbols)
+
+
+def load_table(path, mmap_mode=False):
+    """
+    read the GraphTable of a file made by dump, without building Expression objects
+    Args:
+        path: file name
+        mmap_mode: memory-map the file, the arrays of the table are then views into the mapping
+
+    Returns:
+        a GraphTable
+    """
+    with open(path, 'rb') as f:
+        if not mmap_mode:
+            return GraphTable.frombuffer(f.read())
+        # The mapping stays alive for as long as the arrays viewing it.
+        return GraphTable.frombuffer(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
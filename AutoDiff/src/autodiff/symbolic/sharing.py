@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from .expression import Expression, Constant, Symbol
+from .graph import postorder
+
+# Common subexpression elimination.
+#
+# Interner hash-conses Expression DAGs: structurally equal nodes, built
+# independently (diff creates a new cos(x) every time it differentiates sin(x)),
+# are replaced by one canonical node. cse() then turns every node used more
+# than once into a temporary, so a shared term is computed and printed once.
+
+
+def structural_key(node):
+    """
+    hashable key of a node, equal for structurally equal nodes whose children are already canonical
+    Args:
+        node: Expression
+
+    Returns:
+        tuple: the value of a Constant, the identity of a Symbol, otherwise the class
+        and the identities of the children
+    """
+    if isinstance(node, Constant):
+        return (Constant, type(node.value), node.value)
+    children = node.children
+    if not children:
+        return (id(node),)
+    return (type(node),) + tuple(id(child) for child in children)
+
+
+class Interner:
+    """
+    Creates a hash-consing table of Expression nodes.
+
+    Attributes
+    ==========
+    table : dict of structural key -> canonical Expression, kept between calls, so
+            expressions interned separately still share their equal subexpressions
+
+    Examples
+    ========
+    >>> x = Symbol('x')
+    >>> interner = Interner()
+    >>> a, b = interner([sin(x) + 1, sin(x) * 2])
+    >>> a.operands[0] is b.operands[0]
+    True
+    """
+
+    def __init__(self):
+        self.table = {}
+
+    def __len__(self):
+        return len(self.table)
+
+    def __call__(self, expressions):
+        """ Returns the canonical version of expressions, in linear time
+
+        Parameters
+        ----------
+        expressions: Expression or list of Expression
+
+        Returns
+        -------
+        Expression or list of Expression, as given
+        """
+        single = isinstance(expressions, Expression)
+        roots = [expressions] if single else list(expressions)
+        canonical = {}
+        for node in postorder(roots):
+            result = node
+            children = node.children
+            if children:
+                args = [canonical[id(child)] for child in children]
+                if any(a is not c for a, c in zip(args, children)):
+                    result = node._from_children(args)
+            canonical[id(node)] = self.table.setdefault(structural_key(result), result)
+        result = [canonical[id(root)] for root in roots]
+        return result[0] if single else result
+
+
+def cse(expressions, prefix='_t'):
+    """
+    eliminate common subexpressions of one or many expressions
+    Args:
+        expressions: Expression or list of Expression
+        prefix: name prefix of the temporary symbols
+
+    Returns:
+        (bindings, reduced): bindings is a list of (Symbol, Expression) in evaluation order,
+        each expression only using the symbols of the model and earlier temporaries;
+        reduced are the outputs in terms of them, an Expression or list as given
+
+    Examples:
+    >>> x = Symbol('x')
+    >>> bindings, reduced = cse(diff(sin(x) * cos(x), x, lazy=False))
+    >>> [(str(t), str(e)) for t, e in bindings]
+    [('_t0', 'cos(x)'), ('_t1', 'sin(x)')]
+    >>> print(reduced)
+    (((1)*(_t0))*(_t0))+((_t1)*(((1)*(_t1))*(-1)))
+    """
+    single = isinstance(expressions, Expression)
+    roots = Interner()([expressions] if single else list(expressions))
+    order = postorder(roots)
+    uses = {}
+    for node in order:
+        for child in node.children:
+            uses[id(child)] = uses.get(id(child), 0) + 1
+    for root in roots:
+        uses[id(root)] = uses.get(id(root), 0) + 1
+
+    bindings = []
+    reduced = {}
+    for node in order:
+        children = node.children
+        if not children:
+            reduced[id(node)] = node
+            continue
+        args = [reduced[id(child)] for child in children]
+        result = node._from_children(args) if any(a is not c for a, c in zip(args, children)) else node
+        if uses[id(node)] > 1:
+            temporary = Symbol('%s%d' % (prefix, len(bindings)))
+            bindings.append((temporary, result))
+            result = temporary
+        reduced[id(node)] = result
+    outputs = [reduced[id(root)] for root in roots]
+    return bindings, outputs[0] if single else outputs
+
+
+def cse_str(expressions):
+    """
+    print expressions with each common subexpression printed once, as a temporary
+    Args:
+        expressions: Expression or list of Expression
+
+    Returns:
+        str, one 'temporary = expression' line per binding, then one line per output
+
+    Examples:
+    >>> x = Symbol('x')
+    >>> print(cse_str(sin(x) * sin(x)))
+    _t0 = sin(x)
+    (_t0)*(_t0)
+    """
+    bindings, reduced = cse(expressions)
+    outputs = [reduced] if isinstance(reduced, Expression) else reduced
+    return '\n'.join(['%s = %s' % binding for binding in bindings] + [str(i) for i in outputs])
+
+
+def evaluate_cse(bindings, reduced, values):
+    """
+    evaluate the result of cse(), each temporary once
+    Args:
+        bindings: list of (Symbol, Expression), as returned by cse
+        reduced: Expression or list of Expression, as returned by cse
+        values: dict of Symbol -> float
+
+    Returns:
+        float, or list of float for a list of outputs
+    """
+    values = dict(values)
+    for temporary, expr in bindings:
+        values[temporary] = expr.evaluate(values)
+    if isinstance(reduced, Expression):
+        return reduced.evaluate(values)
+    return [i.evaluate(values) for i in reduced]
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import numpy as np
+
+from .expression import Expression
+from .plan import EvaluationPlan
+
+# Sparsity aware Jacobian and Hessian builders.
+#
+# The free symbol bitset cached on every Expression node tells, without any
+# traversal, which entries of a Jacobian or Hessian are structurally zero, so
+# only the structurally non-zero entries are ever differentiated or evaluated.
+# The distinct entries are compiled once into an EvaluationPlan, so a
+# subexpression shared by several entries is computed once per point.
+
+
+def _bits(mask):
+    """
+    yield the positions of the set bits of mask, lowest first
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _columns(respect_to_lst):
+    """
+    map each symbol table slot of respect_to_lst to its column(s)
+    """
+    columns = {}
+    wrt_mask = 0
+    for j, symbol in enumerate(respect_to_lst):
+        slot = symbol.mask.bit_length() - 1
+        columns.setdefault(slot, []).append(j)
+        wrt_mask |= symbol.mask
+    return columns, wrt_mask
+
+
+class SparseMatrixExpression:
+    """
+    Creates a sparse matrix of Expressions, in CSR order.
+
+    Attributes
+    ==========
+    shape : (int, int)
+    indptr : int64 array, entries of row i are at positions indptr[i]:indptr[i + 1]
+    indices : int64 array, column of each entry
+    rows : int64 array, row of each entry (the COO form is (rows, indices))
+    entries : list of Expression, one per stored entry; symmetric entries of a Hessian
+              are the same object and are evaluated once
+
+    NOTES
+    =====
+    1. The pattern only depends on the expressions, so one SparseMatrixExpression
+       can be evaluated at any number of points.
+    2. The distinct entries are frozen into one EvaluationPlan on the first evaluation,
+       and the plan is reused by every later one.
+    """
+
+    def __init__(self, shape, indptr, indices, entries):
+        self.shape = shape
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.rows = np.repeat(np.arange(shape[0], dtype=np.int64), np.diff(self.indptr))
+        self.entries = entries
+        # Distinct entries, and for each stored entry its position among them.
+        position = {}
+        self._unique = []
+        slots = []
+        for entry in entries:
+            if id(entry) not in position:
+                position[id(entry)] = len(self._unique)
+                self._unique.append(entry)
+            slots.append(position[id(entry)])
+        self._slots = np.asarray(slots, dtype=np.int64)
+        self._plan = None
+
+    @property
+    def nnz(self):
+        return len(self.entries)
+
+    def evaluate(self, values, out=None):
+        """ Returns the values of the stored entries, in CSR order
+
+        Parameters
+        ----------
+        values: dict of Symbol -> float, or flat array for SymbolVector symbols, as for
+            EvaluationPlan.evaluate; arrays of one shape evaluate a batch of points
+        out: optional float array of length nnz (plus the batch shape) to write into
+
+        Returns
+        -------
+        float array of length nnz, plus the batch shape
+        """
+        if not self._unique:
+            unique = np.zeros(0)
+        else:
+            if self._plan is None:
+                self._plan = EvaluationPlan(self._unique)
+            unique = self._plan.evaluate(values)
+        if out is None:
+            return unique[self._slots]
+        np.take(unique, self._slots, axis=0, out=out)
+        return out
+
+    def toarray(self, values):
+        """ Returns the dense matrix of values at the given point
+
+        Parameters
+        ----------
+        values: dict of Symbol -> float, or flat array for SymbolVector symbols
+
+        Returns
+        -------
+        2-d float array of shape self.shape
+        """
+        dense = np.zeros(self.shape)
+        dense[self.rows, self.indices] = self.evaluate(values)
+        return dense
+
+    def to_scipy(self, values):
+        """ Returns a scipy.sparse.csr_matrix of values at the given point
+
+        Parameters
+        ----------
+        values: dict of Symbol -> float, or flat array for SymbolVector symbols
+
+        Returns
+        -------
+        scipy.sparse.csr_matrix, requires scipy
+        """
+        try:
+            from scipy.sparse import csr_matrix
+        except ImportError:
+            raise ImportError('to_scipy requires scipy, use evaluate() or toarray() instead') from None
+        return csr_matrix((self.evaluate(values), self.indices, self.indptr), shape=self.shape)
+
+
+def get_sparse_jacobian_expression(expressions, respect_to_lst):
+    """
+    get the structurally non-zero entries of the Jacobian
+    Args:
+        expressions: Expression lst
+        respect_to_lst: variable lst w.r.t for jacobian matrix
+
+    Returns:
+        SparseMatrixExpression of shape (len(expressions), len(respect_to_lst))
+
+    Examples:
+    >>> x, y, z = symbols('x y z')
+    >>> jac = get_sparse_jacobian_expression([x * y, z ** 2], [x, y, z])
+    >>> jac.nnz
+    3
+    >>> jac.toarray({x: 1, y: 2, z: 3})
+    array([[2., 1., 0.],
+           [0., 0., 6.]])
+    """
+    columns, wrt_mask = _columns(respect_to_lst)
+    indptr = [0]
+    indices = []
+    entries = []
+    for expr in expressions:
+        if isinstance(expr, Expression):
+            row = []
+            for slot in _bits(expr.mask & wrt_mask):
+                derivative = expr._diff(respect_to_lst[columns[slot][0]])
+                row.extend((j, derivative) for j in columns[slot])
+            row.sort(key=lambda entry: entry[0])
+            indices.extend(j for j, _ in row)
+            entries.extend(derivative for _, derivative in row)
+        indptr.append(len(entries))
+    return SparseMatrixExpression((len(expressions), len(respect_to_lst)), indptr, indices, entries)
+
+
+def get_sparse_hessian_expression(expr, respect_to_lst):
+    """
+    get the structurally non-zero entries of the Hessian, using its symmetry
+    Args:
+        expr: Expression
+        respect_to_lst: variable lst w.r.t for hessian matrix
+
+    Returns:
+        SparseMatrixExpression of shape (len(respect_to_lst), len(respect_to_lst)),
+        each off-diagonal pair is differentiated once and stored as one shared Expression
+
+    Examples:
+    >>> x, y, z = symbols('x y z')
+    >>> hess = get_sparse_hessian_expression(x ** 2 * y + z, [x, y, z])
+    >>> hess.nnz
+    4
+    >>> hess.entries[1] is hess.entries[2]
+    True
+    """
+    n = len(respect_to_lst)
+    if not isinstance(expr, Expression):
+        return SparseMatrixExpression((n, n), [0] * (n + 1), [], [])
+    columns, wrt_mask = _columns(respect_to_lst)
+    gradient = {}
+    for slot in _bits(expr.mask & wrt_mask):
+        gradient[slot] = expr._diff(respect_to_lst[columns[slot][0]])
+
+    # Lower triangle over symbol slots, mirrored into both halves.
+    rows = [[] for _ in range(n)]
+    for slot, g in gradient.items():
+        for other in _bits(g.mask & wrt_mask):
+            if other > slot:
+                continue
+            second = g._diff(respect_to_lst[columns[other][0]])
+            for i in columns[slot]:
+                for j in columns[other]:
+                    rows[i].append((j, second))
+                    if slot != other:
+                        rows[j].append((i, second))
+
+    indptr = [0]
+    indices = []
+    entries = []
+    for row in rows:
+        row.sort(key=lambda entry: entry[0])
+        indices.extend(j for j, _ in row)
+        entries.extend(second for _, second in row)
+        indptr.append(len(entries))
+    return SparseMatrixExpression((n, n), indptr, indices, entries)
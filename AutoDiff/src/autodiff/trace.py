@@ -0,0 +1,295 @@
+# record once, replay many
+#
+# Reverse mode rebuilds its trace by calling the function again at every new
+# point. A Trace records the function once with Node inputs: while it records,
+# every Node operation (the dunder methods of Node and the elementary functions)
+# is mirrored on symbolic Expressions, and every comparison of Nodes is kept as
+# a guard. The outputs and their reverse mode adjoints are frozen into one
+# EvaluationPlan, a compact array tape that is replayed, forward and backward,
+# without calling the function again. The operands of the guards have a small
+# plan of their own, checked first: when a guard no longer holds at a new point
+# the control flow may differ, so the branch is not replayed and the function is
+# recorded again for that branch.
+#
+# The recording hooks are only installed for the time of a recording: Node
+# operators are then wrapped, and the Node branch of each elementary function
+# reports to Node._recorder. Outside of a recording nothing is wrapped.
+import contextlib
+import functools
+import numbers
+import operator
+
+import numpy as np
+
+from autodiff.symbolic import Constant, Expression, Symbol, SumExpression, EvaluationPlan, gradient
+
+# The operators of Node mirrored while a Trace records, and its comparisons recorded as guards.
+_RECORDED = ('__pos__', '__neg__', '__add__', '__radd__', '__sub__', '__rsub__', '__mul__', '__rmul__',
+             '__truediv__', '__rtruediv__', '__pow__', '__rpow__')
+_GUARDED = ('__eq__', '__ne__', '__lt__', '__le__', '__gt__', '__ge__')
+
+
+def _recorded(fn):
+    """
+    wrap a dunder method of Node so that it is mirrored on Expressions
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        result = fn(*args, **kwargs)
+        recorder = type(args[0])._recorder
+        if recorder is not None:
+            recorder.record(result, fn, args, kwargs)
+        return result
+    return wrapper
+
+
+def _guarded(fn):
+    """
+    wrap a comparison method of Node so that its outcome is recorded as a guard
+    """
+    compare = getattr(operator, fn.__name__.strip('_'))
+
+    @functools.wraps(fn)
+    def wrapper(self, other):
+        outcome = fn(self, other)
+        recorder = type(self)._recorder
+        if recorder is not None:
+            recorder.guard(compare, self, other, outcome)
+        return outcome
+    return wrapper
+
+
+@contextlib.contextmanager
+def _recording(node_class, recorder):
+    """
+    install recorder, and the wrapped methods of node_class for the time of one recording
+    """
+    previous = node_class._recorder
+    originals = {}
+    if previous is None:
+        # Outside of a recording Node runs its own methods, without any wrapper.
+        for name in _RECORDED + _GUARDED:
+            originals[name] = node_class.__dict__[name]
+            setattr(node_class, name, (_recorded if name in _RECORDED else _guarded)(originals[name]))
+    node_class._recorder = recorder
+    try:
+        yield
+    finally:
+        node_class._recorder = previous
+        for name, fn in originals.items():
+            setattr(node_class, name, fn)
+
+
+class _Recorder():
+    """ Helper class: the Expressions of the Nodes of one recording, and its guards
+    """
+
+    def __init__(self, node_class, variables, symbols):
+        self.node_class = node_class
+        # id(Node) -> (Expression, Node); the Node is kept alive so that its id is not reused.
+        self.expressions = {id(v): (s, v) for v, s in zip(variables, symbols)}
+        self.guards = []
+
+    def expression(self, value):
+        """ Returns the Expression of a Node, a Constant for a Node from outside of the recording
+        """
+        if isinstance(value, self.node_class):
+            entry = self.expressions.get(id(value))
+            return entry[0] if entry is not None else Constant(value.val)
+        return value
+
+    def record(self, result, fn, args, kwargs=None):
+        """ Mirror fn(*args, **kwargs), which gave the Node result, on the Expressions of its operands
+        """
+        if not isinstance(result, self.node_class) or id(result) in self.expressions:
+            return
+        args = [self.expression(a) for a in args]
+        kwargs = {key: self.expression(value) for key, value in (kwargs or {}).items()}
+        name = fn.__name__
+        if name == '__pos__':
+            expr = args[0]
+        elif name.startswith('__'):
+            expr = getattr(args[0], name)(*args[1:], **kwargs)
+        else:
+            expr = fn(*args, **kwargs)
+        self.expressions[id(result)] = (expr, result)
+
+    def guard(self, compare, lhs, rhs, outcome):
+        """ Keep the comparison of lhs and rhs, and its outcome, as a guard of the recording
+        """
+        if isinstance(rhs, (self.node_class, numbers.Real)):
+            self.guards.append((compare, self.expression(lhs), self.expression(rhs), bool(outcome)))
+
+
+class _Branch():
+    """ Helper class: one recording of the function, valid where its guards hold
+    """
+
+    def __init__(self, outputs, single, symbols, guards):
+        self.single = single
+        self.symbols = symbols
+        self.cotangents = [Symbol('u%d' % i) for i in range(len(outputs))]
+        self.compares = [g[0] for g in guards]
+        self.outcomes = [g[3] for g in guards]
+        lhs, rhs = [g[1] for g in guards], [g[2] for g in guards]
+        # Adjoints of the variables for the cotangents u: the gradient of sum(u_i * f_i).
+        terms = [u * f for u, f in zip(self.cotangents, outputs) if isinstance(f, Expression)]
+        grads = gradient(terms[0] if len(terms) == 1 else SumExpression(terms), symbols) if terms \
+            else [0 for _ in symbols]
+        self.guards = EvaluationPlan(lhs, rhs, symbols=symbols) if guards else None
+        self.forward = EvaluationPlan(outputs, symbols=symbols)
+        self.full = EvaluationPlan(outputs, grads, symbols=symbols + self.cotangents)
+
+    @property
+    def nbytes(self):
+        return sum(plan.tape.nbytes for plan in (self.guards, self.forward, self.full) if plan is not None)
+
+    def holds(self, values):
+        """ True if every guard gives its recorded outcome at values, checked before any replay
+        """
+        # The operands of a guard that fails may be undefined at values, e.g. a log on the
+        # other side of a branch: no RuntimeWarning for them.
+        with np.errstate(all='ignore'):
+            lhs, rhs = self.guards.evaluate(values)
+        for compare, outcome, a, b in zip(self.compares, self.outcomes, lhs, rhs):
+            if compare(a, b) != outcome:
+                return False
+        return True
+
+    def evaluate(self, x, u=None, check=True):
+        """ Replay the tape at x, forward only if u is None
+
+        Returns
+        -------
+        [outputs] or [outputs, grads] as arrays, or None if a guard does not hold at x
+        """
+        values = dict(zip(self.symbols, x))
+        if check and self.guards is not None and not self.holds(values):
+            return None
+        if u is None:
+            return [self.forward.evaluate(values)]
+        if len(u) != len(self.cotangents):
+            raise ValueError('%d cotangents given for %d outputs' % (len(u), len(self.cotangents)))
+        values.update(zip(self.cotangents, u))
+        return self.full.evaluate(values)
+
+
+class Trace():
+    """
+	Creates a Trace class, a function recorded once into an array tape and replayed for new inputs.
+
+	Attributes
+	==========
+	fn : function
+		  The target function, of Node arguments, returning a Node or a list of Nodes.
+	branches : list
+		  The recordings of fn, one per control flow met so far.
+	retraces : int
+		  The number of times fn was recorded.
+
+	NOTES
+	=====
+	1. only operations on Nodes are recorded: a value read through .val, or computed by
+	   other code, is a constant of the tape
+	2. comparisons of Nodes (==, !=, <, <=, >, >=) are the guards of a recording; when one
+	   gives another outcome at a new point, fn is recorded again at that point, and the
+	   recordings of earlier branches are kept
+	3. the forward and the backward sweep are one pass of an EvaluationPlan, so the cost of a
+	   replay is linear in the size of the tape
+
+	Examples
+	========
+	>>> def f(x, y):
+	...     return x * sin(y) if x > 0 else -x * y
+	>>> t = Trace(f)
+	>>> t.vjp([2., 0.], 1.)
+	array([0., 2.])
+	>>> t.vjp([-1., 3.], 1.), t.retraces
+	(array([-3.,  1.]), 2)
+	"""
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.branches = []
+        self.retraces = 0
+
+    @property
+    def nbytes(self):
+        '''Memory used by the tapes of all the branches.'''
+        return sum(b.nbytes for b in self.branches)
+
+    def _record(self, x):
+        """ Call fn once at x with Node inputs, mirroring its operations on Symbols
+        """
+        variables = [Node(value) for value in x]
+        symbols = [Symbol('x%d' % i) for i in range(len(x))]
+        recorder = _Recorder(Node, variables, symbols)
+        with _recording(Node, recorder):
+            outputs = self.fn(*variables)
+        single = not isinstance(outputs, (list, tuple))
+        outputs = [recorder.expression(out) for out in ([outputs] if single else outputs)]
+        self.retraces += 1
+        return _Branch(outputs, single, symbols, recorder.guards)
+
+    def _replay(self, x, u=None):
+        """ Evaluate the branch whose guards hold at x, recording a new one if none does
+        """
+        x = [float(value) for value in x]
+        for branch in reversed(self.branches):
+            if len(branch.symbols) != len(x):
+                raise ValueError('%d values given for %d inputs' % (len(x), len(branch.symbols)))
+            blocks = branch.evaluate(x, u)
+            if blocks is not None:
+                return branch, blocks
+        branch = self._record(x)
+        self.branches.append(branch)
+        return branch, branch.evaluate(x, u, check=False)
+
+    def value(self, x):
+        ''' Returns the value of fn at x, replaying the forward sweep only
+
+        Parameters
+        ----------
+        x: sequence of int or float, the point
+
+        Returns
+        -------
+        float for a function with a single output, else np.array with one entry per output
+        '''
+        branch, (outputs,) = self._replay(x)
+        return float(outputs[0]) if branch.single else outputs
+
+    def vjp(self, x, u):
+        ''' Returns the vector-Jacobian product u^T J of fn at x, replaying both sweeps
+
+        Parameters
+        ----------
+        x: sequence of int or float, the point
+        u: the cotangent, a number for a single output, else a sequence with one entry per output;
+            or an array of shape (number of outputs, k), k cotangents replayed together
+
+        Returns
+        -------
+        np.array with one entry per variable, or of shape (len(x), k)
+        '''
+        u = np.asarray(u, dtype=np.float64)
+        branch, (outputs, grads) = self._replay(x, np.reshape(u, (-1,) + u.shape[1:]))
+        return grads
+
+    def get_jacobian(self, x):
+        ''' Returns the Jacobian of fn at x, replaying the backward sweep with every output as a cotangent
+
+        Parameters
+        ----------
+        x: sequence of int or float, the point
+
+        Returns
+        -------
+        np.array of shape (number of outputs, len(x))
+        '''
+        outputs = self.value(x)
+        m = np.size(outputs)
+        return self.vjp(x, np.eye(m)).T
+
+
+from autodiff.node import Node
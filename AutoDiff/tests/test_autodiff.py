@@ -5,6 +5,7 @@ import numpy as np
 
 
 from autodiff.dual import *
+from autodiff.node import *
 from autodiff.elementary import *
 from autodiff.model import *
 from autodiff.symbolic import *
@@ -62,6 +63,157 @@ def test_forward_autodiff():
     print("Pass forward auto diff!")
 
 
+def test_reverse_autodiff():
+    def test_get_value():
+        x1 = Node(val = 1)
+        y1 = Node(val = 2)
+        z1 = Node(val = 5)
+        f1 = 3 * x1 + 4 * y1 * 2 - z1
+        x2 = Node(val = np.pi)
+        y2 = Node(val = 2)
+        z2 = Node(val = 5)
+        f2 = 3 * sin(x2) + 8 * y2 ** 3 + z2**2
+        assert Reverse([f1, f2]).get_value() == [14, 89]
+
+    def test_get_der():
+        x = Node(val = np.pi, name = "x")
+        y = Node(val = np.pi/2, name = "y")
+        z = Node(val = 0, name = "z")
+        f3 = 3 * sin(x) + 4 * cos(y) + exp(z)
+        rvs_f3 = Reverse([f3], [x, y, z])
+        assert np.allclose(rvs_f3.get_der(), np.array([[-3, -4, 1.]]))
+        assert np.allclose(rvs_f3.get_der([z]), np.array([[1]]))
+        assert np.allclose(rvs_f3.get_der([x, y]), np.array([[-3, -4]]))
+
+        # test mulitple func
+        f4 = 6 * sin(x) + cos(y) ** 3 + z**2
+        rvs = Reverse([f3, f4], [x, y, z])
+        assert np.allclose(rvs.get_der(), np.array([[-3.00000000e+00,-4.00000000e+00,1.00000000e+00],[-6.00000000e+00,-1.12481984e-32,0.00000000e+00]]))
+        assert np.allclose(rvs.get_der([z]), np.array([[1.],[0.]]))
+        assert np.allclose(rvs.get_der([y, x]), np.array([[-4.00000000e+00,-3.00000000e+00],[-1.12481984e-32,-6.00000000e+00]]))
+
+    def test_jacobian():
+        x = Node(val = np.pi)
+        y = Node(val = 2)
+        z = Node(val = 5)
+        f1 = 3 * x + 4 * y * 2 - z
+        f2 = 3 * sin(x) + 8 * y ** 3 + z**2
+        rvs1 = Reverse([f1, f2], [x, y, z])
+        assert np.allclose(rvs1.get_jacobian(), np.array([[ 3., 8.,-1.],[-3.,96.,10.]]))
+        # y and z have equal values, but are different variables
+        f3 = 3 * sin(x) + 8 * y ** 3 + x**2 + 0 * z
+        rvs2 = Reverse([f3], [x, y, Node(val = 2)])
+        assert np.allclose(rvs2.get_jacobian(), np.array([[2*np.pi-3, 96., 0.]]))
+
+    def test_simplify_vector_node():
+        x = Node(2)
+        y = Node(1)
+        z1 = (x+y)*x
+        z2 = x/x + 3*y
+        z3 = x**(2*x + 3*y)
+        assert np.allclose(Reverse([z1], [x,y]).get_der(), [[5, 2]])
+        assert np.allclose(Reverse([z2], [x,y]).get_der(), [[0, 3]])
+        assert np.allclose(Reverse([z3], [x,y]).get_der(), [[2**7*(2*np.log(2)+ 7/2), 2**7*3*np.log(2)]])
+
+    def test_long_trace():
+        # far deeper than the recursion limit, and shared inputs at every step
+        x = Node(0.5)
+        y = Node(2.)
+        f = x
+        for _ in range(100000):
+            f = 0.5 * f + x * y * 1e-5
+        rvs = Reverse([f, f * y], [x, y])
+        dx = 0.5 ** 100000 + 2e-5 * (1 - 0.5 ** 100000) / 0.5
+        assert np.allclose(rvs.get_jacobian(), [[dx, 1e-5], [dx * 2, 2e-5 + f.val]])
+
+    def test_vjp():
+        def fn(x, y, z):
+            return [x * y * z, sin(x) + y ** 2, exp(z) / x]
+        point = [0.5, 2., -1.]
+        variables = [Node(v) for v in point]
+        jacobian = Reverse(fn(*variables), variables).get_jacobian()
+        u = np.array([1., -2., 0.5])
+        assert np.allclose(vjp(fn, point, u), u @ jacobian)
+        # a block of cotangents in one sweep
+        block = np.random.RandomState(0).normal(size=(3, 4))
+        assert np.allclose(vjp_batch(fn, point, block), jacobian.T @ block)
+        assert np.allclose(vjp_batch(fn, point, np.eye(3)), jacobian.T)
+        # a single output and a scalar cotangent: the gradient
+        assert np.allclose(vjp(lambda x, y: x * sin(y), [2., 0.], 3.), [0., 6.])
+        try:
+            vjp_batch(fn, point, np.ones((2, 2)))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('expected ValueError')
+
+    test_get_value()
+    test_get_der()
+    test_jacobian()
+    test_simplify_vector_node()
+    test_long_trace()
+    def test_array_vjp():
+        rs = np.random.RandomState(0)
+        A, b, w = rs.normal(size=(50, 3)), rs.normal(size=50), rs.normal(size=3)
+        # least squares: one node per array operation, not per element
+        grad, = array_vjp(lambda w: ((A @ w - b) ** 2).sum(), [w])
+        assert np.allclose(grad, 2 * A.T @ (A @ w - b))
+        # elementwise functions agree with the scalar nodes
+        x = rs.uniform(0.1, 0.9, size=4)
+        grad, = array_vjp(lambda x: (sin(x) * exp(x) + arcsin(x) / sqrt(x)).sum(), [x])
+        for i in range(4):
+            assert np.isclose(grad[i], vjp(lambda t: sin(t) * exp(t) + arcsin(t) / sqrt(t), [x[i]], 1.)[0])
+        # broadcasting, reductions over an axis and indexing, checked by central differences
+        X, v = rs.uniform(0.5, 1.5, size=(4, 3)), rs.uniform(0.5, 1.5, size=3)
+
+        def fn(X, v):
+            return (log(X + v).sum(axis=0) * v).mean() + (X[[0, 0, 2], 1:] ** 2).sum() + (1 / X.T @ X[:, 0]).sum()
+        gX, gv = array_vjp(fn, [X, v])
+        eps = 1e-6
+        for k, i in [(0, (0, 1)), (0, (2, 2)), (0, (3, 0)), (1, (1,))]:
+            plus, minus = [X.copy(), v.copy()], [X.copy(), v.copy()]
+            plus[k][i] += eps
+            minus[k][i] -= eps
+            numeric = (fn(*map(ArrayNode, plus)).val - fn(*map(ArrayNode, minus)).val) / (2 * eps)
+            assert np.isclose([gX, gv][k][i], numeric, atol=1e-5)
+        # a cotangent for an array output, and an unused argument
+        gX, gv = array_vjp(lambda X, v: tanh(X) * 2, [X, v], u=np.ones((4, 3)))
+        assert np.allclose(gX, 2 * (1 - np.tanh(X) ** 2)) and gv.tolist() == [0., 0., 0.]
+        try:
+            array_vjp(lambda X: X * 2, [X])
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('expected ValueError')
+
+    def test_hvp():
+        def fn(x, y, z):
+            return x ** 2 * y + sin(x * z) + exp(y) / z + y ** z + logistic(x, 2, 3) * sqrt(y)
+        point = [0.5, 1.5, 2.]
+        # the Hessian by central differences of the gradient
+        eps = 1e-6
+        hessian = np.array([(vjp(fn, np.add(point, eps * e), 1.) - vjp(fn, np.subtract(point, eps * e), 1.)) / (2 * eps)
+                            for e in np.eye(3)])
+        v = np.array([1., -2., 0.5])
+        assert np.allclose(hvp(fn, point, v), hessian @ v, atol=1e-5)
+        # several directions in one sweep
+        assert np.allclose(hvp(fn, point, np.eye(3)), hessian, atol=1e-5)
+        assert hvp(lambda x, y: x ** 2 * y, [1, 2], [1, 0]).tolist() == [4., 2.]
+        # linear functions, and variables not used
+        assert hvp(lambda x, y: 3 * x + 1, [1, 2], [1, 1]).tolist() == [0., 0.]
+        try:
+            hvp(fn, point, [1., 2.])
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('expected ValueError')
+
+    test_vjp()
+    test_array_vjp()
+    test_hvp()
+    print("Pass reverse auto diff!")
+
+
 
 def test_simplify():
     def test_simplify_num():
@@ -112,11 +264,21 @@ def test_fwd_syb():
     values = {x: 2, y: np.pi, z: 4}
 
     assert np.allclose(get_jacobian_value([f1, f2], [x, y, z], values), fwd.get_jacobian())
+
+    # reverse
+    x2 = Node(2)
+    y2 = Node(np.pi)
+    z2 = Node(4)
+    f_rvs1 = (tanh(cos(sin(y2))**z2) + logistic(z2**z2, 2, 3, 4))**(1/x2)
+    f_rvs2 = exp(arccos(tan(sin(y2))) + logb(z2**(1/2), 1/5)*sinh(x2))
+    rvs = Reverse([f_rvs1, f_rvs2], [x2, y2, z2])
+    assert np.allclose(rvs.get_jacobian(), fwd.get_jacobian())
     print("Pass fwd & symbolic !")
 
     
 
 
 test_forward_autodiff()
+test_reverse_autodiff()
 test_simplify()
 test_fwd_syb()
\ No newline at end of file
@@ -0,0 +1,117 @@
+import math
+import os
+import tempfile
+from multiprocessing import Pool
+
+import numpy as np
+
+from autodiff.elementary import *
+from autodiff.symbolic import *
+
+
+def _entries(directory):
+    return len([i for i in os.listdir(directory) if i.endswith('.adx')])
+
+
+def _worker_diff(directory):
+    # a fresh model in another process, with its own Symbol objects
+    x, y = symbols('x y')
+    f = sin(x * y) + x ** 3
+    d = diff(f, x, y, cache=DiskCache(directory))
+    return d.evaluate({x: 0.5, y: 2})
+
+
+def test_cache():
+    def test_diff_hit():
+        cache = DiskCache(tempfile.mkdtemp())
+        x, y = symbols('x y')
+        f = sin(x * y) + x ** 3
+        d1 = diff(f, x, cache=cache)
+        assert _entries(cache.directory) == 1
+        # an equal model built from new symbols hits the same entry
+        x2, y2 = symbols('x y')
+        f2 = sin(x2 * y2) + x2 ** 3
+        d2 = diff(f2, x2, cache=cache)
+        assert str(d1) == str(d2)
+        # the loaded result is bound to the caller's symbols
+        assert math.isclose(d2.evaluate({x2: 0.5, y2: 2}), d1.evaluate({x: 0.5, y: 2}))
+        # different differentiation variables are different entries
+        diff(f, y, cache=cache)
+        diff(f, x, x, cache=cache)
+        assert _entries(cache.directory) == 3
+        assert diff(1, x, cache=cache) == 0
+
+    def test_jacobian():
+        cache = DiskCache(tempfile.mkdtemp())
+        x, y, z = symbols('x y z')
+        f1 = 3 * x + 4 * y * 2 - z
+        f2 = 3 * sin(x) + 8 * y ** 3 + z ** 2
+        values = {x: math.pi, y: 2, z: 5}
+        expected = [[3., 8., -1.], [-3., 96., 10.]]
+        jac = get_jacobian_expression([f1, f2], [x, y, z], cache=cache)
+        assert np.allclose([[i.evaluate(values) for i in row] for row in jac], expected)
+        jac = get_jacobian_expression([f1, f2], [x, y, z], cache=cache)
+        assert np.allclose([[i.evaluate(values) for i in row] for row in jac], expected)
+        assert _entries(cache.directory) == 1
+
+    def test_jacobian_tape():
+        cache = DiskCache(tempfile.mkdtemp())
+        x, y = symbols('x y')
+        f = [x ** 2 * y, sin(x * y)]
+        values = {x: 0.5, y: 2.}
+        expected = get_jacobian_value(f, [x, y], values)
+        assert np.allclose(get_jacobian_value(f, [x, y], values, cache=cache), expected)
+        # the entry is shared with jacobian(), and a hit only maps the stored arrays
+        get_jacobian_expression(f, [x, y], cache=cache)
+        assert _entries(cache.directory) == 1
+        calls = []
+        tape = cache.jacobian_tape(f, [x, y], lambda: calls.append(1))
+        assert not calls and np.allclose(tape.evaluate(values), np.ravel(expected))
+        out = np.zeros((2, 2))
+        assert get_jacobian_value(f, [x, y], values, out=out, cache=cache) is out
+        assert np.allclose(out, expected)
+        # symbols the entries do not use need no value, on a miss and on a hit
+        cache = DiskCache(tempfile.mkdtemp())
+        assert get_jacobian_value([x + y], [x], {x: 1}, cache=cache) == [[1.0]]
+        assert get_jacobian_value([x + y], [x], {x: 1}, cache=cache) == [[1.0]]
+
+    def test_eviction():
+        cache = DiskCache(tempfile.mkdtemp(), max_bytes=1)
+        x = symbols('x')
+        diff(sin(x), x, cache=cache)
+        diff(cos(x), x, cache=cache)
+        # never more than the newest entry survives with a tiny budget
+        assert _entries(cache.directory) <= 1
+        cache.put('abc', b'123')
+        assert cache.get('abc') is None
+        cache.max_bytes = 100
+        cache.put('abc', b'123')
+        assert cache.get('abc') == b'123'
+        cache.clear()
+        assert cache.get('abc') is None
+
+    def test_corrupt_entry():
+        cache = DiskCache(tempfile.mkdtemp())
+        x = symbols('x')
+        key, _ = cache.key('diff', [x ** 2], [x])
+        cache.put(key, b'garbage')
+        assert math.isclose(diff(x ** 2, x, cache=cache).evaluate({x: 3}), 6)
+
+    def test_processes():
+        directory = tempfile.mkdtemp()
+        with Pool(4) as pool:
+            results = pool.map(_worker_diff, [directory] * 8)
+        assert np.allclose(results, results[0])
+        assert _entries(directory) == 1
+
+    test_diff_hit()
+    test_jacobian()
+    test_jacobian_tape()
+    test_eviction()
+    test_corrupt_entry()
+    test_processes()
+    print("Pass cache!")
+
+
+if __name__ == '__main__':
+    test_cache()
@@ -0,0 +1,70 @@
+import numpy as np
+
+from autodiff.node import *
+from autodiff.elementary import *
+from autodiff.model import *
+from autodiff.checkpoint import *
+
+
+def test_checkpoint():
+    def step(x, v, k):
+        return [x + 0.01 * v, v - 0.01 * k * sin(x), k]
+
+    def unrolled(n):
+        def fn(*state):
+            for _ in range(n):
+                state = step(*state)
+            return list(state)
+        return fn
+
+    x0, u = [1., 0., 2.], [1., 0.5, 0.]
+
+    def test_schedules():
+        n = 2000
+        expected = vjp(unrolled(n), x0, u)
+        final = [i.val for i in unrolled(n)(*[Node(v) for v in x0])]
+        plain = None
+        for options in [{}, {'checkpoints': [10, 500, 1999, 5000]}, {'snapshots': 30}, {'snapshots': 4}]:
+            state, grad, stats = checkpoint_vjp(step, x0, n, u, **options)
+            assert np.allclose(grad, expected) and np.allclose(state, final)
+            assert stats['recorded_steps'] == n
+            if plain is None:
+                plain = stats
+        # fewer stored states: a smaller tape, at the cost of recomputed steps
+        assert stats['peak_snapshots'] == 4 and stats['peak_tape_nodes'] < plain['peak_tape_nodes'] / 10
+        assert stats['steps'] > plain['steps']
+        assert plain['peak_snapshots'] == len(range(0, n, 44)) and plain['peak_tape_bytes'] > 0
+
+    def test_small():
+        # every split of a few steps over a few snapshots, a single one included
+        for n in range(1, 9):
+            expected = vjp(unrolled(n), x0, u)
+            for snapshots in range(1, 4):
+                state, grad, stats = checkpoint_vjp(step, x0, n, u, snapshots=snapshots)
+                assert np.allclose(grad, expected)
+                assert stats['peak_snapshots'] <= snapshots
+        state, grad, stats = checkpoint_vjp(step, x0, 0, u)
+        assert state.tolist() == x0 and grad.tolist() == u
+
+    def test_errors():
+        for options in [{'snapshots': 0}, {'snapshots': 2, 'checkpoints': [1]}]:
+            try:
+                checkpoint_vjp(step, x0, 10, u, **options)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError('expected ValueError')
+        try:
+            checkpoint_vjp(step, x0, 10, [1., 0.])
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('expected ValueError')
+
+    test_schedules()
+    test_small()
+    test_errors()
+    print("Pass checkpoint!")
+
+
+test_checkpoint()
@@ -249,6 +249,18 @@ def test_dual_class():
     test_le()
     test_gt()
     test_ge()
+
+    def test_ufunc_methods():
+        # numpy functions of a Dual are the elementary functions
+        x = Dual(0.5, 2)
+        for ufunc, f in [(np.exp, exp), (np.log, log), (np.sqrt, sqrt), (np.sin, sin), (np.tan, tan),
+                         (np.arccos, arccos), (np.sinh, sinh), (np.tanh, tanh)]:
+            z = ufunc(x)
+            assert isinstance(z, Dual)
+            assert z.val == f(x).val and z.der == f(x).der
+        assert math.isclose(np.cos(x).der, -2 * math.sin(0.5))
+
+    test_ufunc_methods()
     print("Pass dual class!")
 
 
@@ -132,6 +132,10 @@ def test_elementary_dual():
         assert z.val == 1/(1+np.e**(-1))
         assert z.der == z.val*(1- z.val)
         assert x_real == 1/(1+np.e**(-1))
+        # the parameters given by keyword
+        z = logistic(Dual(0.5, 1), L=2, k=3)
+        assert np.isclose(z.val, 2/(1+np.exp(-1.5)))
+        assert np.isclose(z.der, 3*z.val*(1 - z.val/2))
 
     test_exp_dual()
     test_sin_dual()
@@ -0,0 +1,61 @@
+import math
+
+import numpy as np
+
+from autodiff.elementary import *
+from autodiff.symbolic import *
+
+
+def test_evaluator():
+    def test_initial_values():
+        x, y = symbols('x y')
+        f = sin(x) * y + x ** 2
+        ev = Evaluator(f, {x: 0.5, y: 2})
+        assert math.isclose(ev.values, f.evaluate({x: 0.5, y: 2}))
+        ev = Evaluator([f, x + y], {x: 0.5, y: 2})
+        assert np.allclose(ev.values, [f.evaluate({x: 0.5, y: 2}), 2.5])
+
+    def test_update_matches_evaluate():
+        x, y, z = symbols('x y z')
+        f = exp(x * y) / (z + 2) + tan(z) * x
+        g = diff(f, x)
+        ev = Evaluator([f, g], {x: 0.1, y: 0.2, z: 0.3})
+        point = {x: 0.1, y: 0.2, z: 0.3}
+        for symbol, value in [(x, 0.4), (z, -0.1), (y, 1.5), (x, 0.4)]:
+            point[symbol] = value
+            ev.update({symbol: value})
+            assert np.allclose(ev.values, [f.evaluate(point), g.evaluate(point)])
+        # an unchanged value recomputes nothing
+        ev.update({x: 0.4})
+        assert ev.recomputed == 0
+
+    def test_dirty_cone():
+        xs = symbols('x0:100')
+        f = SumExpression([sin(xs[i]) * xs[i] for i in range(100)])
+        ev = Evaluator(f, np.ones(100))
+        ev.update({xs[7]: 2.0})
+        # sin, product and the sum are the only nodes downstream of x7
+        assert ev.recomputed == 3
+        expected = f.evaluate(np.where(np.arange(100) == 7, 2.0, 1.0))
+        assert math.isclose(ev.values, expected)
+        # symbols outside the graph are ignored
+        ev.update({Symbol('w'): 3})
+        assert ev.recomputed == 0
+
+    def test_early_cutoff():
+        x, y = symbols('x y')
+        f = cos(x * 0) * y
+        ev = Evaluator(f, {x: 1, y: 2})
+        ev.update({x: 5})
+        # x * 0 is recomputed but does not change, so propagation stops there
+        assert ev.recomputed == 1
+        assert ev.values == 2
+
+    test_initial_values()
+    test_update_matches_evaluate()
+    test_dirty_cone()
+    test_early_cutoff()
+    print("Pass evaluator!")
+
+
+test_evaluator()
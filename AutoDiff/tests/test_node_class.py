@@ -0,0 +1,303 @@
+#import sys
+#sys.path.append('AutoDiff/src/autodiff')
+
+import pytest
+
+from autodiff.node import *
+from autodiff.elementary import *
+import numpy as np
+import math
+
+def test_node_class():
+    """
+    Test suite for node class methods
+    including 
+    __pos__, __neg__
+    __add__, __radd__, __sub__, __rsub__,__mul__, __rmul__,__truediv__,__rtruediv__
+    __pow__, __rpow__
+    __eq__,__ne__,__lt__,__le__,__gt__,__ge__
+
+    """
+    
+    def test_pos():
+        x = Node(1)
+        y = +x
+        assert y.val == 1
+        assert y.name == 'new' 
+        assert y.inputs == (x,)
+        assert y.gradients == (1,)
+       
+    def test_neg():
+        x = Node(1)
+        y = -x
+        assert y.val == -1
+        assert y.name == 'new'
+        assert y.inputs == (x,)
+        assert y.gradients == (-1,)
+
+    def test_add():
+        #test case of f = x+y, when y is node or not
+        x = Node(1)
+        y = Node(2)
+        f = x+y
+        f_real = x+2
+
+        assert f.val == 3
+        assert f.name == 'new'
+        assert f.inputs == (x, y)
+        assert f.gradients == (1, 1)
+
+        assert f_real.val == 3
+        assert f_real.name == 'new'
+        assert f_real.inputs == (x,)
+        assert f_real.gradients == (1,)
+
+    def test_radd():
+        # test case of f = y + x, when y is not node
+        x = Node(1)
+        f_real = 2+x
+        assert f_real.val == 3
+        assert f_real.name == 'new'
+        assert f_real.inputs == (x,)
+        assert f_real.gradients == (1,)
+    
+    def test_sub():
+        #test case of f = x-y, when y is node or not
+        x = Node(1)
+        y = Node(2)
+        f = x-y
+        f_real = x-2
+
+        assert f.val == -1
+        assert f.name == 'new'
+        assert f.inputs == (x, y)
+        assert f.gradients == (1, -1)
+
+        assert f_real.val == -1
+        assert f_real.name == 'new'
+        assert f_real.inputs == (x,)
+        assert f_real.gradients == (1,)
+
+    def test_rsub():
+        # test case of f = y + x, when y is not node
+        x = Node(1)
+        f_real = 2-x
+        assert f_real.val == 1
+        assert f_real.name == 'new'
+        assert f_real.inputs == (x,)
+        assert f_real.gradients == (-1,)       
+
+    def test_mul():
+        #test case of f = x*y, when y is node or not
+        x = Node(1)
+        y = Node(2)
+        f = x*y
+        f_real = x*2
+        
+        assert f.val == 2
+        assert f.name == 'new'
+        assert f.inputs == (x, y)
+        assert f.gradients == (2, 1)
+
+        assert f_real.val == 2
+        assert f_real.name == 'new'
+        assert f_real.inputs == (x,)
+        assert f_real.gradients == (2,)
+        
+    def test_rmul():
+        #test case of f = y*x, when y is not node
+        x = Node(3)
+        f_real = 2*x
+        assert f_real.val == 6
+        assert f_real.name == 'new'
+        assert f_real.inputs == (x,)
+        assert f_real.gradients == (2,)
+
+    def test_div():
+        #test case of f = x/y, when y is node or not 
+        x = Node(1)
+        y = Node(2)
+        f = x/y
+        f_real = x/2
+
+        assert f.val == 0.5
+        assert f.name == 'new'
+        assert f.inputs == (x, y)
+        assert f.gradients == (0.5, -0.25)
+
+        assert f_real.val == 0.5
+        assert f_real.name == 'new'
+        assert f_real.inputs == (x,)
+        assert f_real.gradients == (0.5,)
+
+
+    def test_rdiv():
+        #test case of f = y/x, when y is not node
+        x = Node(2)
+        f_real = 1/x
+        assert f_real.val == 0.5
+        assert f_real.name == 'new'
+        assert f_real.inputs == (x,)
+        assert f_real.gradients == (-0.25,)
+                        
+    
+    def test_pow():
+        x = Node(2)
+        y = Node(3)
+        f = x**y
+        f_real = x**2
+
+        assert f.val == 2**3
+        assert f.name == 'new'
+        assert f.inputs == (x, y)
+        assert f.gradients == (12, np.log(2)*2**3)
+
+        assert f_real.val == 2**2
+        assert f_real.name == 'new'
+        assert f_real.inputs == (x,)
+        assert f_real.gradients == (4,)
+        
+    def test_rpow():
+        x = Node(3)
+        f = 2**x
+        assert f.val == 2**3
+        assert f.name == 'new'
+        assert f.inputs == (x,)
+        assert f.gradients == (np.log(2) * 2 ** 3,)
+        
+
+    ## comparison test
+    def test_eq():
+        x = Node(2)
+        y = Node(2)
+        z = Node(1)
+        assert True == (x == y)
+        assert False == (x == z)
+        assert True == (x == 2)
+        assert True == (2 == x)
+        assert False == (x == 3)
+        assert False == (3 == x)
+
+    def test_ne():
+        x = Node(2)
+        y = Node(2)
+        z = Node(1)
+        assert False == (x != y)
+        assert True == (x != z)
+        assert True == (x != 4)
+        assert True == (4 != x)
+        assert False == (x != 2)
+        assert False == (2 != x)
+    
+    def test_lt():
+        x = Node(2)
+        y = Node(2)
+        z = Node(1)
+        assert False == (x < y)
+        assert False == (x < z)
+        assert True  == (z < x)
+        assert True  == (x < 3)
+        assert False == (3 < x)
+
+    def test_le():
+        x = Node(2)
+        y = Node(2)
+        z = Node(1)
+        assert True  == (x <= y)
+        assert False == (x <= z)
+        assert True  == (z <= x)
+        assert True  == (x <= 3)
+        assert False == (3 <= x)
+
+
+    def test_gt():
+        x = Node(2)
+        y = Node(2)
+        z = Node(1)
+        assert False == (x > y)
+        assert True  == (x > z)
+        assert False == (z > x)
+        assert True  == (x > 1)
+        assert False == (1 > x)
+
+    def test_ge():
+        x = Node(2)
+        y = Node(2)
+        z = Node(1)
+        assert True  == (x >= y)
+        assert True  == (x >= z)
+        assert False == (z >= x)
+        assert True  == (x >= 1)
+        assert False == (1 >= x)
+
+    def test_identity():
+        x = Node(2)
+        y = Node(2)
+        # equal values, but two distinct variables
+        assert x == y and len({x, y}) == 2
+        assert not hasattr(x, '__dict__')
+        f = x * y
+        assert f.inputs[0] is x and f.inputs[1] is y
+
+    def test_elementary():
+        x = Node(0.5)
+        for fn, der in [(sin, np.cos(0.5)), (cos, -np.sin(0.5)), (tan, 1 / np.cos(0.5) ** 2),
+                        (exp, np.exp(0.5)), (log, 2), (sqrt, 0.5 / np.sqrt(0.5)),
+                        (arcsin, 1 / np.sqrt(0.75)), (arccos, -1 / np.sqrt(0.75)), (arctan, 0.8),
+                        (sinh, np.cosh(0.5)), (cosh, np.sinh(0.5)), (tanh, 1 - np.tanh(0.5) ** 2)]:
+            f = fn(x)
+            assert math.isclose(f.val, fn(0.5))
+            assert f.inputs == (x,) and math.isclose(f.gradients[0], der)
+        assert math.isclose(logb(x, 2).gradients[0], 1 / 0.5 / np.log(2))
+        f = logistic(x, 2, 3, 1)
+        assert math.isclose(f.val, logistic(0.5, 2, 3, 1))
+        assert math.isclose(f.gradients[0], logistic(Dual(0.5, 1), 2, 3, 1).der)
+
+    test_pos()
+    test_neg()
+    test_add()
+    test_radd()
+    test_sub()
+    test_rsub()
+    test_mul()
+    test_rmul()
+    test_div()
+    test_rdiv()
+    test_pow()
+    test_rpow()
+
+    #comparison 
+
+    test_eq()
+    test_ne()
+    test_lt()
+    test_le()
+    test_gt()
+    test_ge()
+
+    def test_array_node():
+        x = ArrayNode([[1., 2.], [3., 4.]], "x")
+        assert x.shape == (2, 2) and x.name == "x"
+        # a NumPy array on the left gives a node, not an array of nodes
+        y = np.ones(2) + x
+        assert isinstance(y, ArrayNode) and y.val.tolist() == [[2., 3.], [4., 5.]]
+        assert y.inputs == (x,)
+        assert (np.eye(2) @ x).val.tolist() == x.val.tolist()
+        assert (x @ x).inputs == (x, x)
+        assert (x.sum(axis=1) + x[0]).val.tolist() == [4., 9.]
+        assert (x.T - 1).val.tolist() == [[0., 2.], [1., 3.]]
+        assert np.allclose(sin(x).val, np.sin(x.val))
+        try:
+            ArrayNode(np.ones((2, 2, 2))) @ x
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('expected ValueError')
+
+    test_identity()
+    test_elementary()
+    test_array_node()
+    print("Pass node class!")
+
+
+test_node_class()
\ No newline at end of file
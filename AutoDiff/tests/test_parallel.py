@@ -0,0 +1,86 @@
+import os
+
+import numpy as np
+
+from autodiff.elementary import *
+from autodiff.symbolic import *
+
+
+def test_parallel():
+    def test_map():
+        x, y, z = symbols('x y z')
+        f = [x * y * z, sin(x * y) + z ** 2, exp(x) / y]
+        jacobian = get_jacobian_expression(f, [x, y, z])
+        points = np.random.RandomState(0).uniform(0.5, 2, size=(1001, 3))
+        plan = EvaluationPlan(f, jacobian, symbols=[x, y, z])
+        value, jac = plan.evaluate({x: points[:, 0], y: points[:, 1], z: points[:, 2]})
+        with ParallelEvaluator(f, jacobian, symbols=[x, y, z], processes=3) as evaluator:
+            # small chunks, so that they finish out of order
+            parallel_value, parallel_jac = evaluator.map(points, chunksize=17)
+            assert parallel_value.shape == (1001, 3) and parallel_jac.shape == (1001, 3, 3)
+            assert np.allclose(parallel_value, value.T)
+            assert np.allclose(parallel_jac, np.moveaxis(jac, -1, 0))
+            # the pool and its tape are reused
+            assert np.allclose(evaluator.map(points[:5])[0], value.T[:5])
+            assert evaluator.map(np.empty((0, 3)))[1].shape == (0, 3, 3)
+
+    def test_jacobian_value():
+        x, y = symbols('x y')
+        points = [[1., 2.], [3., 4.], [5., 6.]]
+        result = map_jacobian_value([x ** 2, x * y], [x, y], points, processes=2)
+        for point, jac in zip(points, result):
+            assert np.allclose(jac, get_jacobian_value([x ** 2, x * y], [x, y], {x: point[0], y: point[1]}))
+
+    def test_jacobian_expression():
+        xs = symbols('x0:40')
+        f = [sin(xs[i] * xs[i - 1]) ** 2 for i in range(40)] + [3, xs[0] * exp(xs[5])]
+        jacobian = get_jacobian_expression(f, list(xs), processes=2)
+        expected = get_jacobian_expression(f, list(xs))
+        point = np.linspace(0.1, 2, 40)
+        assert np.allclose(EvaluationPlan(jacobian).evaluate(point), EvaluationPlan(expected).evaluate(point))
+        assert jacobian[40] == [0] * 40
+        # the same entry types as the serial path, already materialized
+        assert [[type(i) for i in row] for row in jacobian] == [[type(i) for i in row] for row in expected]
+        assert isinstance(jacobian[3][2], LazyDerivative) and jacobian[3][2]._materialized is not None
+        # rows are merged with the model: sin(x3 * x2) is the node of f[3] in both derivatives
+        inner = f[3].base
+        assert any(node is inner for node in postorder(jacobian[3][2]))
+        assert any(node is inner for node in postorder(jacobian[3][3]))
+        # the symbols of the result are the caller's
+        assert set(id(s) for s in postorder(jacobian[41][5]) if isinstance(s, Symbol)) <= set(id(s) for s in xs)
+
+    def test_errors():
+        x, y = symbols('x y')
+        try:
+            ParallelEvaluator(x * y, symbols=[x], processes=1)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('expected ValueError')
+        with ParallelEvaluator(x * y, symbols=[x, y], processes=1) as evaluator:
+            try:
+                evaluator.map(np.ones((4, 3)))
+            except ValueError:
+                pass
+            else:
+                raise AssertionError('expected ValueError')
+        # a pool that fails to start does not leak the shared tape
+        before = set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+        try:
+            ParallelEvaluator(x * y, symbols=[x, y], processes=-1)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('expected ValueError')
+        if os.path.isdir('/dev/shm'):
+            assert set(os.listdir('/dev/shm')) <= before
+
+    test_map()
+    test_jacobian_value()
+    test_jacobian_expression()
+    test_errors()
+    print("Pass parallel!")
+
+
+if __name__ == '__main__':
+    test_parallel()
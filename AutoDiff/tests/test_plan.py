@@ -0,0 +1,71 @@
+import numpy as np
+
+from autodiff.elementary import *
+from autodiff.symbolic import *
+
+
+def test_plan():
+    def test_blocks():
+        x, y, z = symbols('x y z')
+        f = [x * y * z, sin(x * y) + z ** 2, exp(x * y)]
+        jacobian = get_jacobian_expression(f, [x, y, z])
+        values = {x: 0.5, y: -1.5, z: 2.}
+        plan = EvaluationPlan(f, jacobian)
+        assert plan.shapes == [(3,), (3, 3)]
+        value, jac = plan.evaluate(values)
+        assert np.allclose(value, [i.evaluate(values) for i in f])
+        assert np.allclose(jac, [[cell.evaluate(values) for cell in row] for row in jacobian])
+        # x * y is shared by all three outputs and their derivatives, and computed once
+        assert len(plan.tape) < len(postorder(f + [cell for row in jacobian for cell in row]))
+        # numbers are written as they are
+        assert EvaluationPlan([[x, 2], [0, x * 3]]).evaluate({x: 5.}).tolist() == [[5., 2.], [0., 15.]]
+
+    def test_out():
+        x, y = symbols('x y')
+        values = {x: 2., y: 3.}
+        out = np.full((2, 2), np.nan)
+        result = get_jacobian_value([x * y, x / y], [x, y], values, out=out)
+        assert result is out
+        assert np.allclose(out, [[3., 2.], [1 / 3., -2 / 9.]])
+        # a non contiguous out is written through a copy
+        out = np.zeros((2, 4))[:, ::2]
+        get_jacobian_value([x * y, x / y], [x, y], values, out=out)
+        assert np.allclose(out, [[3., 2.], [1 / 3., -2 / 9.]])
+        f = [x + y, x * y]
+        value, jac = np.zeros(2), np.zeros((2, 2))
+        EvaluationPlan(f, get_jacobian_expression(f, [x, y])).evaluate(values, out=(value, jac))
+        assert value.tolist() == [5., 6.] and jac.tolist() == [[1., 1.], [3., 2.]]
+
+    def test_batch():
+        xs = symbols('x0:2')
+        f = [xs[0] ** 2 * xs[1], cos(xs[1])]
+        plan = EvaluationPlan(get_jacobian_expression(f, list(xs)))
+        points = np.random.RandomState(1).uniform(-1, 1, size=(2, 100))
+        jac = plan.evaluate(points)
+        assert jac.shape == (2, 2, 100)
+        for k in (0, 57, 99):
+            assert np.allclose(jac[..., k], get_jacobian_value(f, list(xs), points[:, k]))
+
+    def test_errors():
+        x, y = symbols('x y')
+        try:
+            EvaluationPlan([[x, y], [x]])
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('expected ValueError')
+        try:
+            EvaluationPlan(x * y).evaluate({x: 1.})
+        except AssertionError:
+            pass
+        else:
+            raise AssertionError('expected AssertionError')
+
+    test_blocks()
+    test_out()
+    test_batch()
+    test_errors()
+    print("Pass plan!")
+
+
+test_plan()
@@ -0,0 +1,71 @@
+import math
+import warnings
+
+from autodiff.elementary import *
+from autodiff.symbolic import *
+
+
+def test_profile():
+    def test_report():
+        x, y = symbols('x y')
+        s = sin(x * y)
+        f = s * s + s
+        report = f.profile()
+        assert report['unique_nodes'] == 6
+        assert report['nodes'] == f.size == 14
+        assert report['depth'] == f.depth == 5
+        assert report['operators'] == {'Symbol': 2, 'ProductExpression': 2, 'SinExpression': 1, 'SumExpression': 1}
+        assert report['flops'] == 1 + 20 + 1 + 1
+        both = profile([f, s])
+        assert both['unique_nodes'] == 6 and both['nodes'] == 14 + 4
+
+    def test_diff_growth():
+        x, y = symbols('x y')
+        steps = diff_profile(x ** y * sin(x), x, y, x)
+        assert len(steps) == 4
+        assert steps[0]['symbol'] is None and steps[0]['growth'] == 1.0
+        assert [i['symbol'] for i in steps[1:]] == [x, y, x]
+        for previous, step in zip(steps, steps[1:]):
+            assert math.isclose(step['growth'], step['unique_nodes'] / previous['unique_nodes'])
+
+    def test_budget():
+        x = symbols('x')
+        f = sin(x) ** x
+        expected = diff(f, x, lazy=False).evaluate({x: 2})
+        with node_budget(10):
+            try:
+                diff(f, x, lazy=False)
+            except NodeBudgetExceeded:
+                pass
+            else:
+                raise AssertionError('expected NodeBudgetExceeded')
+            # lazy derivatives evaluate without building the tree, and are checked when it is built
+            d = diff(f, x)
+            assert math.isclose(d.evaluate({x: 2}), expected)
+            try:
+                str(d)
+            except NodeBudgetExceeded:
+                pass
+            else:
+                raise AssertionError('expected NodeBudgetExceeded')
+        with node_budget(10, action='warn'):
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter('always')
+                d = diff(f, x, lazy=False)
+            assert len(caught) == 1 and issubclass(caught[0].category, RuntimeWarning)
+        # the budget is restored on exit
+        diff(f, x, x, x, lazy=False)
+        try:
+            set_node_budget(10, action='ignore')
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('expected ValueError')
+
+    test_report()
+    test_diff_growth()
+    test_budget()
+    print("Pass profile!")
+
+
+test_profile()
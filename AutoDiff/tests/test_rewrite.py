@@ -0,0 +1,71 @@
+import math
+
+import numpy as np
+
+from autodiff.elementary import *
+from autodiff.symbolic import *
+from autodiff.symbolic.rewrite import RULES, cost, rule
+
+
+def test_rewrite():
+    def test_identities():
+        x, y = symbols('x y')
+        assert str(simplify(diff(x ** 3, x, lazy=False))) == '(3)*((x)^(2))'
+        assert str(simplify(exp(log(x)))) == 'x'
+        assert str(simplify(log(exp(x + 1)))) == '(x)+(1)'
+        assert str(simplify(x * x ** -1)) == '1'
+        assert str(simplify((x * y) / (y * y))) == '(x)/(y)'
+        assert str(simplify(x * 1 + 0 * y + (2 + x) + 3)) == '(x)+(x)+(5)'
+        assert str(simplify((x ** 2) ** 3)) == '(x)^(6)'
+        # an undefined constant subexpression is left alone
+        assert str(simplify(x + Constant(1) / Constant(0))) == '(x)+((1)/(0))'
+
+    def test_equivalent_and_cheaper():
+        x, y, z = symbols('x y z')
+        f = sin(x * y) / z + exp(x) * x ** 2 - log(y * z)
+        values = {x: 0.7, y: 1.3, z: 2.1}
+        for d in [diff(f, x, lazy=False), diff(f, x, y, lazy=False), diff(f, z, z, lazy=False)]:
+            s = simplify(d)
+            assert math.isclose(s.evaluate(values), d.evaluate(values), rel_tol=1e-12)
+            assert cost(s) < cost(d)
+
+    def test_many_outputs():
+        x, y = symbols('x y')
+        jac = get_jacobian_expression([sin(x) * y, cos(x) * y], [x, y])
+        flat = simplify([i for row in jac for i in row] + [0])
+        assert flat[-1] == 0
+        values = {x: 0.3, y: 2}
+        assert np.allclose([i.evaluate(values) for i in flat[:-1]], [i.evaluate(values) for row in jac for i in row])
+        # equal subexpressions of different outputs become one node
+        assert flat[1] is flat[2].operands[1]
+        assert flat[0].operands[0] is flat[3]
+
+    def test_custom_rule():
+        x = symbols('x')
+        rules = {cls: list(fns) for cls, fns in RULES.items()}
+
+        def sin_arcsin(node):
+            if isinstance(node.x, ArcsinExpression):
+                return node.x.x
+        rules[SinExpression] = [sin_arcsin]
+        assert simplify(sin(arcsin(x)), rules=rules) is x
+        assert str(simplify(sin(arcsin(x)))) == 'sin(arcsin(x))'
+        # registered with the decorator, the rule is used by default
+        @rule(SinExpression)
+        def registered(node):
+            return sin_arcsin(node)
+        try:
+            assert registered in RULES[SinExpression]
+            assert simplify(sin(arcsin(x))) is x
+        finally:
+            RULES[SinExpression].remove(registered)
+        assert str(simplify(sin(arcsin(x)))) == 'sin(arcsin(x))'
+
+    test_identities()
+    test_equivalent_and_cheaper()
+    test_many_outputs()
+    test_custom_rule()
+    print("Pass rewrite!")
+
+
+test_rewrite()
@@ -0,0 +1,94 @@
+import math
+import os
+import tempfile
+
+import numpy as np
+
+from autodiff.elementary import *
+from autodiff.symbolic import *
+from autodiff.symbolic.graph import postorder
+from autodiff.symbolic.serialize import *
+
+
+def test_serialize():
+    def test_round_trip():
+        x, y = symbols('x y')
+        f = (log(x) + logb(x, y) - x) / x * x ** 2 + sin(cos(tan(x))) + 2 ** cos(y) + arctan(sqrt(y))
+        d = diff(f, x)
+        f2, d2 = loads(dumps([f, d]))
+        assert str(f2) == str(f)
+        assert str(d2) == str(d)
+        values = {x: 2, y: 3}
+        f3 = loads(dumps(f), symbols={'x': x, 'y': y})
+        assert math.isclose(f3.evaluate(values), f.evaluate(values))
+
+    def test_constants():
+        assert loads(dumps(Constant(3))).value == 3
+        assert isinstance(loads(dumps(Constant(3))).value, int)
+        assert loads(dumps(Constant(0.5))).value == 0.5
+        assert loads(dumps(Constant(2 ** 70))).value == 2.0 ** 70
+
+    def test_sharing():
+        x = symbols('x')
+        s = sin(x) * x
+        f = s + s
+        g = loads(dumps(f))
+        assert g.operands[0] is g.operands[1]
+        assert len(postorder(g)) == len(postorder(f)) == 4
+
+    def test_symbol_slots():
+        x, y = symbols('x y')
+        a, b = loads(dumps([x * y, y], symbols=[y, x]), symbols=[y, x])
+        assert b is y
+        assert a.operands[0] is x and a.operands[1] is y
+        # two different symbols sharing one name stay distinct
+        x2 = Symbol('x')
+        f = loads(dumps(x + x2))
+        assert f.operands[0] is not f.operands[1]
+
+    def test_deep_graph():
+        x = symbols('x')
+        f = x
+        for _ in range(5000):
+            f = f * 1.0001 + x
+        g = loads(dumps(f), symbols=[x])
+        assert len(postorder(g)) == len(postorder(f))
+
+    def test_file_mmap():
+        x, y = symbols('x y')
+        jac = get_jacobian_expression([x * y, sin(x) + y ** 2], [x, y])
+        path = os.path.join(tempfile.mkdtemp(), 'jacobian.adx')
+        dump([i for row in jac for i in row], path, symbols=[x, y])
+        values = {x: 0.5, y: 2}
+        for mmap_mode in (False, True):
+            loaded = load(path, symbols=[x, y], mmap_mode=mmap_mode)
+            assert np.allclose([i.evaluate(values) for i in loaded], [2, 0.5, math.cos(0.5), 4])
+        table = load_table(path, mmap_mode=True)
+        assert table.names == ['x', 'y']
+        assert len(table.outputs) == 4
+
+    def test_bad_input():
+        try:
+            loads(b'not a graph at all, definitely not')
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('expected ValueError')
+        try:
+            dumps([1.0])
+        except TypeError:
+            pass
+        else:
+            raise AssertionError('expected TypeError')
+
+    test_round_trip()
+    test_constants()
+    test_sharing()
+    test_symbol_slots()
+    test_deep_graph()
+    test_file_mmap()
+    test_bad_input()
+    print("Pass serialize!")
+
+
+test_serialize()
@@ -0,0 +1,72 @@
+import math
+
+import numpy as np
+
+from autodiff.elementary import *
+from autodiff.symbolic import *
+from autodiff.symbolic.graph import postorder
+
+
+def test_sharing():
+    def test_interner():
+        x, y = symbols('x y')
+        interner = Interner()
+        a, b = interner([sin(x * y) + 1, sin(x * y) * 2])
+        assert a.operands[0] is b.operands[0]
+        # the table is kept between calls
+        c = interner(cos(sin(x * y)))
+        assert c.x is a.operands[0]
+        # different symbols with one name are not merged
+        assert interner(Symbol('x') + x).operands[0] is not x
+
+    def test_cse():
+        x, y = symbols('x y')
+        f = sin(x * y) * exp(x * y) + cos(x * y)
+        d = diff(f, x, lazy=False)
+        bindings, reduced = cse(d)
+        values = {x: 0.4, y: 1.2}
+        assert math.isclose(evaluate_cse(bindings, reduced, values), d.evaluate(values))
+        # x * y appears many times in d and is bound once
+        assert sum(str(expr) == '(x)*(y)' for _, expr in bindings) == 1
+        # every temporary is only used after it is bound
+        bound = set()
+        for temporary, expr in bindings:
+            assert expr.free_symbols - {x, y} <= bound
+            bound.add(temporary)
+        assert str(cse(x + y)[1]) == '(x)+(y)' and cse(x + y)[0] == []
+
+    def test_jacobian_temporaries():
+        xs = symbols('x0:20')
+        s = SumExpression([xs[i] * xs[i] for i in range(20)])
+        exprs = [sin(s) * xs[i] for i in range(20)]
+        jac = get_jacobian_expression(exprs, list(xs))
+        flat = [i.materialize() for row in jac for i in row]
+        bindings, reduced = cse(flat)
+        assert len(reduced) == 400
+        # cos(s) and the like are bound once for the whole Jacobian
+        assert sum(isinstance(expr, CosExpression) for _, expr in bindings) == 1
+        point = np.linspace(0.1, 0.5, 20)
+        values = {xs[i]: point[i] for i in range(20)}
+        assert np.allclose(evaluate_cse(bindings, reduced, values), [i.evaluate(point) for i in flat])
+
+    def test_cse_str():
+        x = symbols('x')
+        assert cse_str(sin(x) * sin(x)) == '_t0 = sin(x)\n(_t0)*(_t0)'
+        assert cse_str([x, x + 1]) == 'x\n(x)+(1)'
+
+    def test_evaluator_merges():
+        x = symbols('x')
+        f = sin(x) * sin(x)
+        ev = Evaluator(f, {x: 1})
+        assert len(ev._order) == len(postorder(f)) - 1
+        assert math.isclose(ev.update({x: 2}), math.sin(2) ** 2)
+
+    test_interner()
+    test_cse()
+    test_jacobian_temporaries()
+    test_cse_str()
+    test_evaluator_merges()
+    print("Pass sharing!")
+
+
+test_sharing()
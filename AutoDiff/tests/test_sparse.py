@@ -0,0 +1,98 @@
+import math
+
+import numpy as np
+
+from autodiff.elementary import *
+from autodiff.symbolic import *
+
+
+def test_sparse():
+    def test_jacobian_pattern():
+        x, y, z = symbols('x y z')
+        f1 = 3 * x + 4 * y * 2 - z
+        f2 = 3 * sin(x) + 8 * y ** 3 + z ** 2
+        f3 = exp(z)
+        values = {x: math.pi, y: 2, z: 5}
+        jac = get_sparse_jacobian_expression([f1, f2, f3], [x, y, z])
+        assert jac.shape == (3, 3)
+        assert jac.nnz == 7
+        assert list(jac.indptr) == [0, 3, 6, 7]
+        assert list(jac.indices) == [0, 1, 2, 0, 1, 2, 2]
+        assert list(jac.rows) == [0, 0, 0, 1, 1, 1, 2]
+        dense = [[i.evaluate(values) for i in row] for row in get_jacobian_expression([f1, f2, f3], [x, y, z])]
+        assert np.allclose(jac.toarray(values), dense)
+        out = np.empty(jac.nnz)
+        assert jac.evaluate(values, out=out) is out
+        assert np.allclose(out, jac.evaluate(values))
+
+    def test_jacobian_large():
+        n = 2000
+        xs = symbols('x0:%d' % n)
+        fs = [xs[i] * xs[(i + 1) % n] + sin(xs[(i + 7) % n]) for i in range(n)]
+        jac = get_sparse_jacobian_expression(fs, list(xs))
+        assert jac.nnz == 3 * n
+        point = np.linspace(0, 1, n)
+        data = jac.evaluate(point)
+        assert math.isclose(data[0], point[1])
+        assert math.isclose(data[2], math.cos(point[7]))
+        # the entries are compiled once, and the plan reused
+        plan = jac._plan
+        assert np.allclose(jac.evaluate(point * 2)[:3], [2 * point[1], 2 * point[0], math.cos(2 * point[7])])
+        assert jac._plan is plan
+        # a batch of points, and entries deeper than the recursion limit
+        g, expected = xs[0], np.array([0.1, 0.2])
+        for _ in range(5000):
+            g = sin(g) + xs[1]
+            expected = np.sin(expected) + [0.3, 0.4]
+        deep = SparseMatrixExpression((1, 2), [0, 2], [0, 1], [g, xs[0] * 2])
+        batch = deep.evaluate({xs[0]: np.array([0.1, 0.2]), xs[1]: np.array([0.3, 0.4])})
+        assert batch.shape == (2, 2)
+        assert np.allclose(batch, [expected, [0.2, 0.4]])
+
+    def test_column_order():
+        x, y = symbols('x y')
+        jac = get_sparse_jacobian_expression([x * y, 2, y], [y, x])
+        assert list(jac.indices) == [0, 1, 0]
+        assert list(jac.indptr) == [0, 2, 2, 3]
+        assert np.allclose(jac.toarray({x: 2, y: 3}), [[2, 3], [0, 0], [1, 0]])
+
+    def test_hessian():
+        x, y, z, w = symbols('x y z w')
+        f = x ** 2 * y + sin(z) + 3 * w
+        hess = get_sparse_hessian_expression(f, [x, y, z, w])
+        values = {x: 1.5, y: 2, z: 0.5, w: 7}
+        expected = np.array([[2 * 2, 2 * 1.5, 0, 0],
+                             [2 * 1.5, 0, 0, 0],
+                             [0, 0, -math.sin(0.5), 0],
+                             [0, 0, 0, 0]])
+        assert np.allclose(hess.toarray(values), expected)
+        # only entries of symbols that interact are stored, (x, y) and (y, x) share one expression
+        assert list(hess.indptr) == [0, 2, 4, 5, 6]
+        assert list(hess.indices) == [0, 1, 0, 1, 2, 3]
+        assert hess.entries[1] is hess.entries[2]
+        assert len(hess._unique) == 5
+        empty = get_sparse_hessian_expression(3, [x, y])
+        assert empty.nnz == 0 and np.allclose(empty.toarray(values), 0)
+
+    def test_to_scipy():
+        x = symbols('x')
+        jac = get_sparse_jacobian_expression([x ** 2], [x])
+        try:
+            import scipy
+        except ImportError:
+            try:
+                jac.to_scipy({x: 2})
+            except ImportError:
+                return
+            raise AssertionError('expected ImportError')
+        assert np.allclose(jac.to_scipy({x: 2}).toarray(), [[4]])
+
+    test_jacobian_pattern()
+    test_jacobian_large()
+    test_column_order()
+    test_hessian()
+    test_to_scipy()
+    print("Pass sparse jacobian & hessian!")
+
+
+test_sparse()
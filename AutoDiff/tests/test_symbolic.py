@@ -1,3 +1,7 @@
+import copy
+import pickle
+import tempfile
+
 from autodiff.symbolic import *
 from autodiff.elementary import *
 
@@ -53,6 +57,16 @@ def test_symbolic():
         assert np.allclose(get_jacobian_value([f3, f4], [y, x], values_set_2),
                            [[-4.00000000e+00, -3.00000000e+00], [-1.12481984e-32, -6.00000000e+00]])
 
+        # errors are raised as by Expression.evaluate, not returned as inf or nan
+        for f, v, error in [(1 / x, 0, ZeroDivisionError), (sqrt(x), -1, ValueError)]:
+            for cache in (None, DiskCache(tempfile.mkdtemp())):
+                try:
+                    get_jacobian_value([f], [x], {x: v}, cache=cache)
+                except error:
+                    pass
+                else:
+                    raise AssertionError('expected %s' % error.__name__)
+
     def test_get_expression():
         x, y, z = symbols('x y z')
         f1 = 2 ** cos(x)
@@ -67,10 +81,13 @@ def test_symbolic():
     def test_str():
         x = symbols('x')
         f = (log(x) + logb(x, x) - x) / x * x ** 2 + sin(cos(tan(x))) + sinh(cosh(tanh(x))) + arcsin(arccos(arctan(x)))
-        expected = "(((((((ln(x))+((ln(x))/(ln(x))))+((-1)*(x)))/(x))*((x)^(2)))+(sin(cos(tan(x)))))+(sinh(cosh(tanh(x)))))+(arcsin(arccos(arctan(x))))"
+        expected = "(((((((ln(x))+((ln(x))/(ln(x))))+(-(x)))/(x))*((x)^(2)))+(sin(cos(tan(x)))))+(sinh(cosh(tanh(x)))))+(arcsin(arccos(arctan(x))))"
         assert str(f) == expected
-        diff_expected = "(((((((((((1)/(x))+(((((1)/(x))*(ln(x)))+((-1)*((ln(x))*((1)/(x)))))/((ln(x))*(ln(x)))))+(((0)*(x))+((-1)*(1))))*(x))+((-1)*((((ln(x))+((ln(x))/(ln(x))))+((-1)*(x)))*(1))))/((x)*(x)))*((x)^(2)))+(((((ln(x))+((ln(x))/(ln(x))))+((-1)*(x)))/(x))*(((1)*(2))*((x)^(1)))))+(((((1)/((cos(x))*(cos(x))))*(sin(tan(x))))*(-1))*(cos(cos(tan(x))))))+((((1)/((cosh(x))*(cosh(x))))*(sinh(tanh(x))))*(cosh(cosh(tanh(x))))))+(((((1)*((1)/(((x)*(x))+(1))))*((1)/(((1)+((-1)*((arctan(x))*(arctan(x)))))^(0.5))))*(-1))*((1)/(((1)+((-1)*((arccos(arctan(x)))*(arccos(arctan(x))))))^(0.5))))"
+        diff_expected = "(((((((((((1)/(x))+(((((1)/(x))*(ln(x)))+(-((ln(x))*((1)/(x)))))/((ln(x))*(ln(x)))))+(-(1)))*(x))+(-((((ln(x))+((ln(x))/(ln(x))))+(-(x)))*(1))))/((x)*(x)))*((x)^(2)))+(((((ln(x))+((ln(x))/(ln(x))))+(-(x)))/(x))*(((1)*(2))*((x)^(1)))))+(((((1)/((cos(x))*(cos(x))))*(sin(tan(x))))*(-1))*(cos(cos(tan(x))))))+((((1)/((cosh(x))*(cosh(x))))*(sinh(tanh(x))))*(cosh(cosh(tanh(x))))))+(((((1)*((1)/(((x)*(x))+(1))))*((1)/(((1)+(-((arctan(x))*(arctan(x)))))^(0.5))))*(-1))*((1)/(((1)+(-((arccos(arctan(x)))*(arccos(arctan(x))))))^(0.5))))"
         assert str(diff(f, x)) == diff_expected
+        # a numeric subtrahend folds into one negative constant
+        assert str(x - 2) == "(x)+(-2)"
+        assert (x - 2).size == 3
 
     def test_div():
         x, y = symbols('x y')
@@ -196,6 +213,235 @@ def test_symbolic():
         assert math.isclose(f.evaluate(values), -3)
         assert math.isclose(diff(f, x).evaluate(values), -1)
 
+    def test_symbol_vector():
+        xs = symbols('x0:1000')
+        assert isinstance(xs, SymbolVector)
+        assert len(xs) == 1000
+        assert xs[0].name == 'x0' and xs[999].name == 'x999'
+        assert [i.index for i in xs[:3]] == [0, 1, 2]
+        f = 3 * xs[0] + xs[10] ** 2 - sin(xs[999])
+        point = np.arange(1000.)
+        expected = 3 * 0 + 100 - math.sin(999)
+        assert math.isclose(f.evaluate(point), expected)
+        assert math.isclose(f.evaluate(list(point)), expected)
+        assert math.isclose(f.evaluate({xs[0]: 0, xs[10]: 10, xs[999]: 999}), expected)
+        assert math.isclose(diff(f, xs[10]).evaluate(point), 20)
+        assert np.allclose(get_jacobian_value([f], [xs[0], xs[10]], point), [[3, 20]])
+        a, b, c = symbols('a b0:2')
+        assert (a.name, b.name, c.name) == ('a', 'b0', 'b1')
+        assert [i.name for i in symbols('y:3')] == ['y0', 'y1', 'y2']
+        # plain symbols still need a dict
+        x, y = symbols('x y')
+        try:
+            (x + y).evaluate([1, 2])
+        except TypeError:
+            pass
+        else:
+            raise AssertionError('expected TypeError')
+        try:
+            x.evaluate({y: 1})
+        except AssertionError:
+            pass
+        else:
+            raise AssertionError('expected AssertionError')
+        v = SymbolVector.from_symbols([x, y])
+        assert v[1] is y and y.index == 1
+        assert math.isclose((x - y).evaluate(np.array([5., 2.])), 3)
+        try:
+            SymbolVector.from_symbols([y, x])
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('expected ValueError')
+
+    def test_structure():
+        x, y, z = symbols('x y z')
+        f = sin(x * y) + 3
+        assert f.free_symbols == {x, y}
+        assert f.depends_on(x) and not f.depends_on(z)
+        assert not f.is_constant
+        assert (Constant(2) * 3).is_constant
+        assert f.depth == 4
+        assert f.size == 6
+        s = x * x
+        assert (s + s).size == 7
+        # structurally zero derivatives are not built
+        d = diff(f, z)
+        assert isinstance(d, Constant) and d.value == 0
+        assert isinstance(diff(f, x, z), Constant)
+        # constant operands of a power are folded, in O(1) for non-constant ones
+        p = (Constant(2) + 1) ** x
+        assert isinstance(p.base, Constant) and p.base.value == 3
+        g = x
+        for _ in range(3000):
+            g = g ** 1.0001
+        assert g.depth == 3001
+        assert g.free_symbols == {x}
+        # a node over the symbols of a child shares the child's mask object
+        wide = symbols('w0:300')
+        h = wide[-1] * wide[-2]
+        assert sin(h).mask is h.mask and (h + sin(h)).mask is h.mask
+        del wide, h
+        # the slots of collected symbols are reused: masks do not grow with every Symbol created
+        for _ in range(10000):
+            t = Symbol('t')
+            assert t.mask.bit_length() < 64
+            assert (t * x).free_symbols == {t, x}
+
+    def test_gradient():
+        x, y, z = symbols('x y z')
+        funcs = [3 * x + 4 * y * 2 - z,
+                 3 * sin(x) + 8 * y ** 3 + z ** 2,
+                 (tanh(cos(sin(y)) ** z) + logistic(z ** z, 2, 3, 4)) ** (1 / x),
+                 exp(arccos(tan(sin(y / 4))) + logb(z ** (1 / 2), 1 / 5) * sinh(x)),
+                 x ** y / (z * arctan(x) + cosh(y) * arcsin(x / 4)) - log(x * y * z),
+                 2 ** x * y ** 3 * x ** x]
+        values = {x: 1.5, y: 0.7, z: 2.5}
+        for f in funcs:
+            grads = gradient(f, [x, y, z])
+            for g, symbol in zip(grads, [x, y, z]):
+                assert math.isclose(g.evaluate(values), diff(f, symbol).evaluate(values), rel_tol=1e-9)
+        w = symbols('w')
+        gx, gw = gradient(x * y, [x, w])
+        assert isinstance(gw, Constant) and gw.value == 0
+        assert math.isclose(gx.evaluate(values), 0.7)
+        assert gradient(3, [x, y]) == [0, 0]
+
+    def test_gradient_size():
+        from autodiff.symbolic.graph import postorder
+        xs = symbols('x0:100')
+        f = xs[0]
+        for i in range(1, 100):
+            f = sin(f * xs[i]) + xs[i]
+        grads = gradient(f, list(xs))
+        # one shared DAG, linear in the size of f; n separate diffs would be quadratic
+        assert len(postorder(grads)) < 12 * len(postorder(f))
+        point = np.linspace(0.1, 1, 100)
+        assert math.isclose(grads[50].evaluate(point), diff(f, xs[50]).evaluate(point), rel_tol=1e-9)
+
+    def test_lazy_diff():
+        x, y, z = symbols('x y z')
+        f = (x ** y / (z * arctan(x) + cosh(y) * arcsin(x / 4)) - log(x * y * z)) * 2 ** x + sqrt(x) ** 3
+        values = {x: 1.5, y: 0.7, z: 2.5}
+        d = diff(f, x)
+        assert isinstance(d, LazyDerivative)
+        eager = diff(f, x, lazy=False)
+        assert math.isclose(d.evaluate(values), eager.evaluate(values), rel_tol=1e-12)
+        # evaluating never builds the derivative tree
+        assert d._materialized is None
+        assert str(d) == str(eager)
+        assert d._materialized is not None
+        # chained diff stays lazy, higher orders match
+        dxy = diff(d, y)
+        assert isinstance(dxy, LazyDerivative) and dxy.symbols == (x, y)
+        assert math.isclose(dxy.evaluate(values), diff(f, x, y, lazy=False).evaluate(values), rel_tol=1e-9)
+        assert math.isclose(diff(f, x, x).evaluate(values), diff(f, x, x, lazy=False).evaluate(values),
+                            rel_tol=1e-9)
+        # a lazy derivative inside a bigger expression
+        g = 3 * diff(x ** 3, x) + y
+        assert math.isclose(g.evaluate(values), 3 * 3 * 1.5 ** 2 + 0.7)
+        assert math.isclose(diff(g, x).evaluate(values), 3 * 6 * 1.5)
+        assert math.isclose(gradient(g, [x])[0].evaluate(values), 3 * 6 * 1.5)
+        # negative base with a constant exponent
+        assert math.isclose(diff(x ** 2, x).evaluate({x: -3}), -6)
+        assert diff(f) is f
+        # size and depth describe the derivative tree
+        d = diff(sin(x) ** x, x)
+        report = profile(d)
+        assert report['nodes'] >= report['unique_nodes']
+        assert d.size == d.materialize().size + 1 and d.depth == d.materialize().depth + 1
+        # a primal value the derivative does not need may be undefined
+        assert math.isclose(diff(log(x), x).evaluate({x: -1}), -1)
+
+    def test_specialize():
+        x, y, p, q = symbols('x y p q')
+        shared = sin(p * q) + x
+        f = shared * shared + exp(q) * y / p
+        g = f.specialize({p: 2.0, q: 0.5})
+        values = {x: 0.3, y: 1.7, p: 2.0, q: 0.5}
+        assert math.isclose(g.evaluate({x: 0.3, y: 1.7}), f.evaluate(values))
+        assert g.free_symbols == {x, y}
+        # the parameter only subtrees are folded to constants, sharing is kept
+        left, right = g.operands[0].operands
+        assert left is right
+        assert isinstance(left.operands[0], Constant)
+        assert len(postorder(g)) < len(postorder(f))
+        # untouched subtrees are reused, binding everything gives a Constant
+        h = x * y + p
+        assert h.specialize({p: 1}).operands[0] is h.operands[0]
+        assert isinstance(f.specialize({x: 1, y: 2, p: 3, q: 4}), Constant)
+        assert math.isclose(diff(g, x).evaluate({x: 0.3, y: 1.7}), diff(f, x).evaluate(values))
+
+    def test_node_types():
+        x, y = symbols('x y')
+        assert isinstance(exp(x), ExpExpression) and str(exp(x)) == 'exp(x)'
+        assert isinstance(sqrt(x), SqrtExpression) and str(sqrt(x)) == 'sqrt(x)'
+        assert isinstance(x ** 3, IntPowExpression) and isinstance(x ** 3.0, PowerExpression)
+        assert isinstance(-x, NegExpression) and str(x - y) == '(x)+(-(y))'
+        assert isinstance(1 / x, RecipExpression) and isinstance(2 / x, DivisionExpression)
+        f = exp(x * y) * sqrt(x) - 1 / (x ** 3 + y) + -(y ** -2)
+        values = {x: 0.7, y: 1.3}
+        expected = math.exp(0.91) * math.sqrt(0.7) - 1 / (0.7 ** 3 + 1.3) - 1.3 ** -2
+        assert math.isclose(f.evaluate(values), expected)
+        # closed form derivatives, against central differences
+        for symbol in (x, y):
+            h = 1e-6
+            shifted = lambda d: f.evaluate({**values, symbol: values[symbol] + d})
+            numeric = (shifted(h) - shifted(-h)) / (2 * h)
+            assert math.isclose(diff(f, symbol).evaluate(values), numeric, rel_tol=1e-6)
+            assert math.isclose(diff(f, symbol, lazy=False).evaluate(values), numeric, rel_tol=1e-6)
+            assert math.isclose(gradient(f, [symbol])[0].evaluate(values), numeric, rel_tol=1e-6)
+        assert math.isclose(diff(x ** 5, x, x).evaluate(values), 20 * 0.7 ** 3)
+        assert math.isclose(diff(exp(x), x, x, x).evaluate(values), math.exp(0.7))
+        try:
+            IntPowExpression(x, 0.5)
+        except TypeError:
+            pass
+        else:
+            raise AssertionError('expected TypeError')
+
+    def test_dual_inputs():
+        x, y, z = symbols('x y z')
+        f = sin(x * y) * exp(z) + x ** 3 / y - sqrt(z) * logb(y, 2)
+        values = {x: 0.4, y: 1.7, z: 0.9}
+        # one direction
+        result = f.evaluate({x: Dual(0.4, 1), y: 1.7, z: 0.9})
+        assert isinstance(result, Dual)
+        assert math.isclose(result.val, f.evaluate(values))
+        assert math.isclose(result.der, diff(f, x).evaluate(values))
+        # a batch of tangents: the whole gradient in one sweep
+        seeds = {s: Dual(values[s], 1, loc=i, length=3) for i, s in enumerate((x, y, z))}
+        result = f.evaluate(seeds)
+        assert np.allclose(result.der, [i.evaluate(values) for i in gradient(f, [x, y, z])])
+        # inputs indexed by Symbol.index, and a derivative as the model
+        xs = symbols('x0:3')
+        g = xs[0] * xs[1] ** 2 + tanh(xs[2])
+        result = diff(g, xs[1]).evaluate([Dual(1., 1), 2., 0.5])
+        assert math.isclose(result.val, 4.) and math.isclose(result.der, 4.)
+        # an expression not depending on the Dual input has a zero tangent
+        assert (y * 2).evaluate({x: Dual(1, 1), y: 3}).der == 0
+
+    def test_pickle():
+        x = symbols('x')
+        f = x * 5 + 3
+        loaded = pickle.loads(pickle.dumps(f))
+        assert str(loaded) == str(f) == '((x)*(5))+(3)'
+        # the shared small constants are not overwritten
+        assert str(Constant(0)) == '0'
+        assert copy.deepcopy(Constant(7)).value == 7
+        assert copy.deepcopy(Constant(1)) is Constant(1)
+        # unpickled symbols take new slots, and masks are recomputed over them
+        x, y = symbols('x y')
+        data = pickle.dumps([sin(x) * y, diff(sin(x) * y, x)])
+        del x, y
+        a, b = symbols('a b')
+        g, d = pickle.loads(data)
+        assert {s.name for s in g.free_symbols} == {'x', 'y'}
+        assert not g.depends_on(a) and not g.depends_on(b)
+        x = next(s for s in g.free_symbols if s.name == 'x')
+        assert str(diff(g, x)) == str(diff(g, x, lazy=False)) != '0'
+        assert {s.name for s in d.free_symbols} == {'x', 'y'}
+
     test_get_value()
     test_get_der()
     test_get_higher_order_der()
@@ -218,6 +464,15 @@ def test_symbolic():
     test_tanh()
     test_sqrt()
     test_neg()
+    test_symbol_vector()
+    test_structure()
+    test_gradient()
+    test_gradient_size()
+    test_lazy_diff()
+    test_specialize()
+    test_node_types()
+    test_dual_inputs()
+    test_pickle()
     print("Pass symbolic diff!")
 
 
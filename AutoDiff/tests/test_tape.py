@@ -0,0 +1,84 @@
+import math
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from autodiff.elementary import *
+from autodiff.symbolic import *
+
+
+def test_tape():
+    def test_scalar():
+        x, y = symbols('x y')
+        f = (log(x) + logb(x, y) - x) / x * x ** 2 + sin(cos(tan(x))) + 2 ** cos(y) + arctan(sqrt(y)) \
+            + exp(-x) / (1 + x ** -2) + arcsin(x / 4) * arccos(x / 5) + sinh(x) * cosh(y) * tanh(x * y)
+        values = {x: 1.3, y: 0.4}
+        assert math.isclose(f.freeze().evaluate(values), f.evaluate(values), rel_tol=1e-12)
+        d = diff(f, x)
+        tape = freeze([f, d])
+        assert np.allclose(tape.evaluate(values), [f.evaluate(values), d.evaluate(values)])
+        # positional values follow the slot order, fixed by symbols=
+        tape = freeze(x - y, symbols=[y, x])
+        assert tape.names == ['y', 'x']
+        assert tape.evaluate([1., 5.]) == 4.
+
+    def test_batch():
+        xs = symbols('x0:3')
+        f = sin(xs[0] * xs[1]) + xs[2] ** 3 - exp(xs[0])
+        tape = freeze(f, symbols=xs)
+        points = np.random.RandomState(0).uniform(-1, 1, size=(3, 500))
+        expected = [f.evaluate(points[:, k]) for k in range(500)]
+        assert np.allclose(tape.evaluate(points), expected)
+        # a two dimensional batch
+        assert tape.evaluate(points.reshape(3, 20, 25)).shape == (20, 25)
+
+    def test_compact():
+        xs = symbols('x0:50')
+        f = SumExpression([sin(xs[i]) * xs[(i + 1) % 50] for i in range(50)])
+        grads = gradient(f, list(xs))
+        tape = freeze(grads, symbols=xs)
+        assert len(tape) == len(postorder(grads))
+        assert tape.nbytes < 40 * len(tape)
+        point = np.linspace(0.1, 1, 50)
+        assert np.allclose(tape.evaluate(point), [g.evaluate(point) for g in grads])
+
+    def test_shared_memory():
+        x, y = symbols('x y')
+        f = x * y + sin(x)
+        data = freeze(f, symbols=[x, y]).tobytes()
+        shm = shared_memory.SharedMemory(create=True, size=len(data))
+        try:
+            shm.buf[:len(data)] = data
+            tape = Tape.frombuffer(shm.buf)
+            assert tape.symbols is None
+            assert math.isclose(tape.evaluate([2., 3.]), 6 + math.sin(2))
+            del tape
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def test_errors():
+        x, y = symbols('x y')
+        tape = freeze(x * y)
+        try:
+            tape.evaluate({x: 1})
+        except AssertionError:
+            pass
+        else:
+            raise AssertionError('expected AssertionError')
+        try:
+            tape.evaluate([1.])
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('expected ValueError')
+
+    test_scalar()
+    test_batch()
+    test_compact()
+    test_shared_memory()
+    test_errors()
+    print("Pass tape!")
+
+
+test_tape()
@@ -0,0 +1,94 @@
+import warnings
+
+import numpy as np
+
+from autodiff.node import *
+from autodiff.elementary import *
+from autodiff.model import *
+from autodiff.trace import *
+
+
+def test_trace():
+    def fn(x, y, z):
+        out = [x * y * z, exp(z) / x + 2 ** y - (3 - x) / y, logistic(x, 2, 3, 1) + logb(y, 3) + (+x) ** z + (-y) ** 2]
+        s = x
+        for _ in range(20):
+            s = s * 0.9 + tanh(s) * y
+            if s > 1:
+                s = s / 2
+        return out + [s, 5.]
+
+    def test_replay():
+        t = Trace(fn)
+        rs = np.random.RandomState(0)
+        for _ in range(10):
+            point, u = rs.uniform(0.5, 2, 3), rs.normal(size=5)
+            assert np.allclose(t.vjp(point, u), vjp(fn, point, u))
+            variables = [Node(v) for v in point]
+            assert np.allclose(t.get_jacobian(point), Reverse(fn(*variables), variables).get_jacobian())
+            assert np.allclose(t.value(point), fn(*point))
+        # a block of cotangents in one replay
+        block = rs.normal(size=(5, 3))
+        assert np.allclose(t.vjp(point, block), vjp_batch(fn, point, block))
+        assert t.nbytes > 0
+
+    def test_guards():
+        calls = []
+
+        def f(x, y):
+            calls.append(1)
+            return x * sin(y) if x > 0 else -x * y
+        t = Trace(f)
+        assert t.vjp([2., 0.], 1.).tolist() == [0., 2.]
+        # the same branch: replayed without calling f
+        assert np.allclose(t.vjp([3., 1.], 1.), [np.sin(1.), 3 * np.cos(1.)])
+        assert np.isclose(t.value([3., 1.]), 3 * np.sin(1.))
+        assert len(calls) == 1 and t.retraces == 1
+        # x > 0 fails: f is recorded again, and both branches are kept
+        assert t.vjp([-1., 3.], 1.).tolist() == [-3., 1.]
+        assert t.retraces == 2
+        assert t.vjp([-2., 3.], 1.).tolist() == [-3., 2.] and t.vjp([1., 0.], 1.).tolist() == [0., 1.]
+        assert len(calls) == 2 and len(t.branches) == 2
+        # a stale branch is not replayed: no warning from log at x < 0
+        t = Trace(lambda x: log(x) if x > 0 else -x)
+        t.vjp([2.], 1.)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            assert t.vjp([-1.], 1.).tolist() == [-1.]
+
+    def test_keywords():
+        # keyword arguments are mirrored on the tape too
+        f = lambda x, y: logistic(x, L=2, k=3) * y + logb(y, base=3)
+        t = Trace(f)
+        for point in ([0.5, 3.], [2., 1.5]):
+            assert np.allclose(t.vjp(point, 1.), vjp(f, point, 1.))
+            assert np.isclose(t.value(point), f(*point))
+        assert t.retraces == 1
+
+    def test_hooks():
+        # Node runs its own methods outside of a recording
+        add, lt = Node.__add__, Node.__lt__
+        Trace(lambda x: x + 1 if x < 2 else x).value([1.])
+        assert Node.__add__ is add and Node.__lt__ is lt and Node._recorder is None
+
+    def test_constants():
+        # values read through .val are constants of the tape
+        t = Trace(lambda x: x * x.val)
+        assert t.vjp([3.], 1.).tolist() == [3.]
+        assert t.vjp([5.], 1.).tolist() == [3.]
+        try:
+            t.vjp([5.], [1., 1.])
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('expected ValueError')
+
+    test_replay()
+    test_guards()
+    test_keywords()
+    test_hooks()
+    test_constants()
+    print("Pass trace!")
+
+
+test_trace()